@@ -1,6 +1,7 @@
 import logging
 import os
 from contextlib import asynccontextmanager
+from pathlib import Path
 from typing import Any, cast
 from uuid import uuid4
 
@@ -24,10 +25,20 @@ from backend.app.schemas import (
     FeedbackRequest,
     FeedbackResponse,
 )
-from backend.db.weaviate.connection import WeaviateManager
-from config import OllamaSettings, WeaviateSettings
+from backend.db.local.connection import LocalRetrievalManager
+from backend.db.local.keyword_index import KeywordIndex
+from backend.db.retrieval import RetrievalBackend
+from backend.db.weaviate.connection import NativeEmbedding, WeaviateManager
+from backend.db.weaviate.schema import VectorIndexSpec
+from config import (
+    OllamaSettings,
+    RankingSettings,
+    RetrievalSettings,
+    WeaviateSettings,
+)
 from llm.graph import agent
 from logger_config import setup_logging
+from nlp.title_index import TitleIndex
 from nlp.toolkit import NLPToolkit
 
 setup_logging("backend")
@@ -58,6 +69,16 @@ def create_langchain_client():
     return langchain_client
 
 
+def create_retrieval_backend() -> RetrievalBackend:
+    retrieval_settings = RetrievalSettings()
+    if retrieval_settings.RETRIEVAL_BACKEND == "local":
+        embedder = NativeEmbedding(WeaviateSettings().EMBEDDING_SERVER_URL)
+        return LocalRetrievalManager.from_directory(
+            retrieval_settings.LOCAL_STORE_PATH, embedder.get_query_embedding
+        )
+    return create_weaviate_client()
+
+
 def create_weaviate_client():
 
     weaviate_settings = WeaviateSettings()
@@ -69,10 +90,33 @@ def create_weaviate_client():
         api_key=weaviate_api_key,
         host=weaviate_host,
         native_embedding_url=embed_url,
+        vector_index=VectorIndexSpec.from_settings(weaviate_settings),
     )
     return weaviate_client
 
 
+def create_title_index() -> TitleIndex | None:
+    retrieval_settings = RetrievalSettings()
+    if not Path(retrieval_settings.TITLE_INDEX_PATH).exists():
+        logger.warning(
+            f"Title index {retrieval_settings.TITLE_INDEX_PATH} not found, "
+            "title fast path is disabled"
+        )
+        return None
+    return TitleIndex(retrieval_settings.TITLE_INDEX_PATH)
+
+
+def create_keyword_index() -> KeywordIndex | None:
+    retrieval_settings = RetrievalSettings()
+    if not Path(retrieval_settings.KEYWORD_INDEX_PATH).exists():
+        logger.warning(
+            f"Keyword index {retrieval_settings.KEYWORD_INDEX_PATH} not found, "
+            "keyword search is left to the retrieval backend"
+        )
+        return None
+    return KeywordIndex(retrieval_settings.KEYWORD_INDEX_PATH)
+
+
 def verify_clients(raw_openai_client, weaviate_client, nlp_toolkit) -> None:
 
     try:
@@ -82,8 +126,10 @@ def verify_clients(raw_openai_client, weaviate_client, nlp_toolkit) -> None:
         raise RuntimeError(f"LLM healthcheck failed: {e}") from e
 
     if not weaviate_client.is_healthy():
-        logger.error("Weaviate healthcheck failed (is_healthy() is False)")
-        raise RuntimeError("Weaviate healthcheck failed (is_healthy() is False)")
+        logger.error("Retrieval backend healthcheck failed (is_healthy() is False)")
+        raise RuntimeError(
+            "Retrieval backend healthcheck failed (is_healthy() is False)"
+        )
 
     if nlp_toolkit is None:
         logger.error("NLPToolkit is not initialized")
@@ -115,8 +161,13 @@ async def lifespan(app: FastAPI):
 
     raw_instructor, instructor_client = create_instructor_client()
     langchain_client = create_langchain_client()
-    weaviate_client = create_weaviate_client()
-    nlp_toolkit = NLPToolkit()
+    weaviate_client = create_retrieval_backend()
+    ranking_settings = RankingSettings()
+    nlp_toolkit = NLPToolkit(
+        ranking_backend=ranking_settings.RERANKER_BACKEND,
+        ranking_max_length=ranking_settings.RERANKER_MAX_LENGTH,
+        ranking_threads=ranking_settings.RERANKER_THREADS,
+    )
 
     logger.info("Warming up CrossEncoder.")
     try:
@@ -128,16 +179,26 @@ async def lifespan(app: FastAPI):
 
     verify_clients(raw_instructor, weaviate_client, nlp_toolkit)
 
+    # migrations are run by the parser, the API only reports an outdated schema
+    weaviate_client.ensure_schema(auto_migrate=False)
+
     app.state.instructor_client = instructor_client
     app.state.langchain_client = langchain_client
     app.state.weaviate_client = weaviate_client
     app.state.nlp_toolkit = nlp_toolkit
+    app.state.title_index = create_title_index()
+    app.state.title_lead_chunks = RetrievalSettings().TITLE_LEAD_CHUNKS
+    app.state.keyword_index = create_keyword_index()
     app.state.chat_last_session = None
     app.state.app_run_id = uuid4()
 
     yield
     logger.info("Shutting down connection to Weaviate.")
     weaviate_client.close()
+    if app.state.title_index is not None:
+        app.state.title_index.close()
+    if app.state.keyword_index is not None:
+        app.state.keyword_index.close()
 
 
 app = FastAPI(title="WIKI RAG", version="0.1.0", lifespan=lifespan)
@@ -260,6 +321,9 @@ async def chat(
                 "weaviate_client": weaviate_client,
                 "nlp_toolkit": nlp_toolkit,
                 "langchain_client": langchain_client,
+                "title_index": request.app.state.title_index,
+                "title_lead_chunks": request.app.state.title_lead_chunks,
+                "keyword_index": request.app.state.keyword_index,
             }
         }
 
@@ -0,0 +1,78 @@
+import math
+import re
+from collections import Counter, defaultdict
+from collections.abc import Callable
+
+import numpy as np
+
+_TOKEN = re.compile(r"\w+")
+
+
+def simple_tokenize(text: str) -> list[str]:
+    """Lowercased word tokens"""
+    return _TOKEN.findall(text.lower())
+
+
+class BM25Index:
+    """
+    In-memory BM25 (Okapi) inverted index: for every term an array of document
+    positions and term frequencies. Scoring only touches postings of query terms.
+    """
+
+    def __init__(
+        self,
+        texts: list[str],
+        tokenize: Callable[[str], list[str]] = simple_tokenize,
+        k1: float = 1.2,
+        b: float = 0.75,
+    ):
+        self.tokenize = tokenize
+        self.k1 = k1
+        self.b = b
+        self.doc_count = len(texts)
+
+        postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            tokens = tokenize(text)
+            lengths[doc] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                postings[term].append((doc, tf))
+
+        self.doc_lengths = lengths
+        self.avg_length = float(lengths.mean()) if len(texts) else 0.0
+        self.postings = {
+            term: (
+                np.fromiter(
+                    (doc for doc, _ in items), dtype=np.int32, count=len(items)
+                ),
+                np.fromiter(
+                    (tf for _, tf in items), dtype=np.float32, count=len(items)
+                ),
+            )
+            for term, items in postings.items()
+        }
+
+    def idf(self, term: str) -> float:
+        df = len(self.postings[term][0]) if term in self.postings else 0
+        return math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))
+
+    def search(self, query: str, limit: int) -> list[tuple[int, float]]:
+        """(document position, score) of the best matching documents"""
+        accumulated = np.zeros(self.doc_count, dtype=np.float32)
+        touched = []
+        for term in set(self.tokenize(query)):
+            if term not in self.postings:
+                continue
+            docs, tfs = self.postings[term]
+            norm = self.k1 * (
+                1 - self.b + self.b * self.doc_lengths[docs] / self.avg_length
+            )
+            accumulated[docs] += self.idf(term) * tfs * (self.k1 + 1) / (tfs + norm)
+            touched.append(docs)
+        if not touched:
+            return []
+
+        candidates = np.unique(np.concatenate(touched))
+        top = candidates[np.argsort(-accumulated[candidates], kind="stable")[:limit]]
+        return [(int(doc), float(accumulated[doc])) for doc in top]
@@ -0,0 +1,165 @@
+import json
+import logging
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from backend.db.local.bm25 import BM25Index
+from backend.db.retrieval import RetrievalBackend, fuse_relative_scores
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILENAME = "vectors.npy"
+CHUNKS_FILENAME = "chunks.jsonl"
+ARTICLES_FILENAME = "articles.jsonl"
+
+
+def write_local_store(
+    directory: str,
+    chunks: Iterable[dict[str, Any]],
+    vectors: np.ndarray,
+    articles: Iterable[dict[str, Any]],
+) -> None:
+    """
+    Save chunks (source_id, chunk_id, chunk_text), their vectors (same order) and
+    article titles (source_id, source_title) in the local store format.
+    """
+    path = Path(directory)
+    path.mkdir(parents=True, exist_ok=True)
+    vectors = np.asarray(vectors, dtype=np.float32)
+    # normalized once, so that a dot product is the cosine similarity
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.save(path / VECTORS_FILENAME, vectors / np.where(norms == 0, 1, norms))
+    with (path / CHUNKS_FILENAME).open("w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(json.dumps(chunk, ensure_ascii=False) + "\n")
+    with (path / ARTICLES_FILENAME).open("w", encoding="utf-8") as f:
+        for article in articles:
+            f.write(json.dumps(article, ensure_ascii=False) + "\n")
+
+
+def _read_jsonl(path: Path) -> list[dict[str, Any]]:
+    with path.open(encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+class LocalRetrievalManager(RetrievalBackend):
+    """
+    In-process retrieval over a local store, no Weaviate needed.
+
+    Vectors are a memory-mapped float32 matrix searched by brute force (one BLAS
+    matrix-vector product), keyword search is an in-memory BM25 index. Hybrid
+    results are fused like Weaviate's relative score fusion: both result lists
+    are min-max normalized and weighted by alpha.
+    """
+
+    def __init__(
+        self,
+        chunks: list[dict[str, Any]],
+        vectors: np.ndarray,
+        articles: dict[str, str],
+        embed_query: Callable[[str], list[float]],
+        hybrid_candidates: int = 100,
+    ):
+        if len(chunks) != len(vectors):
+            raise ValueError(
+                f"{len(chunks)} chunks do not match {len(vectors)} vectors"
+            )
+        self.chunks = chunks
+        self.vectors = vectors
+        self.articles = articles
+        self.embed_query = embed_query
+        self.hybrid_candidates = hybrid_candidates
+        self.positions = {
+            (chunk["source_id"], chunk["chunk_id"]): i for i, chunk in enumerate(chunks)
+        }
+        # titles are searchable like the source_title property of WikiChunk
+        self.bm25 = BM25Index(
+            [
+                f"{articles.get(chunk['source_id'], '')}\n{chunk['chunk_text']}"
+                for chunk in chunks
+            ]
+        )
+        logger.info(f"Local retrieval backend ready with {len(chunks)} chunks")
+
+    @classmethod
+    def from_directory(
+        cls, directory: str, embed_query: Callable[[str], list[float]]
+    ) -> "LocalRetrievalManager":
+        """Load a store written by write_local_store, vectors are memory-mapped"""
+        path = Path(directory)
+        vectors = np.load(path / VECTORS_FILENAME, mmap_mode="r")
+        chunks = _read_jsonl(path / CHUNKS_FILENAME)
+        articles = {
+            article["source_id"]: article.get("source_title", "")
+            for article in _read_jsonl(path / ARTICLES_FILENAME)
+        }
+        return cls(chunks, vectors, articles, embed_query)
+
+    def is_healthy(self) -> bool:
+        return True
+
+    def close(self) -> None:
+        return None
+
+    def _result(self, position: int, score: float) -> dict[str, Any]:
+        chunk = self.chunks[position]
+        return {
+            "source_id": chunk["source_id"],
+            "source_title": self.articles.get(chunk["source_id"], ""),
+            "chunk_id": chunk["chunk_id"],
+            "chunk_text": chunk["chunk_text"],
+            "score": score,
+        }
+
+    def vector_search(self, query_text: str, limit: int) -> list[tuple[int, float]]:
+        """(chunk position, cosine similarity) of the nearest chunks"""
+        if not self.chunks:
+            return []
+        query = np.asarray(self.embed_query(query_text), dtype=np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        similarities = self.vectors @ query
+        limit = min(limit, len(similarities))
+        top = np.argpartition(-similarities, limit - 1)[:limit]
+        top = top[np.argsort(-similarities[top], kind="stable")]
+        return [(int(i), float(similarities[i])) for i in top]
+
+    def single_wikichunk_hybrid_fetch(
+        self, query_text: str, weaviate_limit: int, alpha: float
+    ) -> list[dict]:
+        """
+        Single query hybrid search
+        """
+        candidates = max(weaviate_limit, self.hybrid_candidates)
+        vector_scores = (
+            dict(self.vector_search(query_text, candidates)) if alpha > 0 else {}
+        )
+        keyword_scores = (
+            dict(self.bm25.search(query_text, candidates)) if alpha < 1 else {}
+        )
+
+        best = fuse_relative_scores(vector_scores, keyword_scores, alpha)
+        return [
+            self._result(position, score) for position, score in best[:weaviate_limit]
+        ]
+
+    def fetch_wikichunks_by_keys(
+        self, keys: list[tuple[str, int]]
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch chunks by (source_id, chunk_id) keys and initialize them with default
+        ranking score. Keys that do not exist are skipped.
+        """
+        fetched_chunks = []
+        for key in dict.fromkeys(keys):
+            position = self.positions.get(key)
+            if position is None:
+                continue
+            chunk = self._result(position, 0.0)
+            chunk["rank_score"] = -999.0
+            fetched_chunks.append(chunk)
+
+        fetched_chunks.sort(key=lambda x: (x["source_id"], x["chunk_id"]))
+        return fetched_chunks
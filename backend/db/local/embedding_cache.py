@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Content-addressed cache of embeddings, shared by parser runs and workers.
+    Vectors are float32 blobs keyed by embedding model and hash of the embedding
+    input (see text_hash), so a different model never reads stale vectors.
+    """
+
+    def __init__(self, db_path: str):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (model TEXT, hash TEXT, "
+            "vector BLOB NOT NULL, PRIMARY KEY (model, hash)) WITHOUT ROWID"
+        )
+        self.connection.commit()
+
+    def __enter__(self) -> EmbeddingCache:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def get_many(self, model: str, hashes: list[str]) -> dict[str, list[float]]:
+        """Cached vectors by hash, hashes without a vector are left out"""
+        found = {}
+        unique = list(dict.fromkeys(hashes))
+        # SQLite limits the number of bound parameters of a single statement
+        for i in range(0, len(unique), 500):
+            page = unique[i : i + 500]
+            placeholders = ", ".join("?" * len(page))
+            for hash_, blob in self.connection.execute(
+                f"SELECT hash, vector FROM embeddings "
+                f"WHERE model = ? AND hash IN ({placeholders})",
+                [model, *page],
+            ):
+                found[hash_] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, model: str, vectors: dict[str, list[float]]) -> None:
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                (
+                    (model, hash_, np.asarray(vector, dtype=np.float32).tobytes())
+                    for hash_, vector in vectors.items()
+                ),
+            )
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import logging
+import math
+import sqlite3
+import zlib
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+
+def encode_postings(docs: np.ndarray, tfs: np.ndarray) -> bytes:
+    """Ascending doc ids as gaps (uint32) followed by term frequencies (uint16), zlib"""
+    gaps = np.diff(docs, prepend=0).astype(np.uint32)
+    return zlib.compress(gaps.tobytes() + tfs.astype(np.uint16).tobytes())
+
+
+def decode_postings(data: bytes, count: int) -> tuple[np.ndarray, np.ndarray]:
+    raw = zlib.decompress(data)
+    gaps = np.frombuffer(raw, dtype=np.uint32, count=count)
+    tfs = np.frombuffer(raw, dtype=np.uint16, count=count, offset=4 * count)
+    return np.cumsum(gaps, dtype=np.int64), tfs.astype(np.float32)
+
+
+class KeywordIndex:
+    """
+    Persistent BM25 inverted index over chunk_text, stored in SQLite.
+
+    Terms are whatever the caller passes in, the parser and the backend use
+    lemmas from NLP.lemmatize_tokens, so inflected forms ("Warszawie") match their
+    base form ("Warszawa"). The index grows by segments: every add_chunks call
+    appends one compressed posting list per term, doc ids only ever increase, so
+    segments of a term concatenate into one ascending list. Re-added articles
+    replace their previous chunks, postings of replaced chunks are skipped when
+    searching (document frequencies keep counting them until a rebuild).
+
+    Top-k search uses MaxScore: terms whose score upper bounds together cannot
+    lift a document into the current top-k are only probed for documents found
+    through the other terms, instead of being scanned.
+    """
+
+    def __init__(self, db_path: str, k1: float = 1.2, b: float = 0.75):
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.k1 = k1
+        self.b = b
+        # transactions are explicit, writers of parallel parser workers queue up
+        self.connection = sqlite3.connect(
+            db_path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc INTEGER PRIMARY KEY, source_id TEXT NOT NULL,
+                chunk_id INTEGER NOT NULL, length INTEGER NOT NULL);
+            CREATE INDEX IF NOT EXISTS docs_source ON docs (source_id);
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY, df INTEGER NOT NULL, max_tf INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT, segment INTEGER, count INTEGER NOT NULL, data BLOB NOT NULL,
+                PRIMARY KEY (term, segment)) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS stats (
+                id INTEGER PRIMARY KEY CHECK (id = 0), segments INTEGER NOT NULL,
+                next_doc INTEGER NOT NULL, doc_count INTEGER NOT NULL,
+                total_length INTEGER NOT NULL);
+            INSERT OR IGNORE INTO stats VALUES (0, 0, 0, 0, 0);
+            """
+        )
+        self._doc_lengths: np.ndarray | None = None
+
+    def __enter__(self) -> KeywordIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def _stats(self) -> tuple[int, int, int, int]:
+        """(segments, next doc id, live doc count, total length of live docs)"""
+        return self.connection.execute(
+            "SELECT segments, next_doc, doc_count, total_length FROM stats"
+        ).fetchone()
+
+    def add_chunks(self, chunks: list[dict[str, Any]], tokens: list[list[str]]) -> int:
+        """
+        Index chunks (source_id, chunk_id) with their terms, as one new segment.
+        Chunks of articles that were indexed before are replaced. Returns the
+        number of indexed chunks.
+        """
+        if not chunks:
+            return 0
+        if len(chunks) != len(tokens):
+            raise ValueError(f"{len(chunks)} chunks do not match {len(tokens)} tokens")
+
+        # next_doc is read and bumped in one write transaction
+        self.connection.execute("BEGIN IMMEDIATE")
+        try:
+            source_ids = list(dict.fromkeys(chunk["source_id"] for chunk in chunks))
+            replaced_count, replaced_length = 0, 0
+            for i in range(0, len(source_ids), 500):
+                page = source_ids[i : i + 500]
+                placeholders = ", ".join("?" * len(page))
+                count, length = self.connection.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(length), 0) FROM docs "
+                    f"WHERE source_id IN ({placeholders})",
+                    page,
+                ).fetchone()
+                replaced_count += count
+                replaced_length += length
+                self.connection.execute(
+                    f"DELETE FROM docs WHERE source_id IN ({placeholders})", page
+                )
+
+            # doc ids are never reused, not even ids of replaced chunks
+            segment, next_doc, _, _ = self._stats()
+
+            postings: dict[str, list[tuple[int, int]]] = {}
+            docs = []
+            for offset, (chunk, terms) in enumerate(zip(chunks, tokens, strict=True)):
+                doc = next_doc + offset
+                docs.append((doc, chunk["source_id"], chunk["chunk_id"], len(terms)))
+                for term, tf in Counter(terms).items():
+                    postings.setdefault(term, []).append((doc, tf))
+
+            self.connection.executemany("INSERT INTO docs VALUES (?, ?, ?, ?)", docs)
+            self.connection.executemany(
+                "INSERT INTO postings VALUES (?, ?, ?, ?)",
+                (
+                    (
+                        term,
+                        segment,
+                        len(items),
+                        encode_postings(
+                            np.array([doc for doc, _ in items], dtype=np.int64),
+                            np.array([tf for _, tf in items]),
+                        ),
+                    )
+                    for term, items in postings.items()
+                ),
+            )
+            self.connection.executemany(
+                "INSERT INTO terms VALUES (?, ?, ?) ON CONFLICT (term) DO UPDATE SET "
+                "df = df + excluded.df, max_tf = MAX(max_tf, excluded.max_tf)",
+                (
+                    (term, len(items), max(tf for _, tf in items))
+                    for term, items in postings.items()
+                ),
+            )
+            self.connection.execute(
+                "UPDATE stats SET segments = segments + 1, next_doc = ?, "
+                "doc_count = doc_count + ?, total_length = total_length + ?",
+                (
+                    next_doc + len(docs),
+                    len(docs) - replaced_count,
+                    sum(doc[3] for doc in docs) - replaced_length,
+                ),
+            )
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+        self._doc_lengths = None
+        return len(docs)
+
+    def _lengths(self, next_doc: int) -> np.ndarray:
+        """
+        Length of every live doc indexed by doc id, replaced docs have -1. Reloaded
+        when chunks were added since, also by another process.
+        """
+        if self._doc_lengths is None or len(self._doc_lengths) < next_doc:
+            lengths = np.full(next_doc, -1, dtype=np.float32)
+            rows = self.connection.execute("SELECT doc, length FROM docs").fetchall()
+            if rows:
+                ids, values = zip(*rows, strict=True)
+                lengths[list(ids)] = values
+            self._doc_lengths = lengths
+        return self._doc_lengths
+
+    def _postings(self, term: str) -> tuple[np.ndarray, np.ndarray]:
+        segments = [
+            decode_postings(data, count)
+            for count, data in self.connection.execute(
+                "SELECT count, data FROM postings WHERE term = ? ORDER BY segment",
+                (term,),
+            )
+        ]
+        docs = np.concatenate([docs for docs, _ in segments])
+        tfs = np.concatenate([tfs for _, tfs in segments])
+        return docs, tfs
+
+    def _score(
+        self,
+        idf: float,
+        docs: np.ndarray,
+        tfs: np.ndarray,
+        lengths: np.ndarray,
+        avg_length: float,
+    ) -> np.ndarray:
+        norm = self.k1 * (1 - self.b + self.b * lengths[docs] / avg_length)
+        return idf * tfs * (self.k1 + 1) / (tfs + norm)
+
+    def search(self, terms: Iterable[str], limit: int) -> list[tuple[str, int, float]]:
+        """
+        (source_id, chunk_id, BM25 score) of the best matching chunks.
+
+        Terms are taken as essential from the highest score upper bound down, until
+        the upper bounds of the remaining terms together cannot reach the k-th best
+        score so far. Only documents of essential terms are candidates, remaining
+        posting lists are just probed for them by binary search.
+        """
+        _, next_doc, doc_count, total_length = self._stats()
+        if not doc_count or limit <= 0:
+            return []
+        avg_length = total_length / doc_count
+        lengths = self._lengths(next_doc)
+
+        lists = []
+        for term in dict.fromkeys(terms):
+            row = self.connection.execute(
+                "SELECT df, max_tf FROM terms WHERE term = ?", (term,)
+            ).fetchone()
+            if row is None:
+                continue
+            df, max_tf = row
+            idf = math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+            # score grows with tf and falls with length, max_tf at length 0 bounds it
+            upper = idf * max_tf * (self.k1 + 1) / (max_tf + self.k1 * (1 - self.b))
+            lists.append((upper, idf, term))
+        if not lists:
+            return []
+        lists.sort()
+        # bounds[i]: sum of upper bounds of the i least important terms
+        bounds = np.cumsum([0.0] + [upper for upper, _, _ in lists])
+
+        accumulated = np.zeros(len(lengths), dtype=np.float32)
+        is_candidate = np.zeros(len(lengths), dtype=bool)
+        threshold = 0.0
+        essential = len(lists)
+        while essential > 0 and bounds[essential] > threshold:
+            essential -= 1
+            _, idf, term = lists[essential]
+            docs, tfs = self._postings(term)
+            live = lengths[docs] >= 0
+            docs, tfs = docs[live], tfs[live]
+            accumulated[docs] += self._score(idf, docs, tfs, lengths, avg_length)
+            is_candidate[docs] = True
+            # final scores only grow, so the current k-th best is a lower bound
+            scores = accumulated[is_candidate]
+            if len(scores) >= limit:
+                threshold = float(np.partition(scores, -limit)[-limit])
+
+        candidates = np.flatnonzero(is_candidate)
+        for _, idf, term in lists[:essential]:
+            docs, tfs = self._postings(term)
+            found = np.searchsorted(docs, candidates).clip(max=len(docs) - 1)
+            hit = docs[found] == candidates
+            accumulated[candidates[hit]] += self._score(
+                idf, candidates[hit], tfs[found[hit]], lengths, avg_length
+            )
+        logger.debug(
+            f"Keyword search: {len(lists) - essential} of {len(lists)} terms "
+            f"essential, {len(candidates)} candidates"
+        )
+
+        order = np.argsort(-accumulated[candidates], kind="stable")[:limit]
+        return self._keys(
+            [(float(accumulated[doc]), int(doc)) for doc in candidates[order]]
+        )
+
+    def _keys(self, top: list[tuple[float, int]]) -> list[tuple[str, int, float]]:
+        docs = [doc for _, doc in top]
+        placeholders = ", ".join("?" * len(docs))
+        keys = {
+            doc: (source_id, chunk_id)
+            for doc, source_id, chunk_id in self.connection.execute(
+                f"SELECT doc, source_id, chunk_id FROM docs WHERE doc IN ({placeholders})",
+                docs,
+            )
+        }
+        return [(*keys[doc], score) for score, doc in top]
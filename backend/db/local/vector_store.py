@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+META_FILENAME = "meta.json"
+VECTORS_FILENAME = "vectors.f32"
+RECORDS_FILENAME = "chunks.jsonl"
+
+
+def text_hash(text: str) -> str:
+    """Hash of an embedding input, a vector is reusable while the input is the same"""
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class ChunkVectorStore:
+    """
+    Append-only store of chunk vectors, so that collections can be rebuilt without
+    calling the embedding server again.
+
+    Vectors are rows of a raw float32 file, read back through a memory map, and
+    chunks.jsonl holds one record per row: source_id, chunk_id, source_title,
+    chunk_text, duplicate_of of flagged near-duplicates, text_hash of the
+    embedding input and the version of the import. An article parsed again is
+    appended again under a new version and older rows of that article are
+    ignored, whichever of its chunks were stored. Vectors are written before
+    their records, so a crash leaves at most trailing vectors without a record,
+    they are cut off on open. A store has one writing process at a time.
+    """
+
+    def __init__(self, directory: str):
+        self.path = Path(directory)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        meta_path = self.path / META_FILENAME
+        self.dim: int | None = (
+            json.loads(meta_path.read_text())["dim"] if meta_path.exists() else None
+        )
+        self.count = self._repair()
+
+    def _repair(self) -> int:
+        """Drop a partially written record and vectors without a record"""
+        records_path = self.path / RECORDS_FILENAME
+        vectors_path = self.path / VECTORS_FILENAME
+        if not records_path.exists():
+            records_path.touch()
+        count, complete, position = 0, 0, 0
+        with records_path.open("rb+") as f:
+            while block := f.read(1 << 20):
+                if (last := block.rfind(b"\n")) >= 0:
+                    count += block.count(b"\n")
+                    complete = position + last + 1
+                position += len(block)
+            if complete < position:
+                f.truncate(complete)
+        if vectors_path.exists() and self.dim is not None:
+            size = count * self.dim * 4
+            if vectors_path.stat().st_size > size:
+                logger.warning(f"Cutting off vectors without a record in {self.path}")
+                os.truncate(vectors_path, size)
+        return count
+
+    def append(
+        self,
+        chunks: list[dict[str, Any]],
+        embedding_inputs: list[str],
+        vectors: list[list[float]],
+        titles: dict[str, str] | None = None,
+        version: str | None = None,
+    ) -> None:
+        """
+        Append chunks with the vectors of their embedding inputs. Chunks of one
+        parse of an article appended in several calls share their version
+        (new_version), without it every call is a version of its own.
+        """
+        if not chunks:
+            return
+        version = version or self.new_version()
+        matrix = np.asarray(vectors, dtype=np.float32)
+        if not len(chunks) == len(embedding_inputs) == len(matrix):
+            raise ValueError(
+                f"{len(chunks)} chunks, {len(embedding_inputs)} inputs and "
+                f"{len(matrix)} vectors do not match"
+            )
+        titles = titles or {}
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(matrix.shape[1])
+                (self.path / META_FILENAME).write_text(json.dumps({"dim": self.dim}))
+            if matrix.shape[1] != self.dim:
+                raise ValueError(
+                    f"Vectors of dimension {matrix.shape[1]} do not fit a store "
+                    f"of dimension {self.dim}"
+                )
+            with (self.path / VECTORS_FILENAME).open("ab") as f:
+                f.write(matrix.tobytes())
+            with (self.path / RECORDS_FILENAME).open("a", encoding="utf-8") as f:
+                for chunk, text in zip(chunks, embedding_inputs, strict=True):
+                    record = {
+                        "source_id": chunk["source_id"],
+                        "chunk_id": chunk["chunk_id"],
+                        "source_title": titles.get(chunk["source_id"], ""),
+                        "chunk_text": chunk["chunk_text"],
+                        "text_hash": text_hash(text),
+                        "version": version,
+                    }
+                    if chunk.get("duplicate_of"):
+                        record["duplicate_of"] = chunk["duplicate_of"]
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self.count += len(chunks)
+
+    @staticmethod
+    def new_version() -> str:
+        return uuid.uuid4().hex
+
+    def vectors(self) -> np.ndarray:
+        """All stored rows, memory-mapped"""
+        if self.dim is None or self.count == 0:
+            return np.empty((0, self.dim or 0), dtype=np.float32)
+        return np.memmap(
+            self.path / VECTORS_FILENAME,
+            dtype=np.float32,
+            mode="r",
+            shape=(self.count, self.dim),
+        )
+
+    def latest(self) -> tuple[list[dict[str, Any]], np.ndarray]:
+        """
+        Records of the latest version of every article and their row numbers, in
+        (source_id, chunk_id) order.
+        """
+        latest: dict[str, dict[int, tuple[int, dict[str, Any]]]] = {}
+        versions: dict[str, str | None] = {}
+        with (self.path / RECORDS_FILENAME).open(encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                if row >= self.count:
+                    break
+                record = json.loads(line)
+                source_id = record["source_id"]
+                chunks = latest.setdefault(source_id, {})
+                version = record.get("version")
+                if version is None:
+                    # rows written before versions were stored start one at chunk 0
+                    starts_version = record["chunk_id"] == 0
+                else:
+                    starts_version = versions.get(source_id) != version
+                if starts_version:
+                    chunks.clear()
+                versions[source_id] = version
+                chunks[record["chunk_id"]] = (row, record)
+
+        ordered = [
+            latest[source_id][chunk_id]
+            for source_id in sorted(latest)
+            for chunk_id in sorted(latest[source_id])
+        ]
+        return (
+            [record for _, record in ordered],
+            np.fromiter(
+                (row for row, _ in ordered), dtype=np.int64, count=len(ordered)
+            ),
+        )
+
+    def iter_latest(
+        self, batch_size: int = 10000
+    ) -> Iterator[tuple[list[dict[str, Any]], np.ndarray]]:
+        """(records, vectors) batches of the latest version of every article"""
+        records, rows = self.latest()
+        vectors = self.vectors()
+        for i in range(0, len(records), batch_size):
+            yield (
+                records[i : i + batch_size],
+                np.asarray(vectors[rows[i : i + batch_size]]),
+            )
@@ -1,4 +1,8 @@
-from collections.abc import Generator
+import logging
+import re
+import uuid
+from collections.abc import Collection, Generator
+from datetime import UTC, datetime, timedelta
 from types import TracebackType
 from typing import Any
 
@@ -7,6 +11,23 @@ from pymongo.database import Database
 from pymongo.errors import ConnectionFailure, OperationFailure
 from pymongo.results import BulkWriteResult
 
+# work queue status of scraped documents, only pending ones are in the queue index
+PENDING = "pending"
+CLAIMED = "claimed"
+DONE = "done"
+CLAIM_FIELDS = {"claim_id": "", "worker_id": "", "lease_until": ""}
+_REDIRECT = re.compile(r'<redirect title="([^"]*)"')
+CHECKPOINTS_COLLECTION = "work_queue_checkpoints"
+
+logger = logging.getLogger(__name__)
+
+
+def _pending_filter(exclude_ids: Collection[Any]) -> dict[str, Any]:
+    query: dict[str, Any] = {"status": PENDING}
+    if exclude_ids:
+        query["_id"] = {"$nin": list(exclude_ids)}
+    return query
+
 
 class MongoManager:
     client: MongoClient[Any]
@@ -43,13 +64,21 @@ class MongoManager:
             return False
 
     def bulk_upsert(
-        self, collection_name: str, batch: list[dict[str, Any]], id_field: str = "_id"
+        self,
+        collection_name: str,
+        batch: list[dict[str, Any]],
+        id_field: str = "_id",
+        set_on_insert: dict[str, Any] | None = None,
     ) -> BulkWriteResult | None:
         """
         Perform a batch update/insert (upsert) operation.
+        Fields of set_on_insert are written only when a document is inserted.
         """
+        update_extra = {"$setOnInsert": set_on_insert} if set_on_insert else {}
         operations = [
-            UpdateOne({id_field: doc[id_field]}, {"$set": doc}, upsert=True)
+            UpdateOne(
+                {id_field: doc[id_field]}, {"$set": doc, **update_extra}, upsert=True
+            )
             for doc in batch
         ]
 
@@ -58,12 +87,183 @@ class MongoManager:
             return collection.bulk_write(operations, ordered=False)
         return None
 
-    def mark_processed(self, collection_name: str, ids: list[Any]) -> None:
-        """Make mark as processed in a collection"""
-        if not ids:
+    def ensure_work_queue(self, collection_name: str) -> None:
+        """
+        Create the partial index over pending documents. Documents stored before the
+        status field existed get one from the old processed flag, once per collection.
+        """
+        col = self.db[collection_name]
+        col.create_index(
+            [("status", 1), ("_id", 1)],
+            name="pending_queue",
+            partialFilterExpression={"status": PENDING},
+        )
+        # leases of parser workers, looked up by claim and by expiry
+        col.create_index(
+            [("claim_id", 1)],
+            name="claims",
+            partialFilterExpression={"status": CLAIMED},
+        )
+        col.create_index(
+            [("status", 1), ("lease_until", 1)],
+            name="leases",
+            partialFilterExpression={"status": CLAIMED},
+        )
+        checkpoints = self.db[CHECKPOINTS_COLLECTION]
+        if checkpoints.find_one({"_id": collection_name, "status_migrated": True}):
             return
+        col.update_many(
+            {"status": {"$exists": False}, "processed": True},
+            {"$set": {"status": DONE}, "$unset": {"processed": ""}},
+        )
+        col.update_many(
+            {"status": {"$exists": False}},
+            {"$set": {"status": PENDING}, "$unset": {"processed": ""}},
+        )
+        checkpoints.update_one(
+            {"_id": collection_name}, {"$set": {"status_migrated": True}}, upsert=True
+        )
+
+    def count_pending(
+        self, collection_name: str, exclude_ids: Collection[Any] = ()
+    ) -> int:
+        """Number of pending documents (but exclude_ids), counted over the partial index"""
+        return self.db[collection_name].count_documents(_pending_filter(exclude_ids))
+
+    def load_checkpoint(self, collection_name: str) -> Any:
+        """_id of the last completed batch of the current pass (None at the start)"""
+        doc = self.db[CHECKPOINTS_COLLECTION].find_one({"_id": collection_name})
+        return doc.get("last_id") if doc else None
+
+    def save_checkpoint(self, collection_name: str, last_id: Any) -> None:
+        self.db[CHECKPOINTS_COLLECTION].update_one(
+            {"_id": collection_name}, {"$set": {"last_id": last_id}}, upsert=True
+        )
+
+    def load_stream_position(self, name: str) -> tuple[str, int] | None:
+        """(file name, bz2 block offset) of the last block completed by a stream"""
+        doc = self.db[CHECKPOINTS_COLLECTION].find_one({"_id": name})
+        if not doc or doc.get("file") is None:
+            return None
+        return doc["file"], doc["offset"]
+
+    def save_stream_position(self, name: str, file: str, offset: int) -> None:
+        self.db[CHECKPOINTS_COLLECTION].update_one(
+            {"_id": name}, {"$set": {"file": file, "offset": offset}}, upsert=True
+        )
+
+    def complete_batch(
+        self, collection_name: str, done_ids: list[Any], last_id: Any
+    ) -> None:
+        """
+        Mark documents of a batch as done in one write and move the checkpoint past
+        the batch. The checkpoint is saved after the mark, so a crash in between
+        only repeats an already completed batch.
+        """
+        if done_ids:
+            self.db[collection_name].update_many(
+                {"_id": {"$in": done_ids}}, {"$set": {"status": DONE}}
+            )
+        self.save_checkpoint(collection_name, last_id)
+
+    def fetch_chunk_counts(
+        self, collection_name: str, ids: list[Any]
+    ) -> dict[Any, int]:
+        """Return stored chunk_count of given documents (documents without it are skipped)"""
+        if not ids:
+            return {}
         col = self.db[collection_name]
-        col.update_many({"_id": {"$in": ids}}, {"$set": {"processed": True}})
+        cursor = col.find(
+            {"_id": {"$in": ids}, "chunk_count": {"$exists": True}}, {"chunk_count": 1}
+        )
+        return {doc["_id"]: doc["chunk_count"] for doc in cursor}
+
+    def claim_batch(
+        self,
+        collection_name: str,
+        worker_id: str,
+        batch_size: int,
+        lease_seconds: float,
+        projection: dict[str, Any] | None = None,
+        exclude_ids: Collection[Any] = (),
+    ) -> tuple[str, list[dict[str, Any]]]:
+        """
+        Atomically claim up to batch_size pending documents for worker_id,
+        skipping exclude_ids (documents the worker already failed).
+
+        Claimed documents get a claim_id and a lease, every document is claimed
+        with its own find_one_and_update on status=pending, so two workers never
+        claim the same one and neither comes back empty while work is pending.
+        Leases of crashed workers are reclaimed once they expire.
+        Returns the claim_id and the claimed documents in _id order.
+        """
+        col = self.db[collection_name]
+        now = datetime.now(UTC)
+        reclaimed = col.update_many(
+            {"status": CLAIMED, "lease_until": {"$lt": now}},
+            {"$set": {"status": PENDING}, "$unset": CLAIM_FIELDS},
+        )
+        if reclaimed.modified_count:
+            logger.warning(
+                f"Reclaimed {reclaimed.modified_count} documents with expired leases"
+            )
+
+        claim_id = uuid.uuid4().hex
+        lease = {
+            "status": CLAIMED,
+            "claim_id": claim_id,
+            "worker_id": worker_id,
+            "lease_until": now + timedelta(seconds=lease_seconds),
+        }
+        # one document at a time: a worker racing for the same document simply
+        # takes the next pending one, so a claim comes back empty only when
+        # nothing is pending
+        for _ in range(batch_size):
+            doc = col.find_one_and_update(
+                _pending_filter(exclude_ids),
+                {"$set": lease},
+                projection={"_id": 1},
+                sort=[("_id", 1)],
+            )
+            if doc is None:
+                break
+        claimed = list(col.find({"claim_id": claim_id}, projection).sort("_id", 1))
+        return claim_id, claimed
+
+    def renew_lease(
+        self, collection_name: str, claim_id: str, lease_seconds: float
+    ) -> int:
+        """Heartbeat: extend the lease of a claim, returns the number of documents still held"""
+        result = self.db[collection_name].update_many(
+            {"claim_id": claim_id, "status": CLAIMED},
+            {
+                "$set": {
+                    "lease_until": datetime.now(UTC) + timedelta(seconds=lease_seconds)
+                }
+            },
+        )
+        return result.matched_count
+
+    def complete_claim(
+        self, collection_name: str, claim_id: str, done_ids: list[Any]
+    ) -> int:
+        """
+        Mark claimed documents as done. Documents whose lease has been reclaimed
+        by another worker are left to it. The rest of the claim (failed documents)
+        is pending again right away, for other workers or the next parse.
+        """
+        col = self.db[collection_name]
+        completed = 0
+        if done_ids:
+            completed = col.update_many(
+                {"_id": {"$in": done_ids}, "claim_id": claim_id, "status": CLAIMED},
+                {"$set": {"status": DONE}, "$unset": CLAIM_FIELDS},
+            ).modified_count
+        col.update_many(
+            {"claim_id": claim_id, "status": CLAIMED},
+            {"$set": {"status": PENDING}, "$unset": CLAIM_FIELDS},
+        )
+        return completed
 
     def fetch_unprocessed_batches(
         self,
@@ -71,13 +271,24 @@ class MongoManager:
         filter_query: dict[str, Any] | None = None,
         projection: dict[str, Any] | None = None,
         batch_size: int = 1000,
+        resume: bool = True,
     ) -> Generator[list[dict[str, Any]]]:
+        """
+        Yield pending documents in _id order using the partial queue index.
 
+        With resume the pass starts after the checkpoint saved by complete_batch,
+        so a restarted parser does not walk over batches it already completed.
+        The caller clears the checkpoint once the last batch of the pass is saved,
+        so documents left pending behind it (failed imports, newly scraped pages)
+        are picked up by the next one.
+        """
         col = self.db[collection_name]
-        last_id = None
+        last_id = self.load_checkpoint(collection_name) if resume else None
+        if last_id is not None:
+            logger.info(f"Resuming {collection_name} work queue after _id {last_id}")
 
         base = filter_query.copy() if filter_query else {}
-        base["processed"] = {"$ne": True}  # brak pola traktuje jako nieprzetworzone
+        base["status"] = PENDING
 
         while True:
             q = dict(base)
@@ -91,6 +302,24 @@ class MongoManager:
             last_id = batch[-1]["_id"]
             yield batch
 
+    def iter_page_titles(
+        self, collection_name: str, batch_size: int = 5000
+    ) -> Generator[tuple[str, str, str | None]]:
+        """
+        Yield (page id, title, redirect target) of all scraped pages. The redirect
+        target of pages stored as whole XML is read from their content.
+        """
+        col = self.db[collection_name]
+        cursor = col.find(
+            {}, {"title": 1, "redirect": 1, "content": 1}, batch_size=batch_size
+        )
+        for doc in cursor:
+            redirect = doc.get("redirect")
+            if redirect is None and "content" in doc:
+                match = _REDIRECT.search(doc["content"].partition("<revision>")[0])
+                redirect = match.group(1) if match else None
+            yield doc["_id"], doc["title"], redirect
+
     def clear_collection(self, collection_name: str) -> int:
         """
         Delete all documents in the collection
@@ -2,7 +2,10 @@
 // create database
 db = db.getSiblingDB('scraper_db');
 
-db.createCollection('wikipedia');
+// raw pages are large and highly compressible, zstd instead of default snappy
+db.createCollection('wikipedia', {
+    storageEngine: { wiredTiger: { configString: 'block_compressor=zstd' } }
+});
 db.createCollection('wiki_plain_articles');
 
 
@@ -0,0 +1,83 @@
+from abc import ABCMeta, abstractmethod
+from typing import Any
+
+
+def _min_max_normalized(scores: dict[Any, float]) -> dict[Any, float]:
+    if not scores:
+        return {}
+    low, high = min(scores.values()), max(scores.values())
+    if high == low:
+        return dict.fromkeys(scores, 1.0)
+    return {key: (score - low) / (high - low) for key, score in scores.items()}
+
+
+def fuse_relative_scores(
+    vector_scores: dict[Any, float], keyword_scores: dict[Any, float], alpha: float
+) -> list[tuple[Any, float]]:
+    """
+    Weaviate's relative score fusion: both result lists are min-max normalized
+    and weighted by alpha (1 is pure vector search). Best results first.
+    """
+    vector_scores = _min_max_normalized(vector_scores)
+    keyword_scores = _min_max_normalized(keyword_scores)
+    fused = {
+        key: alpha * vector_scores.get(key, 0.0)
+        + (1 - alpha) * keyword_scores.get(key, 0.0)
+        for key in vector_scores.keys() | keyword_scores.keys()
+    }
+    return sorted(fused.items(), key=lambda item: (-item[1], item[0]))
+
+
+class RetrievalBackend(metaclass=ABCMeta):
+    """
+    Abstract interface for chunk retrieval used by the agent graph.
+
+    Chunks are returned as dicts with source_id, source_title, chunk_id,
+    chunk_text and score keys.
+    """
+
+    @abstractmethod
+    def is_healthy(self) -> bool:
+        """Check if the backend is ready to serve queries"""
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release connections and files held by the backend"""
+        pass
+
+    def ensure_schema(self, auto_migrate: bool = True) -> None:
+        """Prepare collections before serving, nothing to do by default"""
+        return None
+
+    @abstractmethod
+    def single_wikichunk_hybrid_fetch(
+        self, query_text: str, weaviate_limit: int, alpha: float
+    ) -> list[dict]:
+        """
+        Hybrid search: alpha=1 is pure vector search, alpha=0 is pure BM25.
+        """
+        pass
+
+    @abstractmethod
+    def fetch_wikichunks_by_keys(
+        self, keys: list[tuple[str, int]]
+    ) -> list[dict[str, Any]]:
+        """
+        Fetch chunks by (source_id, chunk_id) keys and initialize them with default
+        ranking score. Keys that do not exist are skipped. Results are returned in
+        (source_id, chunk_id) order.
+        """
+        pass
+
+    def batch_wikichunk_fetch(
+        self, grouped_source_chunk_id: dict[str, list[int]]
+    ) -> list[dict[str, Any]]:
+        """Fetches multiple data chunks by ID and initialize them with default ranking score"""
+
+        keys = [
+            (s_id, c_id)
+            for s_id, c_ids in grouped_source_chunk_id.items()
+            for c_id in c_ids
+        ]
+        return self.fetch_wikichunks_by_keys(keys)
@@ -1,9 +1,15 @@
+import logging
+import time
+from collections import Counter
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+from itertools import islice
 from types import TracebackType
-from typing import Any, cast
+from typing import Any, Literal, NamedTuple, cast
 
 import requests
 import weaviate
-import weaviate.classes.config as wc
 import weaviate.classes.query as wq
 from llama_index.core import VectorStoreIndex
 from llama_index.core.embeddings import BaseEmbedding
@@ -11,8 +17,26 @@ from llama_index.core.vector_stores.types import VectorStoreQueryMode
 from llama_index.vector_stores.weaviate import WeaviateVectorStore
 from weaviate.classes.init import Auth
 from weaviate.collections import Collection
+from weaviate.outputs.config import CollectionConfig
 from weaviate.util import generate_uuid5
 
+from backend.db.local.embedding_cache import EmbeddingCache
+from backend.db.local.vector_store import ChunkVectorStore, text_hash
+from backend.db.retrieval import RetrievalBackend
+from backend.db.weaviate.schema import (
+    WIKI_ARTICLE_SCHEMA,
+    WIKI_CHUNK_SCHEMA,
+    CollectionSpec,
+    VectorIndexSpec,
+    quantizer_name,
+    schema_version,
+)
+from config import WeaviateSettings
+
+logger = logging.getLogger(__name__)
+
+ImportMode = Literal["dynamic", "fixed_size", "rate_limit"]
+
 
 class NativeEmbedding(BaseEmbedding):
     url: str = "http://localhost:8008/embed"
@@ -42,6 +66,12 @@ class NativeEmbedding(BaseEmbedding):
     def _get_text_embedding(self, text: str) -> list[float]:
         return self._get_text_embeddings([text])[0]
 
+    def fetch_model_name(self) -> str:
+        """Name of the model loaded by the embedding service, from its healthcheck"""
+        r = requests.get(f"{self.url.rsplit('/', 1)[0]}/health", timeout=10)
+        r.raise_for_status()
+        return r.json()["model"]
+
     def _get_query_embedding(self, query: str) -> list[float]:
         """
         Dummy method
@@ -55,7 +85,43 @@ class NativeEmbedding(BaseEmbedding):
         return self._get_query_embedding(query)
 
 
-class WeaviateManager:
+class BatchItem(NamedTuple):
+    uuid: str
+    properties: dict[str, Any]
+    vector: list[float] | None = None
+
+
+@dataclass(frozen=True)
+class BatchImportSpec:
+    """
+    How objects are sent to Weaviate: dynamic batching, fixed size batches sent
+    with concurrent requests, or rate limited batches. Failed objects are retried
+    max_retries times with exponential backoff. Chunks are embedded in sub-batches
+    of embed_batch_size and streamed into the import as their vectors arrive.
+    """
+
+    mode: ImportMode = "fixed_size"
+    batch_size: int = 200
+    concurrent_requests: int = 4
+    requests_per_minute: int = 600
+    max_retries: int = 3
+    backoff_seconds: float = 2.0
+    embed_batch_size: int = 256
+
+    @classmethod
+    def from_settings(cls, settings: WeaviateSettings) -> "BatchImportSpec":
+        return cls(
+            mode=settings.WEAVIATE_IMPORT_MODE,
+            batch_size=settings.WEAVIATE_BATCH_SIZE,
+            concurrent_requests=settings.WEAVIATE_CONCURRENT_REQUESTS,
+            requests_per_minute=settings.WEAVIATE_REQUESTS_PER_MINUTE,
+            max_retries=settings.WEAVIATE_IMPORT_RETRIES,
+            backoff_seconds=settings.WEAVIATE_RETRY_BACKOFF_SECONDS,
+            embed_batch_size=settings.WEAVIATE_EMBED_BATCH_SIZE,
+        )
+
+
+class WeaviateManager(RetrievalBackend):
     def __init__(
         self,
         api_key: str,
@@ -63,6 +129,10 @@ class WeaviateManager:
         host="127.0.0.1",
         port: int = 8080,
         grpc_port: int = 50051,
+        vector_index: VectorIndexSpec | None = None,
+        batch_import: BatchImportSpec | None = None,
+        vector_store: ChunkVectorStore | None = None,
+        embedding_cache: EmbeddingCache | None = None,
     ):
         self.client = weaviate.connect_to_custom(
             http_host=host,
@@ -74,6 +144,23 @@ class WeaviateManager:
             auth_credentials=Auth.api_key(api_key),
         )
         self.embedder = NativeEmbedding(native_embedding_url)
+        self.wiki_chunk_schema = (
+            replace(WIKI_CHUNK_SCHEMA, vector_index=vector_index)
+            if vector_index is not None
+            else WIKI_CHUNK_SCHEMA
+        )
+        self.batch_import = batch_import or BatchImportSpec()
+        # computed chunk vectors are kept here too, for re-imports without embedding
+        self.vector_store = vector_store
+        self.embedding_cache = embedding_cache
+        self._embedding_model: str | None = None
+        # embedding cache lookups of the current bulk_upsert
+        self.embedding_cache_stats: Counter[str] = Counter()
+        # collection handles, cached after the schema has been ensured once
+        self._collections: dict[str, Collection] = {}
+        self._vector_store_index: VectorStoreIndex | None = None
+        # schema (control-plane) requests made by this manager, by operation
+        self.control_plane_calls: Counter[str] = Counter()
 
     def __enter__(self):
         """
@@ -111,121 +198,275 @@ class WeaviateManager:
         """
         return self.client.get_meta()
 
+    def ensure_collection(self, spec: CollectionSpec) -> Collection:
+        """
+        Get the collection described by spec, creating it if it doesn't exist.
+        """
+        if not self._collection_exists(spec.name):
+            self.control_plane_calls["create"] += 1
+            self.client.collections.create(
+                name=spec.name,
+                description=spec.description,
+                vectorizer_config=None,
+                vector_index_config=(
+                    spec.vector_index.to_config() if spec.vector_index else None
+                ),
+                properties=spec.to_properties(),
+            )
+
+        return self._get_handle(spec)
+
+    def _collection_exists(self, name: str) -> bool:
+        self.control_plane_calls["exists"] += 1
+        return self.client.collections.exists(name)
+
+    def _get_handle(self, spec: CollectionSpec) -> Collection:
+        self.control_plane_calls["get"] += 1
+        if spec.data_model is not None:
+            return self.client.collections.get(
+                spec.name, data_model_properties=spec.data_model
+            )
+        return self.client.collections.get(spec.name)
+
+    def _get_config(self, name: str) -> CollectionConfig:
+        self.control_plane_calls["config_get"] += 1
+        return self.client.collections.get(name).config.get()
+
+    def _delete_collection(self, name: str) -> None:
+        self.control_plane_calls["delete"] += 1
+        self._collections.pop(name, None)
+        if name == WIKI_CHUNK_SCHEMA.name:
+            self._vector_store_index = None
+        self.client.collections.delete(name)
+
+    def collection(self, spec: CollectionSpec) -> Collection:
+        """
+        Cached collection handle, the collection is ensured only on first use
+        """
+        handle = self._collections.get(spec.name)
+        if handle is None:
+            handle = self.ensure_collection(spec)
+            self._collections[spec.name] = handle
+        return handle
+
+    def ensure_schema(self, auto_migrate: bool = True) -> None:
+        """
+        Ensure WikiArticle and WikiChunk once at startup and cache their handles.
+
+        Collections whose stored schema version differs from the declared one are
+        migrated when auto_migrate is set, otherwise only a warning is logged.
+        """
+        for spec in (WIKI_ARTICLE_SCHEMA, self.wiki_chunk_schema):
+            if self._collection_exists(spec.name):
+                version = schema_version(self._get_config(spec.name))
+                if version != spec.version and auto_migrate:
+                    logger.info(
+                        f"{spec.name} schema version {version} -> {spec.version}"
+                    )
+                    if spec.name == WIKI_CHUNK_SCHEMA.name:
+                        self.backfill_wiki_articles()
+                    self.migrate_collection(spec)
+                    self.update_vector_index(spec)
+                    self._set_schema_version(spec)
+                elif version != spec.version:
+                    logger.warning(
+                        f"{spec.name} schema version is {version}, expected "
+                        f"{spec.version}. Run: python -m parser.wiki migrate-schema"
+                    )
+            self._collections[spec.name] = self.ensure_collection(spec)
+
+        logger.info(
+            f"Weaviate schema ensured. Control-plane calls: {self.control_plane_stats()}"
+        )
+
+    def _set_schema_version(self, spec: CollectionSpec) -> None:
+        self.control_plane_calls["config_update"] += 1
+        self.client.collections.get(spec.name).config.update(
+            description=spec.description
+        )
+
+    def control_plane_stats(self) -> dict[str, int]:
+        """
+        Number of schema requests (exists, get, create, config...) made so far.
+        After ensure_schema it should stay constant during imports and queries.
+        """
+        return {"total": self.control_plane_calls.total(), **self.control_plane_calls}
+
     def create_wiki_chunk_collection(self) -> Collection:
         """
         Get the WikiChunk collection, creating it if it doesn't exist.
+        Article-level metadata is kept separately in the WikiArticle collection.
         """
-        collection_name = "WikiChunk"
+        return self.ensure_collection(self.wiki_chunk_schema)
 
-        if not self.client.collections.exists(collection_name):
-            self.client.collections.create(
-                name=collection_name,
-                vectorizer_config=None,
-                properties=[
-                    wc.Property(
-                        name="source_id",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                        tokenization=wc.Tokenization.FIELD,
-                    ),
-                    wc.Property(
-                        name="source_title",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=False,
-                    ),
-                    wc.Property(
-                        name="wiki_categories",
-                        data_type=wc.DataType.TEXT_ARRAY,
-                        skip_vectorization=False,
-                    ),
-                    wc.Property(
-                        name="chunk_text",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=False,
-                    ),
-                    wc.Property(
-                        name="imie_i_nazwisko",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="imie", data_type=wc.DataType.TEXT, skip_vectorization=True
-                    ),
-                    wc.Property(
-                        name="data_urodzenia",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="miejsce_urodzenia",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="data_smierci",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="miejsce_smierci",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="obywatelstwo",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="nazwa",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="nazwa_zwyczajowa",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="panstwo",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="kraj", data_type=wc.DataType.TEXT, skip_vectorization=True
-                    ),
-                    wc.Property(
-                        name="miejscowosc",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="tytul",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="liczba_ludnosci",
-                        data_type=wc.DataType.TEXT,
-                        skip_vectorization=True,
-                    ),
-                    wc.Property(
-                        name="rok", data_type=wc.DataType.TEXT, skip_vectorization=True
-                    ),
-                    wc.Property(name="chunk_id", data_type=wc.DataType.INT),
-                ],
+    def create_wiki_article_collection(self) -> Collection:
+        """
+        Get the WikiArticle collection, creating it if it doesn't exist.
+        It holds per-article metadata (title, categories, infobox fields) once.
+        """
+        return self.ensure_collection(WIKI_ARTICLE_SCHEMA)
+
+    def migrate_collection(self, spec: CollectionSpec, batch_size: int = 500) -> bool:
+        """
+        Rebuild an existing collection so that it matches spec.
+
+        Weaviate cannot change inverted index settings of existing properties, so
+        objects are copied together with their vectors into a temporary collection,
+        the original one is recreated from spec and the objects are copied back.
+        Nothing is re-embedded. An interrupted migration is resumed on the next call.
+        Returns True if the collection has been migrated.
+        """
+        tmp_spec = replace(spec, name=f"{spec.name}Migration")
+
+        if self._collection_exists(spec.name):
+            differences = spec.diff(self._get_config(spec.name))
+            if differences:
+                logger.info(f"Migrating {spec.name} schema: {differences}")
+                self.ensure_collection(tmp_spec)
+                copied = self._copy_objects(spec.name, tmp_spec, batch_size)
+                logger.info(f"Copied {copied} objects to {tmp_spec.name}")
+                self._delete_collection(spec.name)
+            elif not self._collection_exists(tmp_spec.name):
+                return False
+
+        if not self._collection_exists(tmp_spec.name):
+            self.ensure_collection(spec)
+            return False
+
+        self.ensure_collection(spec)
+        copied = self._copy_objects(tmp_spec.name, spec, batch_size)
+        logger.info(f"Copied {copied} objects back to {spec.name}")
+        self._delete_collection(tmp_spec.name)
+        return True
+
+    def update_vector_index(self, spec: CollectionSpec) -> None:
+        """
+        Apply mutable vector index parameters (ef, quantizer rescoring) in place.
+        A quantizer is enabled in place on an uncompressed index.
+        """
+        if spec.vector_index is None or not self._collection_exists(spec.name):
+            return
+
+        config = self._get_config(spec.name).vector_index_config
+        enable_quantizer = (
+            spec.vector_index.quantizer != "none"
+            and quantizer_name(getattr(config, "quantizer", None)) == "none"
+        )
+        self.control_plane_calls["config_update"] += 1
+        self.client.collections.get(spec.name).config.update(
+            vector_index_config=spec.vector_index.to_update(enable_quantizer)
+        )
+        logger.info(f"Vector index of {spec.name} updated: {spec.vector_index}")
+
+    def _copy_objects(
+        self, source_name: str, target_spec: CollectionSpec, batch_size: int
+    ) -> int:
+        """
+        Copy objects with their vectors, keeping only properties defined in target_spec.
+        Chunks copied into a schema with source_title get it from WikiArticle.
+        """
+        self.control_plane_calls["get"] += 1
+        source = self.client.collections.get(source_name)
+        target = self._get_handle(replace(target_spec, data_model=None))
+        names = {prop.name for prop in target_spec.properties}
+
+        copied = 0
+        objects = source.iterator(include_vector=True)
+        with target.batch.fixed_size(batch_size=batch_size) as batch:
+            while page := list(islice(objects, batch_size)):
+                titles: dict[str, str] = {}
+                if "source_title" in names:
+                    untitled = [
+                        cast(str, obj.properties["source_id"])
+                        for obj in page
+                        if "source_id" in obj.properties
+                        and not obj.properties.get("source_title")
+                    ]
+                    titles = {
+                        source_id: article.get("source_title", "")
+                        for source_id, article in self.fetch_wiki_articles(
+                            untitled, return_properties=["source_id", "source_title"]
+                        ).items()
+                    }
+                for obj in page:
+                    properties = {k: v for k, v in obj.properties.items() if k in names}
+                    if obj.properties.get("source_id") in titles:
+                        properties["source_title"] = titles[
+                            cast(str, obj.properties["source_id"])
+                        ]
+                    batch.add_object(
+                        properties=properties,
+                        uuid=obj.uuid,
+                        vector=cast(list[float] | None, obj.vector.get("default")),
+                    )
+                    copied += 1
+
+        if target.batch.failed_objects:
+            raise RuntimeError(
+                f"Could not copy {len(target.batch.failed_objects)} objects to "
+                f"{target_spec.name}. First error: {target.batch.failed_objects[0]}"
+            )
+        return copied
+
+    def backfill_wiki_articles(self, page_size: int = 1000) -> int:
+        """
+        Fill WikiArticle with metadata stored on chunks by the old WikiChunk schema
+        (first chunk of every article). Returns the number of articles written.
+        """
+        if not self._collection_exists("WikiChunk"):
+            return 0
+        config = self._get_config("WikiChunk")
+        # chunks of the current schema carry the title, but not the categories
+        if "wiki_categories" not in {prop.name for prop in config.properties}:
+            return 0
+
+        names = {prop.name for prop in WIKI_ARTICLE_SCHEMA.properties}
+        # untyped handle, legacy chunks carry article properties
+        self.control_plane_calls["get"] += 1
+        collection = self.client.collections.get("WikiChunk")
+        articles = []
+        written = 0
+        for obj in collection.iterator():
+            if obj.properties.get("chunk_id") != 0:
+                continue
+            articles.append(
+                {
+                    k: v
+                    for k, v in obj.properties.items()
+                    if k in names and v is not None
+                }
             )
+            if len(articles) >= page_size:
+                self.upsert_wiki_articles(articles)
+                written += len(articles)
+                articles = []
 
-        collection = self.client.collections.get(collection_name)
-        return collection
+        self.upsert_wiki_articles(articles)
+        written += len(articles)
+        logger.info(f"Backfilled {written} articles into WikiArticle")
+        return written
 
-    def build_embedding_input_wiki_chunk(self, item: dict) -> str:
+    def migrate_schema(self) -> None:
+        """
+        Bring WikiArticle and WikiChunk in line with their declarative schemas
+        """
+        self.backfill_wiki_articles()
+        for spec in (WIKI_ARTICLE_SCHEMA, self.wiki_chunk_schema):
+            self.migrate_collection(spec)
+            self.update_vector_index(spec)
+            self._set_schema_version(spec)
+
+    def build_embedding_input_wiki_chunk(
+        self, item: dict, article: dict | None = None
+    ) -> str:
         """
         Construct the text representation to be embedded.
+        Title and categories are taken from article metadata when it is given.
         """
-        title = (item.get("source_title") or "").strip()
+        meta = article if article is not None else item
+        title = (meta.get("source_title") or "").strip()
         chunk = (item.get("chunk_text") or "").strip()
-        cats = item.get("wiki_categories") or []
+        cats = meta.get("wiki_categories") or []
         if isinstance(cats, (list, tuple)):
             cats_str = ", ".join([str(c).strip() for c in cats if c])
         else:
@@ -241,43 +482,311 @@ class WeaviateManager:
 
         return "\n".join(parts)
 
-    def bulk_upsert(self, data_items: list[dict[str, Any]]) -> None:
+    def wiki_chunk_uuid(self, source_id: str, chunk_id: int) -> str:
+        """
+        Create deterministic uuid based on source_id and chunk_id
+        """
+        return generate_uuid5(f"{source_id}_{chunk_id}")
+
+    def _batch_context(self, collection: Collection) -> Any:
+        """Batch context manager for the configured import mode"""
+        spec = self.batch_import
+        if spec.mode == "fixed_size":
+            return collection.batch.fixed_size(
+                batch_size=spec.batch_size,
+                concurrent_requests=spec.concurrent_requests,
+            )
+        if spec.mode == "rate_limit":
+            return collection.batch.rate_limit(
+                requests_per_minute=spec.requests_per_minute
+            )
+        return collection.batch.dynamic()
+
+    def import_objects(
+        self, collection: Collection, objects: Iterable[BatchItem]
+    ) -> list[tuple[BatchItem, str]]:
+        """
+        Import objects in batches, retrying failed ones with exponential backoff.
+        Objects may be a lazy iterable, they are consumed once and only the failed
+        ones are kept for retries. Returns objects that still failed after the last
+        retry with their error.
+        """
+        # the lazy input on the first attempt, failed objects on retries
+        to_import: Iterable[BatchItem] = objects
+        pending: list[BatchItem] = []
+        errors: dict[str, str] = {}
+        total = 0
+        start = time.perf_counter()
+
+        for attempt in range(self.batch_import.max_retries + 1):
+            if attempt > 0:
+                delay = self.batch_import.backoff_seconds * 2 ** (attempt - 1)
+                logger.warning(
+                    f"Retrying {len(errors)} failed objects in {delay:.1f}s "
+                    f"(attempt {attempt}/{self.batch_import.max_retries})"
+                )
+                time.sleep(delay)
+
+            with self._batch_context(collection) as batch:
+                for item in to_import:
+                    batch.add_object(
+                        properties=item.properties, uuid=item.uuid, vector=item.vector
+                    )
+                    if attempt == 0:
+                        total += 1
+
+            failed = collection.batch.failed_objects
+            errors = {str(err.object_.uuid): err.message for err in failed}
+            # failed objects carry their properties and vector, nothing is re-embedded
+            pending = [
+                BatchItem(
+                    uuid=str(err.object_.uuid),
+                    properties=dict(err.object_.properties or {}),
+                    vector=cast(list[float] | None, err.object_.vector),
+                )
+                for err in failed
+            ]
+            if not pending:
+                break
+            to_import = pending
+
+        elapsed = time.perf_counter() - start
+        imported = total - len(pending)
+        logger.info(
+            f"Imported {imported}/{total} objects into {collection.name} in "
+            f"{elapsed:.2f}s ({imported / elapsed if elapsed else 0:.1f} objects/s)"
+        )
+        if pending:
+            logger.error(
+                f"{len(pending)} objects could not be imported into {collection.name}. "
+                f"First error: {errors[pending[0].uuid]}"
+            )
+        return [(item, errors[item.uuid]) for item in pending]
+
+    def upsert_wiki_articles(self, articles: list[dict[str, Any]]) -> list[str]:
+        """
+        Insert article-level metadata into WikiArticle (one object per article).
+        Returns source_ids of articles that could not be imported.
+        """
+        if not articles:
+            return []
+
+        objects = [
+            BatchItem(
+                uuid=self.wiki_article_uuid(article["source_id"]), properties=article
+            )
+            for article in articles
+        ]
+        failed = self.import_objects(self.collection(WIKI_ARTICLE_SCHEMA), objects)
+        return [item.properties["source_id"] for item, _ in failed]
+
+    def wiki_article_uuid(self, source_id: str) -> str:
+        """
+        Create deterministic uuid based on source_id
+        """
+        return generate_uuid5(source_id)
+
+    def bulk_upsert(
+        self,
+        data_items: list[dict[str, Any]],
+        articles: dict[str, dict[str, Any]] | None = None,
+        vectors: dict[tuple[str, int], list[float]] | None = None,
+    ) -> list[dict[str, Any]]:
         """
         Embed and insert a batch of items into Weaviate.
+        Article metadata (by source_id) is joined only to build the embedding input.
+        Items with a vector in vectors (by source_id and chunk_id) are not embedded.
+        Returns items that could not be imported (with an "error" key), so that the
+        caller can keep their articles unprocessed and store them as dead letters.
         """
         if not data_items:
-            print("No items to process.")
-            return
+            logger.info("No items to process.")
+            return []
+
+        self.embedding_cache_stats.clear()
+        if vectors:
+            logger.info(f"{len(vectors)} chunks imported with precomputed vectors")
+        objects = self._embed_wiki_chunks(data_items, articles or {}, vectors or {})
+        failed = self.import_objects(self.collection(self.wiki_chunk_schema), objects)
+        if self.embedding_cache is not None:
+            stats = self.embedding_cache_stats
+            logger.info(
+                f"Embedding cache: {stats['hits']}/{stats['lookups']} hits "
+                f"({stats['hits'] / max(stats['lookups'], 1):.1%}), "
+                f"{stats['embedded']} texts embedded"
+            )
+        return [{**item.properties, "error": error} for item, error in failed]
 
-        texts = [self.build_embedding_input_wiki_chunk(item) for item in data_items]
+    def import_linked_chunks(
+        self, data_items: list[dict[str, Any]]
+    ) -> list[dict[str, Any]]:
+        """
+        Insert near-duplicate chunks without a vector, they are found by keyword
+        search and by key only and point to their canonical chunk in duplicate_of.
+        Returns items that could not be imported (with an "error" key).
+        """
+        if not data_items:
+            return []
 
-        vectors = self.embedder._get_text_embeddings(texts)
+        objects = (
+            BatchItem(
+                uuid=self.wiki_chunk_uuid(item["source_id"], item["chunk_id"]),
+                properties=item,
+                vector=None,
+            )
+            for item in data_items
+        )
+        failed = self.import_objects(self.collection(self.wiki_chunk_schema), objects)
+        return [{**item.properties, "error": error} for item, error in failed]
 
-        collection = self.create_wiki_chunk_collection()
+    def _embed_wiki_chunks(
+        self,
+        data_items: list[dict[str, Any]],
+        articles: dict[str, dict[str, Any]],
+        precomputed: dict[tuple[str, int], list[float]],
+    ) -> Iterator[BatchItem]:
+        """
+        Yield chunks with their vectors, embedding them in sub-batches. The next
+        sub-batch is embedded in a background thread while the current one is
+        being added to the Weaviate batch, so embedding overlaps with the import
+        and only two sub-batches of vectors are held at a time. Chunks with a
+        precomputed vector are not sent to the embedding service.
+        """
+        size = self.batch_import.embed_batch_size
+        # sub-batches of one call hold the same parse of their articles
+        version = self.vector_store.new_version() if self.vector_store else None
+        sub_batches = [
+            data_items[i : i + size] for i in range(0, len(data_items), size)
+        ]
+
+        def embed(items: list[dict[str, Any]]) -> list[list[float]]:
+            texts = [
+                self.build_embedding_input_wiki_chunk(
+                    item, articles.get(item["source_id"])
+                )
+                for item in items
+            ]
+            keys = [(item["source_id"], item["chunk_id"]) for item in items]
+            embedded = iter(
+                self._get_cached_embeddings(
+                    [
+                        text
+                        for key, text in zip(keys, texts, strict=True)
+                        if key not in precomputed
+                    ]
+                )
+            )
+            vectors = [
+                precomputed[key] if key in precomputed else next(embedded)
+                for key in keys
+            ]
+            if self.vector_store is not None:
+                self.vector_store.append(
+                    items,
+                    texts,
+                    vectors,
+                    titles={
+                        item["source_id"]: articles.get(item["source_id"], {}).get(
+                            "source_title", ""
+                        )
+                        for item in items
+                    },
+                    version=version,
+                )
+            return vectors
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            next_vectors = executor.submit(embed, sub_batches[0])
+            for i, items in enumerate(sub_batches):
+                vectors = next_vectors.result()
+                if i + 1 < len(sub_batches):
+                    next_vectors = executor.submit(embed, sub_batches[i + 1])
+                for item, vector in zip(items, vectors, strict=True):
+                    yield BatchItem(
+                        uuid=self.wiki_chunk_uuid(item["source_id"], item["chunk_id"]),
+                        properties=item,
+                        vector=vector,
+                    )
+
+    def embed_texts(self, texts: list[str]) -> list[list[float]]:
+        """Embed texts with the embedding service, bypassing the embedding cache"""
+        return self.embedder._get_text_embeddings(texts)
+
+    def _get_cached_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed texts, reusing vectors of identical embedding inputs from the
+        embedding cache. Only cache misses (each distinct text once) are sent to
+        the embedding service.
+        """
+        if not texts:
+            return []
+        if self.embedding_cache is None:
+            return self.embedder._get_text_embeddings(texts)
+
+        if self._embedding_model is None:
+            self._embedding_model = self.embedder.fetch_model_name()
+        hashes = [text_hash(text) for text in texts]
+        vectors = self.embedding_cache.get_many(self._embedding_model, hashes)
+        missing = {
+            hash_: text
+            for hash_, text in zip(hashes, texts, strict=True)
+            if hash_ not in vectors
+        }
+        if missing:
+            embedded = dict(
+                zip(
+                    missing,
+                    self.embedder._get_text_embeddings(list(missing.values())),
+                    strict=True,
+                )
+            )
+            self.embedding_cache.put_many(self._embedding_model, embedded)
+            vectors.update(embedded)
 
-        with collection.batch.dynamic() as batch:
-            for item, vector in zip(data_items, vectors, strict=True):
-                unique_id_str = f"{item['source_id']}_{item['chunk_id']}"
-                # Create deterministic uuid based on source_id and chunk_id
-                object_uuid = generate_uuid5(unique_id_str)
+        self.embedding_cache_stats["lookups"] += len(texts)
+        self.embedding_cache_stats["hits"] += sum(
+            hash_ not in missing for hash_ in hashes
+        )
+        self.embedding_cache_stats["embedded"] += len(missing)
+        return [vectors[hash_] for hash_ in hashes]
 
-                batch.add_object(
-                    properties=item,
-                    uuid=object_uuid,
-                    vector=vector,
-                )
+    def delete_wiki_chunks(
+        self, object_uuids: list[str], batch_size: int = 1000
+    ) -> int:
+        """
+        Delete WikiChunk objects by uuid using batched delete_many filters.
+        Returns the number of deleted objects.
+        """
+        if not object_uuids:
+            return 0
+
+        collection = self.collection(self.wiki_chunk_schema)
+        deleted = 0
+        for i in range(0, len(object_uuids), batch_size):
+            result = collection.data.delete_many(
+                where=wq.Filter.by_id().contains_any(object_uuids[i : i + batch_size])
+            )
+            deleted += result.successful
 
-        if collection.batch.failed_objects:
-            print(f"Errors: {len(collection.batch.failed_objects)}")
-            print(f"First error: {collection.batch.failed_objects[0]}")
-        else:
-            print(f"Successfully loaded batch of {len(data_items)} items.")
+        return deleted
+
+    def iter_wiki_chunk_keys(self) -> Iterator[tuple[str, str, int]]:
+        """
+        Iterate over the whole WikiChunk collection yielding (uuid, source_id, chunk_id)
+        """
+        collection = self.collection(self.wiki_chunk_schema)
+        for obj in collection.iterator(return_properties=["source_id", "chunk_id"]):
+            yield (
+                str(obj.uuid),
+                cast(str, obj.properties["source_id"]),
+                cast(int, obj.properties["chunk_id"]),
+            )
 
     def clear_collection(self, collection_name: str) -> None:
         """
         Remove collection definition with all the data inside
         """
-        self.client.collections.delete(collection_name)
+        self._delete_collection(collection_name)
 
     def single_wikichunk_hybrid_fetch(
         self, query_text: str, weaviate_limit: int, alpha: float
@@ -286,13 +795,7 @@ class WeaviateManager:
         Single query hybrid search
         """
 
-        vector_store = WeaviateVectorStore(
-            weaviate_client=self.client, index_name="WikiChunk", text_key="chunk_text"
-        )
-
-        index = VectorStoreIndex.from_vector_store(
-            vector_store, embed_model=self.embedder
-        )
+        index = self._get_vector_store_index()
 
         retriever = index.as_retriever(
             vector_store_query_mode=VectorStoreQueryMode.HYBRID,
@@ -311,52 +814,102 @@ class WeaviateManager:
                     "chunk_id": node.metadata.get("chunk_id"),
                     "chunk_text": node.text,
                     "score": node.score,
+                    "duplicate_of": node.metadata.get("duplicate_of"),
                 }
             )
 
-        return query_results
-
-    def wikichunk_combined_filter(
-        self, grouped_source_chunk_id: dict[str, list[int]]
-    ) -> "wq.Filter":
-        """Combine filter of source_ids and chunk_ids for optimized querying"""
-
-        filters = []
-        for s_id, c_ids in grouped_source_chunk_id.items():
-            f = wq.Filter.by_property("source_id").equal(s_id) & wq.Filter.by_property(
-                "chunk_id"
-            ).contains_any(c_ids)
-            filters.append(f)
+        return self.join_article_titles(query_results)
 
-        combined_filter = wq.Filter.any_of(filters) if len(filters) > 1 else filters[0]
+    def _get_vector_store_index(self) -> VectorStoreIndex:
+        """
+        LlamaIndex index over WikiChunk. The vector store checks the schema when it
+        is created, so it is built once and reused by every query.
+        """
+        if self._vector_store_index is None:
+            self.control_plane_calls["vector_store_init"] += 1
+            vector_store = WeaviateVectorStore(
+                weaviate_client=self.client,
+                index_name=WIKI_CHUNK_SCHEMA.name,
+                text_key="chunk_text",
+            )
+            self._vector_store_index = VectorStoreIndex.from_vector_store(
+                vector_store, embed_model=self.embedder
+            )
+        return self._vector_store_index
 
-        return cast("wq.Filter", combined_filter)
+    def fetch_wiki_articles(
+        self, source_ids: list[str], return_properties: list[str] | None = None
+    ) -> dict[str, dict[str, Any]]:
+        """
+        Fetch article metadata from WikiArticle by source_id
+        """
+        if not source_ids:
+            return {}
+
+        collection = self.collection(WIKI_ARTICLE_SCHEMA)
+        unique_ids = list(dict.fromkeys(source_ids))
+        response = collection.query.fetch_objects_by_ids(
+            [self.wiki_article_uuid(s_id) for s_id in unique_ids],
+            limit=len(unique_ids),
+            return_properties=return_properties,
+        )
+        return {
+            cast(str, obj.properties["source_id"]): dict(obj.properties)
+            for obj in response.objects
+        }
 
-    def batch_wikichunk_fetch(
-        self, grouped_source_chunk_id: dict[str, list[int]]
+    def join_article_titles(self, chunks: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Fill source_title of chunks from WikiArticle metadata.
+        """
+        articles = self.fetch_wiki_articles(
+            [chunk["source_id"] for chunk in chunks if chunk.get("source_id")],
+            return_properties=["source_id", "source_title"],
+        )
+        for chunk in chunks:
+            article = articles.get(chunk["source_id"])
+            if article:
+                chunk["source_title"] = article.get("source_title", "")
+            elif chunk.get("source_title") is None:
+                chunk["source_title"] = ""
+        return chunks
+
+    def fetch_wikichunks_by_keys(
+        self, keys: list[tuple[str, int]], page_size: int = 1000
     ) -> list[dict[str, Any]]:
-        """Fetches multiple data chunks by ID and initialize them with default ranking score"""
+        """
+        Fetch chunks by (source_id, chunk_id) keys and initialize them with default
+        ranking score. Uuids are computed the same way as during upsert, so the
+        objects are looked up by id instead of property filters. Keys that do not
+        exist (e.g. chunk after the last one) are skipped. Results are returned in
+        (source_id, chunk_id) order.
+        """
+        unique_keys = list(dict.fromkeys(keys))
+        if not unique_keys:
+            return []
 
-        collection_name = "WikiChunk"
-        collection = self.client.collections.get(collection_name)
-        combined_filter = self.wikichunk_combined_filter(grouped_source_chunk_id)
+        collection = self.collection(self.wiki_chunk_schema)
+        uuids = [self.wiki_chunk_uuid(s_id, c_id) for s_id, c_id in unique_keys]
 
-        response = collection.query.fetch_objects(
-            filters=cast(Any, combined_filter),
-            limit=len(grouped_source_chunk_id) + 1,
-            return_properties=["source_id", "source_title", "chunk_id", "chunk_text"],
-        )
         fetched_chunks = []
-        for obj in response.objects:
-            fetched_chunks.append(
-                {
-                    "source_id": obj.properties["source_id"],
-                    "source_title": obj.properties.get("source_title", ""),
-                    "chunk_id": obj.properties["chunk_id"],
-                    "chunk_text": obj.properties["chunk_text"],
-                    "score": 0.0,
-                    "rank_score": -999.0,
-                }
+        for i in range(0, len(uuids), page_size):
+            page = uuids[i : i + page_size]
+            response = collection.query.fetch_objects_by_ids(
+                page,
+                limit=len(page),
+                return_properties=["source_id", "chunk_id", "chunk_text"],
             )
+            for obj in response.objects:
+                fetched_chunks.append(
+                    {
+                        "source_id": obj.properties["source_id"],
+                        "source_title": "",
+                        "chunk_id": obj.properties["chunk_id"],
+                        "chunk_text": obj.properties["chunk_text"],
+                        "score": 0.0,
+                        "rank_score": -999.0,
+                    }
+                )
 
-        return fetched_chunks
+        fetched_chunks.sort(key=lambda x: (x["source_id"], x["chunk_id"]))
+        return self.join_article_titles(fetched_chunks)
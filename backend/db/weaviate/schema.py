@@ -0,0 +1,318 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Literal, NotRequired, TypedDict
+
+import weaviate.classes.config as wc
+from weaviate.outputs.config import CollectionConfig
+
+if TYPE_CHECKING:
+    from config import WeaviateSettings
+
+QuantizerName = Literal["none", "pq", "bq", "sq"]
+
+
+class WikiChunkProperties(TypedDict):
+    source_id: str
+    chunk_id: int
+    chunk_text: str
+    # copy of the article title, keeps titles in the keyword (BM25) leg
+    source_title: NotRequired[str]
+    # source_id:chunk_id of the canonical chunk of a near-duplicate
+    duplicate_of: NotRequired[str]
+
+
+class WikiArticleProperties(TypedDict, total=False):
+    source_id: str
+    source_title: str
+    wiki_categories: list[str]
+    imie_i_nazwisko: str
+    imie: str
+    data_urodzenia: str
+    miejsce_urodzenia: str
+    data_smierci: str
+    miejsce_smierci: str
+    obywatelstwo: str
+    nazwa: str
+    nazwa_zwyczajowa: str
+    panstwo: str
+    kraj: str
+    miejscowosc: str
+    tytul: str
+    liczba_ludnosci: str
+    rok: str
+
+
+@dataclass(frozen=True)
+class PropertySpec:
+    """
+    Declarative definition of a single collection property.
+
+    Inverted indexes are built only when explicitly requested, because every
+    searchable (BM25) or filterable index costs import time and disk space.
+    """
+
+    name: str
+    data_type: wc.DataType
+    index_searchable: bool = False
+    index_filterable: bool = False
+    tokenization: wc.Tokenization | None = None
+
+    def to_property(self) -> wc.Property:
+        searchable_types = (wc.DataType.TEXT, wc.DataType.TEXT_ARRAY)
+        return wc.Property(
+            name=self.name,
+            data_type=self.data_type,
+            index_filterable=self.index_filterable,
+            # only text properties can have a searchable (BM25) index
+            index_searchable=(
+                self.index_searchable if self.data_type in searchable_types else None
+            ),
+            tokenization=self.tokenization,
+        )
+
+
+@dataclass(frozen=True)
+class VectorIndexSpec:
+    """
+    HNSW parameters and optional vector compression (quantization).
+
+    ef_construction, max_connections and the quantizer type are fixed once the
+    collection is created, ef and rescore_limit can be changed in place.
+    """
+
+    ef: int = -1
+    ef_construction: int = 128
+    max_connections: int = 32
+    quantizer: QuantizerName = "none"
+    rescore_limit: int = 200
+    pq_segments: int = 96
+    training_limit: int = 100000
+
+    @classmethod
+    def from_settings(cls, settings: WeaviateSettings) -> VectorIndexSpec:
+        return cls(
+            ef=settings.WEAVIATE_HNSW_EF,
+            ef_construction=settings.WEAVIATE_HNSW_EF_CONSTRUCTION,
+            max_connections=settings.WEAVIATE_HNSW_MAX_CONNECTIONS,
+            quantizer=settings.WEAVIATE_QUANTIZER,
+            rescore_limit=settings.WEAVIATE_QUANTIZER_RESCORE_LIMIT,
+            pq_segments=settings.WEAVIATE_PQ_SEGMENTS,
+            training_limit=settings.WEAVIATE_QUANTIZER_TRAINING_LIMIT,
+        )
+
+    def _quantizer_config(self) -> Any:
+        if self.quantizer == "pq":
+            return wc.Configure.VectorIndex.Quantizer.pq(
+                segments=self.pq_segments, training_limit=self.training_limit
+            )
+        if self.quantizer == "bq":
+            return wc.Configure.VectorIndex.Quantizer.bq(
+                rescore_limit=self.rescore_limit
+            )
+        if self.quantizer == "sq":
+            return wc.Configure.VectorIndex.Quantizer.sq(
+                rescore_limit=self.rescore_limit, training_limit=self.training_limit
+            )
+        return None
+
+    def to_config(self) -> Any:
+        return wc.Configure.VectorIndex.hnsw(
+            ef=self.ef,
+            ef_construction=self.ef_construction,
+            max_connections=self.max_connections,
+            distance_metric=wc.VectorDistances.COSINE,
+            quantizer=self._quantizer_config(),
+        )
+
+    def to_update(self, enable_quantizer: bool) -> Any:
+        """Reconfigure mutable parameters, optionally enabling the quantizer"""
+        if self.quantizer == "pq" and enable_quantizer:
+            return wc.Reconfigure.VectorIndex.hnsw(
+                ef=self.ef,
+                quantizer=wc.Reconfigure.VectorIndex.Quantizer.pq(
+                    segments=self.pq_segments, training_limit=self.training_limit
+                ),
+            )
+        if self.quantizer == "bq":
+            return wc.Reconfigure.VectorIndex.hnsw(
+                ef=self.ef,
+                quantizer=wc.Reconfigure.VectorIndex.Quantizer.bq(
+                    rescore_limit=self.rescore_limit
+                ),
+            )
+        if self.quantizer == "sq":
+            return wc.Reconfigure.VectorIndex.hnsw(
+                ef=self.ef,
+                quantizer=wc.Reconfigure.VectorIndex.Quantizer.sq(
+                    rescore_limit=self.rescore_limit,
+                    training_limit=self.training_limit if enable_quantizer else None,
+                ),
+            )
+        return wc.Reconfigure.VectorIndex.hnsw(ef=self.ef)
+
+    def diff(self, config: Any) -> list[str]:
+        """
+        Differences in parameters that cannot be changed in place. Enabling a
+        quantizer on an uncompressed index is possible in place, so it is not one.
+        """
+        differences = []
+        if config.ef_construction != self.ef_construction:
+            differences.append(
+                f"ef_construction {config.ef_construction} -> {self.ef_construction}"
+            )
+        if config.max_connections != self.max_connections:
+            differences.append(
+                f"max_connections {config.max_connections} -> {self.max_connections}"
+            )
+        current = quantizer_name(config.quantizer)
+        if current != "none" and current != self.quantizer:
+            differences.append(f"quantizer {current} -> {self.quantizer}")
+        return differences
+
+
+def quantizer_name(quantizer: Any) -> str:
+    """Map quantizer config returned by Weaviate (e.g. _PQConfig) to pq/bq/sq/none"""
+    if quantizer is None:
+        return "none"
+    return type(quantizer).__name__.strip("_").removesuffix("Config").lower()
+
+
+@dataclass(frozen=True)
+class CollectionSpec:
+    """
+    Declarative definition of a Weaviate collection.
+
+    The version is stored in the collection description, bump it whenever the
+    definition changes so that existing collections get migrated at startup.
+    """
+
+    name: str
+    properties: tuple[PropertySpec, ...]
+    version: int = 1
+    vector_index: VectorIndexSpec | None = None
+    data_model: type | None = None
+
+    @property
+    def description(self) -> str:
+        return f"schema_version={self.version}"
+
+    def to_properties(self) -> list[wc.Property]:
+        return [prop.to_property() for prop in self.properties]
+
+    def diff(self, config: CollectionConfig) -> list[str]:
+        """
+        Compare the spec with an existing collection config.
+        Returns human readable differences (empty list if the schema matches).
+        """
+        existing = {prop.name: prop for prop in config.properties}
+        differences = []
+        for spec in self.properties:
+            prop = existing.pop(spec.name, None)
+            if prop is None:
+                differences.append(f"{spec.name}: missing")
+                continue
+            if prop.index_filterable != spec.index_filterable:
+                differences.append(
+                    f"{spec.name}: index_filterable {prop.index_filterable} -> {spec.index_filterable}"
+                )
+            if (
+                spec.data_type in (wc.DataType.TEXT, wc.DataType.TEXT_ARRAY)
+                and prop.index_searchable != spec.index_searchable
+            ):
+                differences.append(
+                    f"{spec.name}: index_searchable {prop.index_searchable} -> {spec.index_searchable}"
+                )
+        for name in existing:
+            differences.append(f"{name}: not in spec")
+        if self.vector_index is not None and config.vector_index_config is not None:
+            differences.extend(
+                f"vector index: {diff}"
+                for diff in self.vector_index.diff(config.vector_index_config)
+            )
+        return differences
+
+
+def schema_version(config: CollectionConfig) -> int:
+    """Schema version stored in the collection description (0 if there is none)"""
+    match = re.search(r"schema_version=(\d+)", config.description or "")
+    return int(match.group(1)) if match else 0
+
+
+def _infobox_property(name: str) -> PropertySpec:
+    # infobox fields are only returned to the caller, never searched or filtered
+    return PropertySpec(name=name, data_type=wc.DataType.TEXT)
+
+
+WIKI_CHUNK_SCHEMA = CollectionSpec(
+    name="WikiChunk",
+    version=3,
+    vector_index=VectorIndexSpec(),
+    data_model=WikiChunkProperties,
+    properties=(
+        PropertySpec(
+            name="source_id",
+            data_type=wc.DataType.TEXT,
+            index_filterable=True,
+            tokenization=wc.Tokenization.FIELD,
+        ),
+        PropertySpec(
+            name="chunk_text",
+            data_type=wc.DataType.TEXT,
+            index_searchable=True,
+        ),
+        PropertySpec(
+            name="chunk_id",
+            data_type=wc.DataType.INT,
+            index_filterable=True,
+        ),
+        PropertySpec(
+            name="duplicate_of",
+            data_type=wc.DataType.TEXT,
+            index_filterable=True,
+            tokenization=wc.Tokenization.FIELD,
+        ),
+        PropertySpec(
+            name="source_title",
+            data_type=wc.DataType.TEXT,
+            index_searchable=True,
+        ),
+    ),
+)
+
+WIKI_ARTICLE_SCHEMA = CollectionSpec(
+    name="WikiArticle",
+    version=1,
+    data_model=WikiArticleProperties,
+    properties=(
+        PropertySpec(
+            name="source_id",
+            data_type=wc.DataType.TEXT,
+            index_filterable=True,
+            tokenization=wc.Tokenization.FIELD,
+        ),
+        PropertySpec(
+            name="source_title",
+            data_type=wc.DataType.TEXT,
+            index_searchable=True,
+            index_filterable=True,
+        ),
+        PropertySpec(name="wiki_categories", data_type=wc.DataType.TEXT_ARRAY),
+        _infobox_property("imie_i_nazwisko"),
+        _infobox_property("imie"),
+        _infobox_property("data_urodzenia"),
+        _infobox_property("miejsce_urodzenia"),
+        _infobox_property("data_smierci"),
+        _infobox_property("miejsce_smierci"),
+        _infobox_property("obywatelstwo"),
+        _infobox_property("nazwa"),
+        _infobox_property("nazwa_zwyczajowa"),
+        _infobox_property("panstwo"),
+        _infobox_property("kraj"),
+        _infobox_property("miejscowosc"),
+        _infobox_property("tytul"),
+        _infobox_property("liczba_ludnosci"),
+        _infobox_property("rok"),
+    ),
+)
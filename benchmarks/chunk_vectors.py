@@ -0,0 +1,151 @@
+"""
+Retrieval quality of chunk vectors pooled from the sentence embeddings of the
+statistical chunker (parse --sentence-chunk-vectors) versus chunks embedded
+again from their embedding input, and the embedding time that pooling saves.
+
+Long sections of sampled articles are chunked once. Every chunk gets both
+vectors, and exact search over the sampled chunks is run with two query sets:
+a sentence taken from a chunk (the chunk is relevant), and article title with
+section heading (every chunk of the section is relevant). Embedding inputs are
+built without categories. Needs MongoDB and the embedding server.
+
+    python -m benchmarks.chunk_vectors --pages 300 --queries 500 --k 10
+"""
+
+import argparse
+import logging
+import random
+import re
+import time
+
+import numpy as np
+
+from backend.db.weaviate.connection import WeaviateManager
+from benchmarks.utils import create_weaviate_manager, format_table, sample_long_sections
+from logger_config import setup_logging
+from nlp.chunking import StatisticalChunkerClient
+
+setup_logging("benchmark")
+logger = logging.getLogger(__name__)
+
+SENTENCE = re.compile(r"(?<=[.!?…])\s+")
+
+
+def normalized(vectors: list[list[float]] | np.ndarray) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    return matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+
+
+def embed_all(
+    weaviate_client: WeaviateManager, texts: list[str], batch_size: int = 1000
+) -> np.ndarray:
+    """Normalized vectors of texts, embedded in requests of batch_size texts"""
+    vectors = []
+    for i in range(0, len(texts), batch_size):
+        vectors.extend(weaviate_client.embed_texts(texts[i : i + batch_size]))
+    return normalized(vectors)
+
+
+def evaluate(
+    queries: np.ndarray, relevant: list[set[int]], chunks: np.ndarray, k: int
+) -> tuple[float, float]:
+    """Recall@k (any relevant chunk in the top k) and MRR@k of exact search"""
+    top = np.argsort(-(queries @ chunks.T), axis=1)[:, :k]
+    hits, reciprocal_ranks = 0, 0.0
+    for ranked, expected in zip(top, relevant, strict=True):
+        for rank, index in enumerate(ranked, 1):
+            if index in expected:
+                hits += 1
+                reciprocal_ranks += 1 / rank
+                break
+    return hits / len(relevant), reciprocal_ranks / len(relevant)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--max-tokens", type=int, default=480)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    sections = sample_long_sections(args.pages)
+    if not sections:
+        logger.error("No long sections in the sample")
+        return
+
+    with create_weaviate_manager() as weaviate_client:
+        chunker = StatisticalChunkerClient(embed=weaviate_client.embed_texts)
+        start = time.perf_counter()
+        chunked, pooled = chunker.chunk_texts_with_vectors(
+            [text for _, _, text in sections], args.max_tokens
+        )
+        chunking_seconds = time.perf_counter() - start
+
+        chunks: list[tuple[int, str, str]] = []
+        for section_id, ((title, heading, _), texts) in enumerate(
+            zip(sections, chunked, strict=True)
+        ):
+            chunks.extend((section_id, title, f"{heading}: {text}") for text in texts)
+        logger.info(f"{len(chunks)} chunks of {len(sections)} long sections")
+
+        start = time.perf_counter()
+        embedded = embed_all(
+            weaviate_client,
+            [
+                weaviate_client.build_embedding_input_wiki_chunk(
+                    {"chunk_text": text}, {"source_title": title}
+                )
+                for _, title, text in chunks
+            ],
+        )
+        embedding_seconds = time.perf_counter() - start
+        pooled_matrix = normalized(np.vstack(pooled))
+
+        by_section: dict[int, set[int]] = {}
+        for index, (section_id, *_) in enumerate(chunks):
+            by_section.setdefault(section_id, set()).add(index)
+        query_sets: dict[str, tuple[list[str], list[set[int]]]] = {
+            "sentence": ([], []),
+            "heading": ([], []),
+        }
+        for index in rng.sample(range(len(chunks)), min(args.queries, len(chunks))):
+            section_id, _, text = chunks[index]
+            sentences = [s for s in SENTENCE.split(text) if len(s.split()) >= 5]
+            if sentences:
+                query_sets["sentence"][0].append(rng.choice(sentences))
+                query_sets["sentence"][1].append({index})
+        for section_id in rng.sample(
+            sorted(by_section), min(args.queries, len(by_section))
+        ):
+            title, heading, _ = sections[section_id]
+            query_sets["heading"][0].append(f"{title} {heading}")
+            query_sets["heading"][1].append(by_section[section_id])
+
+        results = []
+        for query_set, (texts, relevant) in query_sets.items():
+            queries = embed_all(weaviate_client, texts)
+            for label, matrix in (("embedded", embedded), ("pooled", pooled_matrix)):
+                recall, mrr = evaluate(queries, relevant, matrix, args.k)
+                results.append(
+                    {
+                        "queries": query_set,
+                        "vectors": label,
+                        "count": len(texts),
+                        f"recall@{args.k}": round(recall, 4),
+                        f"mrr@{args.k}": round(mrr, 4),
+                    }
+                )
+
+    logger.info(
+        f"Chunking with sentence embeddings: {chunking_seconds:.2f}s, "
+        f"embedding chunks again: {embedding_seconds:.2f}s "
+        f"({len(chunks) / embedding_seconds:.1f} chunks/s)"
+    )
+    logger.info(f"\n{format_table(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Chunking time and chunk sizes of the LangChain recursive splitter versus the
+offset-mapping splitter on long sections of real articles.
+
+Pages are sampled from the scraped wikipedia collection in MongoDB and cleaned
+like the parser does, only sections the parser chunks (1000 characters and more)
+are benchmarked. Chunk sizes are counted with the same tokenizer.
+
+    python -m benchmarks.chunking --pages 500 --max-tokens 480
+"""
+
+import argparse
+import logging
+import statistics
+import time
+
+from benchmarks.utils import format_table, sample_long_sections
+from logger_config import setup_logging
+from nlp.chunking import LangchainSplitterClient, OffsetSplitterClient
+
+setup_logging("benchmark")
+logger = logging.getLogger(__name__)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=500)
+    parser.add_argument("--max-tokens", type=int, default=480)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    sections = [text for _, _, text in sample_long_sections(args.pages)]
+    if not sections:
+        logger.error("No long sections in the sample")
+        return
+    logger.info(f"{len(sections)} long sections sampled from {args.pages} pages")
+
+    splitters = {
+        "langchain": LangchainSplitterClient(),
+        "offsets": OffsetSplitterClient(),
+    }
+    tokenizer = splitters["langchain"]._get_tokenizer()
+    results = []
+    for label, splitter in splitters.items():
+        # the first call loads the tokenizer and builds the splitter
+        splitter.chunk_texts(sections[:1], args.max_tokens)
+        timings = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            chunked = splitter.chunk_texts(sections, args.max_tokens)
+            timings.append(time.perf_counter() - start)
+
+        chunks = [chunk for section in chunked for chunk in section]
+        sizes = [
+            len(tokens)
+            for tokens in tokenizer(chunks, add_special_tokens=False)["input_ids"]
+        ]
+        seconds = statistics.median(timings)
+        results.append(
+            {
+                "splitter": label,
+                "sections": len(sections),
+                "seconds": round(seconds, 3),
+                "sections/s": round(len(sections) / seconds, 1),
+                "chunks": len(chunks),
+                "mean_tokens": round(statistics.mean(sizes), 1),
+                "max_tokens": max(sizes),
+                "over_limit": sum(size > args.max_tokens for size in sizes),
+            }
+        )
+
+    logger.info(f"\n{format_table(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+Latency and ranking agreement of cross-encoder reranker backends (torch, ONNX,
+ONNX with int8 weights) and max_length values against the current setup, torch
+with max_length 512.
+
+Candidates are fetched by hybrid search for queries read from --queries-file
+(one per line) or taken from the first sentences of sampled WikiChunk objects.
+Pairs of --queries-per-batch queries are scored together, like a chat turn
+(4 queries x 8 hits = 32 pairs). Agreement is the mean Spearman correlation of
+the scores per query and the overlap of the top 3 with the reference.
+
+    python -m benchmarks.reranker --queries 200 --threads 4
+"""
+
+import argparse
+import logging
+import re
+import statistics
+import time
+from itertools import islice
+from pathlib import Path
+
+import numpy as np
+
+from backend.db.weaviate.schema import WIKI_CHUNK_SCHEMA
+from benchmarks.utils import create_weaviate_manager, format_table
+from logger_config import setup_logging
+from nlp.ranking import UnicampMiniLMMultiClient
+
+setup_logging("benchmark")
+logger = logging.getLogger(__name__)
+
+FIRST_SENTENCE = re.compile(r"^(.+?[.!?])(\s|$)")
+
+
+def spearman(a: list[float], b: list[float]) -> float:
+    if len(a) < 2:
+        return 1.0
+    ranks_a = np.argsort(np.argsort(a))
+    ranks_b = np.argsort(np.argsort(b))
+    return float(np.corrcoef(ranks_a, ranks_b)[0, 1])
+
+
+def top_overlap(a: list[float], b: list[float], k: int = 3) -> float:
+    top_a = set(np.argsort(a)[::-1][:k].tolist())
+    top_b = set(np.argsort(b)[::-1][:k].tolist())
+    return len(top_a & top_b) / max(min(k, len(a)), 1)
+
+
+def sample_queries(limit: int) -> list[str]:
+    """First sentences of WikiChunk objects, without their section heading"""
+    with create_weaviate_manager() as weaviate_client:
+        collection = weaviate_client.client.collections.get(WIKI_CHUNK_SCHEMA.name)
+        queries = []
+        for obj in islice(collection.iterator(), limit * 5):
+            text = str(obj.properties.get("chunk_text", "")).split(": ", 1)[-1]
+            match = FIRST_SENTENCE.match(text)
+            if match and 4 <= len(match.group(1).split()) <= 25:
+                queries.append(match.group(1))
+            if len(queries) >= limit:
+                break
+    return queries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries-file", type=Path)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--queries-per-batch", type=int, default=4)
+    parser.add_argument("--hits", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--max-lengths", type=int, nargs="+", default=[512, 256])
+    args = parser.parse_args()
+
+    if args.queries_file:
+        queries = [
+            line.strip()
+            for line in args.queries_file.read_text().splitlines()
+            if line.strip()
+        ][: args.queries]
+    else:
+        queries = sample_queries(args.queries)
+    if not queries:
+        logger.error("No queries")
+        return
+
+    with create_weaviate_manager() as weaviate_client:
+        candidates = [
+            [
+                elem["chunk_text"]
+                for elem in weaviate_client.single_wikichunk_hybrid_fetch(
+                    query, args.hits, 0.5
+                )
+            ]
+            for query in queries
+        ]
+    batches = [
+        list(range(i, min(i + args.queries_per_batch, len(queries))))
+        for i in range(0, len(queries), args.queries_per_batch)
+    ]
+    logger.info(
+        f"{len(queries)} queries, {sum(map(len, candidates))} pairs, "
+        f"{len(batches)} batches"
+    )
+
+    variants = [("torch", 512)] + [
+        (backend, max_length)
+        for backend in ("torch", "onnx", "onnx_int8")
+        for max_length in args.max_lengths
+        if (backend, max_length) != ("torch", 512)
+    ]
+    reference: list[list[float]] = []
+    results = []
+    for backend, max_length in variants:
+        client = UnicampMiniLMMultiClient(
+            backend=backend, max_length=max_length, threads=args.threads
+        )
+        # the first call loads (and for ONNX exports) the model
+        client.rank("query", ["text"])
+
+        scores: list[list[float]] = [[] for _ in queries]
+        latencies = []
+        for batch in batches:
+            pairs = [(queries[i], text) for i in batch for text in candidates[i]]
+            start = time.perf_counter()
+            batch_scores = iter(client.rank_pairs(pairs))
+            latencies.append(time.perf_counter() - start)
+            for i in batch:
+                scores[i] = [next(batch_scores) for _ in candidates[i]]
+        if not reference:
+            reference = scores
+
+        scored = [i for i in range(len(queries)) if candidates[i]]
+        results.append(
+            {
+                "backend": backend,
+                "max_length": max_length,
+                "median_ms": round(statistics.median(latencies) * 1000, 1),
+                "p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+                "spearman": round(
+                    statistics.mean(spearman(reference[i], scores[i]) for i in scored),
+                    4,
+                ),
+                "top3_overlap": round(
+                    statistics.mean(
+                        top_overlap(reference[i], scores[i]) for i in scored
+                    ),
+                    4,
+                ),
+            }
+        )
+
+    logger.info(f"\n{format_table(results)}")
+
+
+if __name__ == "__main__":
+    main()
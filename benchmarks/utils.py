@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from backend.db.mongodb.connection import MongoManager
+from backend.db.weaviate.connection import BatchImportSpec, WeaviateManager
+from backend.db.weaviate.schema import VectorIndexSpec
+from config import MongoDBSettings, WeaviateSettings
+from nlp.utils import fetch_wiki_clean_sections, page_wikitext
+
+
+def create_weaviate_manager() -> WeaviateManager:
+    """WeaviateManager connected with settings from .env (local Weaviate)"""
+    weaviate_settings = WeaviateSettings()
+    return WeaviateManager(
+        api_key=weaviate_settings.WEAVIATE_APIKEY_KEY,
+        native_embedding_url=weaviate_settings.EMBEDDING_SERVER_URL,
+        host=weaviate_settings.WEAVIATE_HOST,
+        port=weaviate_settings.WEAVIATE_PORT,
+        grpc_port=weaviate_settings.WEAVIATE_GRPC_PORT,
+        vector_index=VectorIndexSpec.from_settings(weaviate_settings),
+        batch_import=BatchImportSpec.from_settings(weaviate_settings),
+    )
+
+
+def sample_long_sections(
+    pages: int, min_chars: int = 1000
+) -> list[tuple[str, str, str]]:
+    """
+    (article title, section heading, section text) of the sections the parser
+    chunks, from articles randomly sampled from the scraped wikipedia collection
+    """
+    with MongoManager(MongoDBSettings().mongodb_local_uri, "scraper_db") as mongodb:
+        sample = mongodb.db["wikipedia"].aggregate([{"$sample": {"size": pages}}])
+        sections = []
+        for page in sample:
+            if ":" in page["title"].split(" ", 1)[0]:
+                continue
+            for heading, text in fetch_wiki_clean_sections(page_wikitext(page)).items():
+                if len(text) >= min_chars:
+                    sections.append((page["title"], heading, text))
+    return sections
+
+
+def directory_size_mb(path: Path) -> float:
+    """Total size of files inside a directory in megabytes"""
+    if not path.exists():
+        return 0.0
+    total = sum(f.stat().st_size for f in path.rglob("*") if f.is_file())
+    return round(total / 1024 / 1024, 2)
+
+
+def format_table(rows: list[dict]) -> str:
+    """Format list of result dicts as a plain text table"""
+    if not rows:
+        return ""
+    headers = list(rows[0].keys())
+    widths = {
+        h: max(len(str(h)), *(len(str(row.get(h, ""))) for row in rows))
+        for h in headers
+    }
+    lines = [" | ".join(str(h).ljust(widths[h]) for h in headers)]
+    lines.append("-+-".join("-" * widths[h] for h in headers))
+    for row in rows:
+        lines.append(" | ".join(str(row.get(h, "")).ljust(widths[h]) for h in headers))
+    return "\n".join(lines)
@@ -0,0 +1,110 @@
+"""
+Import throughput and disk size of Weaviate collections with default inverted
+indexes (every property searchable and filterable) versus the declared schema.
+
+Objects are sampled together with their vectors from the live collection, so no
+embedding is needed. Disk size is read from the Weaviate data directory mounted
+by docker-compose.
+
+    python -m benchmarks.weaviate_schema_indexing --collection WikiChunk --limit 20000
+"""
+
+import argparse
+import logging
+import time
+from dataclasses import replace
+from itertools import islice
+from pathlib import Path
+
+from backend.db.weaviate.schema import (
+    WIKI_ARTICLE_SCHEMA,
+    WIKI_CHUNK_SCHEMA,
+    CollectionSpec,
+)
+from benchmarks.utils import create_weaviate_manager, directory_size_mb, format_table
+from logger_config import setup_logging
+
+setup_logging("benchmark")
+logger = logging.getLogger(__name__)
+
+SCHEMAS = {spec.name: spec for spec in (WIKI_CHUNK_SCHEMA, WIKI_ARTICLE_SCHEMA)}
+
+
+def default_indexing(spec: CollectionSpec) -> CollectionSpec:
+    """Same properties as spec but with Weaviate default (full) indexing"""
+    return replace(
+        spec,
+        name=f"Bench{spec.name}Default",
+        properties=tuple(
+            replace(prop, index_searchable=True, index_filterable=True)
+            for prop in spec.properties
+        ),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--collection", choices=list(SCHEMAS), default="WikiChunk")
+    parser.add_argument("--limit", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument(
+        "--data-dir", type=Path, default=Path("backend/db/weaviate/data")
+    )
+    parser.add_argument(
+        "--settle-seconds",
+        type=int,
+        default=15,
+        help="wait for memtables to be flushed before measuring disk size",
+    )
+    args = parser.parse_args()
+
+    spec = SCHEMAS[args.collection]
+    variants = [
+        ("default", default_indexing(spec)),
+        ("declared", replace(spec, name=f"Bench{spec.name}Declared")),
+    ]
+
+    with create_weaviate_manager() as weaviate_client:
+        source = weaviate_client.client.collections.get(spec.name)
+        logger.info(f"Sampling {args.limit} objects from {spec.name}")
+        objects = list(islice(source.iterator(include_vector=True), args.limit))
+        if not objects:
+            logger.error(f"Collection {spec.name} is empty")
+            return
+
+        names = {prop.name for prop in spec.properties}
+        results = []
+        for label, variant in variants:
+            weaviate_client.clear_collection(variant.name)
+            collection = weaviate_client.ensure_collection(variant)
+
+            start = time.perf_counter()
+            with collection.batch.fixed_size(batch_size=args.batch_size) as batch:
+                for obj in objects:
+                    batch.add_object(
+                        properties={
+                            k: v for k, v in obj.properties.items() if k in names
+                        },
+                        uuid=obj.uuid,
+                        vector=obj.vector.get("default"),
+                    )
+            elapsed = time.perf_counter() - start
+
+            time.sleep(args.settle_seconds)
+            results.append(
+                {
+                    "schema": label,
+                    "objects": len(objects),
+                    "failed": len(collection.batch.failed_objects),
+                    "seconds": round(elapsed, 2),
+                    "objects/s": round(len(objects) / elapsed, 1),
+                    "disk_mb": directory_size_mb(args.data_dir / variant.name.lower()),
+                }
+            )
+            weaviate_client.clear_collection(variant.name)
+
+    logger.info(f"\n{format_table(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Recall@k versus query latency versus memory for WikiChunk vector index settings
+(HNSW parameters and PQ/BQ/SQ quantization) against a local Weaviate.
+
+Vectors are sampled from the live WikiChunk collection. Some of them are held out
+as queries, the exact top-k is computed with NumPy and compared with the results
+returned by every benchmarked index configuration.
+
+Memory is read from the Weaviate Prometheus endpoint (heap in use after import)
+when it is available, next to an estimate of the vector cache and HNSW graph size.
+
+    python -m benchmarks.weaviate_vector_index --limit 50000 --queries 200 --k 10
+"""
+
+import argparse
+import logging
+import re
+import statistics
+import time
+from dataclasses import replace
+from itertools import islice
+
+import numpy as np
+import requests
+
+from backend.db.weaviate.schema import WIKI_CHUNK_SCHEMA, VectorIndexSpec
+from benchmarks.utils import create_weaviate_manager, format_table
+from logger_config import setup_logging
+
+setup_logging("benchmark")
+logger = logging.getLogger(__name__)
+
+VARIANTS = {
+    "hnsw-ef64": VectorIndexSpec(ef=64),
+    "hnsw-ef128": VectorIndexSpec(ef=128),
+    "hnsw-ef256": VectorIndexSpec(ef=256),
+    "hnsw-m16": VectorIndexSpec(ef=128, max_connections=16),
+    "hnsw-m64-efc256": VectorIndexSpec(ef=128, max_connections=64, ef_construction=256),
+    "pq": VectorIndexSpec(ef=128, quantizer="pq"),
+    "bq": VectorIndexSpec(ef=128, quantizer="bq"),
+    "bq-rescore500": VectorIndexSpec(ef=128, quantizer="bq", rescore_limit=500),
+    "sq": VectorIndexSpec(ef=128, quantizer="sq"),
+}
+
+
+def estimated_memory_mb(spec: VectorIndexSpec, n: int, dim: int) -> float:
+    """Vector cache (compressed if quantized) plus HNSW layer 0 connections"""
+    bytes_per_vector = {
+        "none": 4 * dim,
+        "pq": spec.pq_segments,
+        "bq": dim / 8,
+        "sq": dim,
+    }[spec.quantizer]
+    graph_bytes = n * spec.max_connections * 2 * 8
+    return round((n * bytes_per_vector + graph_bytes) / 1024 / 1024, 1)
+
+
+def heap_in_use_mb(metrics_url: str) -> float | None:
+    try:
+        response = requests.get(metrics_url, timeout=5)
+        response.raise_for_status()
+    except requests.RequestException:
+        return None
+    match = re.search(r"^go_memstats_heap_inuse_bytes (\S+)$", response.text, re.M)
+    return round(float(match.group(1)) / 1024 / 1024, 1) if match else None
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--limit", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--variants", nargs="+", choices=list(VARIANTS), default=list(VARIANTS)
+    )
+    parser.add_argument("--metrics-url", default="http://localhost:2112/metrics")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    with create_weaviate_manager() as weaviate_client:
+        source = weaviate_client.client.collections.get(WIKI_CHUNK_SCHEMA.name)
+        logger.info(f"Sampling {args.limit + args.queries} vectors from WikiChunk")
+        objects = list(
+            islice(source.iterator(include_vector=True), args.limit + args.queries)
+        )
+        queries, corpus = objects[: args.queries], objects[args.queries :]
+        if not corpus:
+            logger.error("Not enough objects in WikiChunk")
+            return
+
+        corpus_uuids = [str(obj.uuid) for obj in corpus]
+        corpus_matrix = np.asarray(
+            [obj.vector["default"] for obj in corpus], dtype=np.float32
+        )
+        corpus_matrix /= np.linalg.norm(corpus_matrix, axis=1, keepdims=True)
+        query_matrix = np.asarray(
+            [obj.vector["default"] for obj in queries], dtype=np.float32
+        )
+        query_matrix /= np.linalg.norm(query_matrix, axis=1, keepdims=True)
+
+        # exact top-k by cosine similarity
+        similarities = query_matrix @ corpus_matrix.T
+        top_k = np.argsort(-similarities, axis=1)[:, : args.k]
+        ground_truth = [{corpus_uuids[i] for i in row} for row in top_k]
+
+        dim = corpus_matrix.shape[1]
+        results = []
+        for name in args.variants:
+            # quantizers are trained on a part of the sample, not the default 100k
+            vector_index = replace(
+                VARIANTS[name], training_limit=min(100000, len(corpus) // 2)
+            )
+            spec = replace(
+                WIKI_CHUNK_SCHEMA, name="BenchVectorIndex", vector_index=vector_index
+            )
+            weaviate_client.clear_collection(spec.name)
+            heap_before = heap_in_use_mb(args.metrics_url)
+            collection = weaviate_client.ensure_collection(spec)
+
+            start = time.perf_counter()
+            with collection.batch.fixed_size(batch_size=args.batch_size) as batch:
+                for obj in corpus:
+                    batch.add_object(
+                        properties={"source_id": "", "chunk_id": 0, "chunk_text": ""},
+                        uuid=obj.uuid,
+                        vector=obj.vector["default"],
+                    )
+            collection.batch.wait_for_vector_indexing()
+            import_seconds = time.perf_counter() - start
+            heap_after = heap_in_use_mb(args.metrics_url)
+
+            latencies = []
+            recalls = []
+            for query, truth in zip(query_matrix, ground_truth, strict=True):
+                query_start = time.perf_counter()
+                response = collection.query.near_vector(
+                    near_vector=query.tolist(), limit=args.k, return_properties=[]
+                )
+                latencies.append((time.perf_counter() - query_start) * 1000)
+                found = {str(obj.uuid) for obj in response.objects}
+                recalls.append(len(found & truth) / args.k)
+
+            results.append(
+                {
+                    "variant": name,
+                    f"recall@{args.k}": round(statistics.mean(recalls), 4),
+                    "p50_ms": round(statistics.median(latencies), 2),
+                    "p95_ms": round(
+                        statistics.quantiles(latencies, n=20)[-1]
+                        if len(latencies) > 1
+                        else latencies[0],
+                        2,
+                    ),
+                    "import_s": round(import_seconds, 1),
+                    "heap_mb": (
+                        round(heap_after - heap_before, 1)
+                        if heap_after is not None and heap_before is not None
+                        else "n/a"
+                    ),
+                    "estimated_mb": estimated_memory_mb(vector_index, len(corpus), dim),
+                }
+            )
+            logger.info(f"Finished variant {name}: {results[-1]}")
+            weaviate_client.clear_collection(spec.name)
+
+    logger.info(f"\n{format_table(results)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -26,6 +28,26 @@ class WeaviateSettings(BaseSettings):
     WEAVIATE_HOST: str = "127.0.0.1"
     WEAVIATE_PORT: int = 8080
     WEAVIATE_GRPC_PORT: int = 50051
+    # HNSW vector index of WikiChunk, ef=-1 means dynamic ef
+    WEAVIATE_HNSW_EF: int = -1
+    WEAVIATE_HNSW_EF_CONSTRUCTION: int = 128
+    WEAVIATE_HNSW_MAX_CONNECTIONS: int = 32
+    # vector compression: product (pq), binary (bq) or scalar (sq) quantization
+    WEAVIATE_QUANTIZER: Literal["none", "pq", "bq", "sq"] = "none"
+    WEAVIATE_QUANTIZER_RESCORE_LIMIT: int = 200
+    WEAVIATE_PQ_SEGMENTS: int = 96
+    WEAVIATE_QUANTIZER_TRAINING_LIMIT: int = 100000
+    # batch import: dynamic, fixed_size (concurrent requests) or rate_limit
+    WEAVIATE_IMPORT_MODE: Literal["dynamic", "fixed_size", "rate_limit"] = "fixed_size"
+    WEAVIATE_BATCH_SIZE: int = 200
+    WEAVIATE_CONCURRENT_REQUESTS: int = 4
+    WEAVIATE_REQUESTS_PER_MINUTE: int = 600
+    WEAVIATE_IMPORT_RETRIES: int = 3
+    WEAVIATE_RETRY_BACKOFF_SECONDS: float = 2.0
+    # chunks embedded per /embed request, imported while the next ones are embedded
+    WEAVIATE_EMBED_BATCH_SIZE: int = 256
+    # vectors of embedding inputs seen before are reused from here, empty disables it
+    EMBEDDING_CACHE_PATH: str = "data/embedding_cache.sqlite"
 
     # Load envs from .env file, get only relevant variables, variables are case sensitive
     model_config = SettingsConfigDict(
@@ -36,6 +58,48 @@ class WeaviateSettings(BaseSettings):
 class ScraperSettings(BaseSettings):
     WIKI_DOWNLOAD_PATH: str = "/app/data/wiki_dumps/"
     RSS_URL: str = "https://dumps.wikimedia.org/plwiki/latest/plwiki-latest-pages-articles-multistream-index.txt.bz2-rss.xml"
+    # full: whole <page> XML in content, slim: wikitext and the metadata the parser reads
+    WIKI_PAGE_STORAGE: Literal["full", "slim"] = "slim"
+
+
+class RetrievalSettings(BaseSettings):
+    # weaviate, or local: in-process vectors and BM25 loaded from LOCAL_STORE_PATH
+    RETRIEVAL_BACKEND: Literal["weaviate", "local"] = "weaviate"
+    LOCAL_STORE_PATH: str = "data/local_store"
+    # title/redirect dictionary built by: python -m parser.wiki build-titles
+    TITLE_INDEX_PATH: str = "data/title_index.sqlite"
+    # lead chunks fetched when a query names a single article
+    TITLE_LEAD_CHUNKS: int = 3
+    # lemmatized BM25 index over chunk_text, filled by: python -m parser.wiki --keyword-index
+    KEYWORD_INDEX_PATH: str = "data/keyword_index.sqlite"
+    # chunk vectors kept by: python -m parser.wiki --save-vectors
+    VECTOR_STORE_PATH: str = "data/vector_store"
+    # Parquet chunk export written by: python -m parser.wiki --export-chunks
+    CHUNK_EXPORT_PATH: str = "data/chunks"
+    # near-duplicate chunks (MinHash-LSH): off, drop, link (no vector) or flag
+    NEAR_DUPLICATE_POLICY: Literal["off", "drop", "link", "flag"] = "off"
+    NEAR_DUPLICATE_INDEX_PATH: str = "data/near_duplicates.sqlite"
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+
+    # Load envs from .env file, get only relevant variables, variables are case sensitive
+    model_config = SettingsConfigDict(
+        env_file=".env", extra="ignore", case_sensitive=True
+    )
+
+
+class RankingSettings(BaseSettings):
+    # cross-encoder runtime: torch, or ONNX Runtime (onnx, onnx_int8 with dynamically
+    # quantized weights), the ONNX model is exported under models/ on first use
+    RERANKER_BACKEND: Literal["torch", "onnx", "onnx_int8"] = "torch"
+    # (query, chunk) pairs are truncated to this many tokens
+    RERANKER_MAX_LENGTH: int = 512
+    # intra-op threads of torch or ONNX Runtime, 0 keeps the library default
+    RERANKER_THREADS: int = 0
+
+    # Load envs from .env file, get only relevant variables, variables are case sensitive
+    model_config = SettingsConfigDict(
+        env_file=".env", extra="ignore", case_sensitive=True
+    )
 
 
 class OllamaSettings(BaseSettings):
@@ -1,7 +1,6 @@
 import logging
 import math
 import random
-from collections import defaultdict
 from typing import Annotated, TypedDict, cast
 
 from langchain_core.messages import (
@@ -16,6 +15,7 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.graph import END, StateGraph
 from langgraph.graph.message import add_messages
 
+from backend.db.retrieval import fuse_relative_scores
 from llm.prompts import MATH_SYSTEM_PROMPT
 from llm.routing import (
     RouteType,
@@ -28,6 +28,7 @@ from llm.routing import (
     process_query,
     summarize_query,
 )
+from nlp.near_duplicates import chunk_key
 
 logger = logging.getLogger(__name__)
 
@@ -45,12 +46,106 @@ class AgentState(TypedDict, total=False):
 ### UTILS ###
 
 
+def title_lead_chunks(query: str, config: RunnableConfig) -> list[dict]:
+    """
+    Lead chunks of the article confidently named by the query, fetched by id
+    without any search. Empty if there is no title index or no single match.
+    """
+    configurable = config.get("configurable", {})
+    title_index = configurable.get("title_index")
+    if title_index is None:
+        return []
+
+    match = title_index.resolve_query(query, configurable["nlp_toolkit"])
+    if match is None:
+        return []
+
+    lead_chunks = configurable.get("title_lead_chunks", 3)
+    chunks = configurable["weaviate_client"].fetch_wikichunks_by_keys(
+        [(match.source_id, chunk_id) for chunk_id in range(lead_chunks)]
+    )
+    logger.info(
+        f"Title fast path: '{match.span}' -> article {match.source_id} "
+        f"({match.kind}), {len(chunks)} lead chunks"
+    )
+    return chunks
+
+
+def hybrid_chunk_fetch(
+    query_text: str, limit: int, alpha: float, config: RunnableConfig
+) -> list[dict]:
+    """
+    Hybrid search. With a keyword index configured, the retrieval backend serves
+    the vector leg only and the keyword leg is matched on lemmas in the local
+    index, so inflected forms find each other. Both are fused by relative score.
+    """
+    configurable = config.get("configurable", {})
+    retrieval_client = configurable["weaviate_client"]
+    keyword_index = configurable.get("keyword_index")
+    if keyword_index is None:
+        return retrieval_client.single_wikichunk_hybrid_fetch(query_text, limit, alpha)
+
+    candidates = max(limit, configurable.get("hybrid_candidates", 50))
+    vector_results = retrieval_client.single_wikichunk_hybrid_fetch(
+        query_text, candidates, 1.0
+    )
+    (terms,) = configurable["nlp_toolkit"].lemmatize_tokens([query_text])
+    keyword_results = keyword_index.search(terms, candidates)
+
+    chunks = {(elem["source_id"], elem["chunk_id"]): elem for elem in vector_results}
+    fused = fuse_relative_scores(
+        {key: elem["score"] for key, elem in chunks.items()},
+        {
+            (source_id, chunk_id): score
+            for source_id, chunk_id, score in keyword_results
+        },
+        alpha,
+    )[:limit]
+
+    missing_keys = [key for key, _ in fused if key not in chunks]
+    for elem in retrieval_client.fetch_wikichunks_by_keys(missing_keys):
+        chunks[(elem["source_id"], elem["chunk_id"])] = elem
+    return [{**chunks[key], "score": score} for key, score in fused if key in chunks]
+
+
+def ranked_chunk_fetch(
+    queries: list[str], limit: int, alpha: float, config: RunnableConfig
+) -> list[list[dict]]:
+    """
+    Hybrid search results of every query with their cross-encoder rank_score.
+    Pairs of all queries are reranked in a single batch.
+    """
+    nlp_toolkit = config["configurable"]["nlp_toolkit"]
+    results = []
+    for query_text in queries:
+        logger.info(f"Search Weaviate database for query: {query_text}")
+        results.append(hybrid_chunk_fetch(query_text, limit, alpha, config))
+
+    scores = nlp_toolkit.rank_pairs(
+        [
+            (query_text, elem["chunk_text"])
+            for query_text, query_results in zip(queries, results, strict=True)
+            for elem in query_results
+        ]
+    )
+    for score, elem in zip(
+        scores,
+        (elem for query_results in results for elem in query_results),
+        strict=True,
+    ):
+        elem["rank_score"] = score
+    return results
+
+
 def unique_chunks(results: list[dict]) -> list[dict]:
-    """Filter unique chunks of given wiki article with the highest rank_score"""
+    """
+    Filter unique chunks of given wiki article with the highest rank_score.
+    Flagged near-duplicates collapse with their canonical chunk.
+    """
     unique_map: dict = {}
 
     for item in results:
-        key = (item["source_id"], item["chunk_id"])
+        key = item.get("duplicate_of") or chunk_key(item["source_id"], item["chunk_id"])
 
         current_score = item.get("rank_score", -float("inf"))
         if key not in unique_map or current_score > unique_map[key].get(
@@ -402,28 +497,28 @@ def lookup_node(state: AgentState, config: RunnableConfig) -> dict:
     model_name = config.get("configurable", {}).get("model_name", "llama3.2")
 
     current_query = state["current_query"]
-    decision = process_query(instructor_client, current_query, model_name)
 
-    all_queries = [current_query] + decision.queries
+    # fast path: the query names a single article, its lead chunks are the context
+    sorted_chunks = title_lead_chunks(current_query, config)
 
-    basic_chunks = []
-    for query_text in all_queries:
-        logger.info(f"Search Weaviate database for query: {query_text}")
-        query_results = weaviate_client.single_wikichunk_hybrid_fetch(
-            query_text, 8, 0.5
-        )
-        scores = nlp_toolkit.rank(
-            query_text, [elem["chunk_text"] for elem in query_results]
-        )
-        for score, elem in zip(scores, query_results, strict=True):
-            elem["rank_score"] = score
-        basic_chunks.extend(query_results)
+    if not sorted_chunks:
+        decision = process_query(instructor_client, current_query, model_name)
 
-    basic_chunks = unique_chunks(basic_chunks)
+        all_queries = [current_query] + decision.queries
 
-    basic_chunks = basic_chunks[:12]
+        basic_chunks = [
+            elem
+            for query_results in ranked_chunk_fetch(all_queries, 8, 0.5, config)
+            for elem in query_results
+        ]
+
+        basic_chunks = unique_chunks(basic_chunks)
 
-    sorted_chunks = sorted(basic_chunks, key=lambda x: (x["source_id"], x["chunk_id"]))
+        basic_chunks = basic_chunks[:12]
+
+        sorted_chunks = sorted(
+            basic_chunks, key=lambda x: (x["source_id"], x["chunk_id"])
+        )
 
     context_for_llm = prepare_context_for_llm(sorted_chunks, current_query)
 
@@ -474,19 +569,11 @@ def compare_node(state: AgentState, config: RunnableConfig) -> dict:
         f"Entities: {decision.entities}\nComparison aspects: {decision.comparison_aspects}"
     )
 
-    all_chunks = []
-    for query_text in decision.search_queries:
-        logger.info(f"Search Weaviate database for query: {query_text}")
-        query_results = weaviate_client.single_wikichunk_hybrid_fetch(
-            query_text, 8, 0.5
-        )
-        scores = nlp_toolkit.rank(
-            query_text, [elem["chunk_text"] for elem in query_results]
-        )
-        for score, elem in zip(scores, query_results, strict=True):
-            elem["rank_score"] = score
-
-        all_chunks.extend(query_results[:3])
+    all_chunks = [
+        elem
+        for query_results in ranked_chunk_fetch(decision.search_queries, 8, 0.5, config)
+        for elem in query_results[:3]
+    ]
 
     sorted_chunks = sorted(all_chunks, key=lambda x: (x["source_id"], x["chunk_id"]))
 
@@ -531,31 +618,21 @@ def summarize_node(state: AgentState, config: RunnableConfig) -> dict:
 
     all_queries = [current_query] + decision.queries
 
-    basic_chunks = []
-    for query_text in all_queries:
-        logger.info(f"Search Weaviate database for query: {query_text}")
-        query_results = weaviate_client.single_wikichunk_hybrid_fetch(
-            query_text, 8, 0.5
-        )
-        scores = nlp_toolkit.rank(
-            query_text, [elem["chunk_text"] for elem in query_results]
-        )
-        for score, elem in zip(scores, query_results, strict=True):
-            elem["rank_score"] = score
-        basic_chunks.extend(query_results)
+    basic_chunks = [
+        elem
+        for query_results in ranked_chunk_fetch(all_queries, 8, 0.5, config)
+        for elem in query_results
+    ]
     basic_chunks = unique_chunks(basic_chunks)
 
     basic_chunks = basic_chunks[:4]
 
     missing_keys = get_neighbour_context_keys(basic_chunks)
-    grouped_source_chunk_id = defaultdict(list)
-    for s_id, c_id in missing_keys:
-        grouped_source_chunk_id[s_id].append(c_id)
 
-    extended_chunks = weaviate_client.batch_wikichunk_fetch(grouped_source_chunk_id)
+    extended_chunks = weaviate_client.fetch_wikichunks_by_keys(missing_keys)
 
     sorted_chunks = sorted(
-        extended_chunks, key=lambda x: (x["source_id"], x["chunk_id"])
+        basic_chunks + extended_chunks, key=lambda x: (x["source_id"], x["chunk_id"])
     )
 
     context_for_llm = prepare_context_for_llm(sorted_chunks, current_query)
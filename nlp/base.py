@@ -21,6 +21,11 @@ class NLP(metaclass=ABCMeta):
         """Lemmatize names and sunrnames in list"""
         pass
 
+    @abstractmethod
+    def lemmatize_tokens(self, texts: list[str], batch_size: int) -> list[list[str]]:
+        """Lemmas of the word tokens of every text, used as keyword index terms"""
+        pass
+
     @abstractmethod
     def texts_readability_fog(self, texts: list[str], batch_size: int) -> list[float]:
         """
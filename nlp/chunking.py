@@ -1,17 +1,27 @@
 import logging
+from collections.abc import Callable
 from itertools import groupby
 from pathlib import Path
 
+import numpy as np
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from semantic_chunkers import StatisticalChunker
 from semantic_router.encoders import HuggingFaceEncoder
 from transformers import AutoTokenizer
 
+from nlp.splitting import (
+    pooled_vectors,
+    semantic_split_points,
+    sentence_spans,
+    split_by_offsets,
+    window_similarities,
+)
+
 logger = logging.getLogger(__name__)
 
 
 class LangchainSplitterClient:
     _tokenizer = None
+    _splitters: dict[int, RecursiveCharacterTextSplitter] = {}
 
     def __init__(self):
         self.model_checkpoint = "sentence-transformers/multi-qa-MiniLM-L6-cos-v1"
@@ -60,10 +70,12 @@ class LangchainSplitterClient:
         return LangchainSplitterClient._tokenizer
 
     def chunk_texts(self, texts, max_tokens):
-        tokenizer = self._get_tokenizer()
-        splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
-            tokenizer, chunk_size=max_tokens, chunk_overlap=50
-        )
+        splitter = LangchainSplitterClient._splitters.get(max_tokens)
+        if splitter is None:
+            splitter = RecursiveCharacterTextSplitter.from_huggingface_tokenizer(
+                self._get_tokenizer(), chunk_size=max_tokens, chunk_overlap=50
+            )
+            LangchainSplitterClient._splitters[max_tokens] = splitter
 
         ids = list(range(len(texts)))
         metadatas = [{"id": i} for i in ids]
@@ -77,18 +89,67 @@ class LangchainSplitterClient:
         return result
 
 
+class OffsetSplitterClient(LangchainSplitterClient):
+    """
+    Token-aware splitter with the tokenizer and chunk size of
+    LangchainSplitterClient. Every text is tokenized once, in a single batched
+    call of the fast tokenizer, and cut by the offsets of its tokens instead of
+    tokenizing every candidate split again while merging.
+    """
+
+    def chunk_texts(self, texts, max_tokens, overlap=50):
+        if not texts:
+            return []
+        tokenizer = self._get_tokenizer()
+        encoding = tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )
+        return [
+            split_by_offsets(text, offsets, max_tokens, overlap)
+            for text, offsets in zip(texts, encoding["offset_mapping"], strict=True)
+        ]
+
+
 class StatisticalChunkerClient:
+    """
+    Semantic chunker: a section is cut where the similarity of a sentence to the
+    sentences before it drops, within min_tokens and max_tokens.
+
+    All sentences of a batch are embedded in a single pass, by embed (e.g. the
+    embedding server) or else by a locally loaded encoder of the same model, and
+    split points are computed with NumPy. A drop is a similarity below the
+    split_percentile percentile of the similarities within its section.
+    """
+
     _encoder = None
 
-    def __init__(self):
+    def __init__(
+        self,
+        embed: Callable[[list[str]], list[list[float]]] | None = None,
+        min_tokens: int = 100,
+        window: int = 5,
+        split_percentile: float = 20,
+        embed_batch_size: int = 4096,
+    ):
         self.model_checkpoint = "sentence-transformers/multi-qa-MiniLM-L6-cos-v1"
         self.model_dir = Path("models") / "statistical-chunker"
+        self.embed = embed
+        self.min_tokens = min_tokens
+        self.window = window
+        self.split_percentile = split_percentile
+        self.embed_batch_size = embed_batch_size
 
     def _get_encoder(self):
         if StatisticalChunkerClient._encoder is None:
             required_files = [
                 "config.json",
                 "model.safetensors",
+                "tokenizer.json",
             ]
 
             complete_dir_and_files = self.model_dir.exists() and all(
@@ -108,12 +169,13 @@ class StatisticalChunkerClient:
 
                 self.model_dir.mkdir(parents=True, exist_ok=True)
                 encoder._model.save_pretrained(str(self.model_dir))
+                encoder._tokenizer.save_pretrained(str(self.model_dir))
 
                 StatisticalChunkerClient._encoder = encoder
             else:
                 logger.info(f"Load encoder from local directory: {self.model_dir}")
                 try:
-                    StatisticalChunkerClient._tokenizer = HuggingFaceEncoder(
+                    StatisticalChunkerClient._encoder = HuggingFaceEncoder(
                         name=str(self.model_dir)
                     )
                 except Exception as e:
@@ -124,14 +186,72 @@ class StatisticalChunkerClient:
 
             logger.info("Encoder has been loaded successfully.")
 
-        return LangchainSplitterClient._tokenizer
+        return StatisticalChunkerClient._encoder
+
+    def _embed_sentences(self, sentences: list[str]) -> np.ndarray:
+        embed = self.embed or self._get_encoder()
+        vectors: list[list[float]] = []
+        for i in range(0, len(sentences), self.embed_batch_size):
+            vectors.extend(embed(sentences[i : i + self.embed_batch_size]))
+        return np.asarray(vectors, dtype=np.float32)
 
     def chunk_texts(self, texts, max_tokens):
-        encoder = self._get_encoder()
-        chunker = StatisticalChunker(
-            encoder=encoder,
-            max_split_tokens=max_tokens,
+        return self.chunk_texts_with_vectors(texts, max_tokens)[0]
+
+    def chunk_texts_with_vectors(
+        self, texts: list[str], max_tokens: int
+    ) -> tuple[list[list[str]], list[np.ndarray]]:
+        """
+        Chunks of every text and their vectors, pooled from the sentence
+        embeddings computed for chunking (see pooled_vectors), so chunks do not
+        have to be embedded again.
+        """
+        if not texts:
+            return [], []
+        # token counts of sentences come from one call of the splitter tokenizer
+        tokenizer = LangchainSplitterClient()._get_tokenizer()
+        encoding = tokenizer(
+            texts,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
         )
-        chunks = chunker(texts)
-        results = [[elem.content for elem in chunk] for chunk in chunks]
-        return results
+        sections = []
+        for text, offsets in zip(texts, encoding["offset_mapping"], strict=True):
+            starts = np.fromiter((start for start, _ in offsets), dtype=np.int64)
+            sections.append(sentence_spans(text, starts, max_tokens))
+
+        sentences = [
+            text[start:end]
+            for text, (spans, _) in zip(texts, sections, strict=True)
+            for start, end in spans
+        ]
+        vectors = self._embed_sentences(sentences)
+
+        results, chunk_vectors = [], []
+        offset = 0
+        for text, (spans, counts) in zip(texts, sections, strict=True):
+            section_vectors = vectors[offset : offset + len(spans)]
+            offset += len(spans)
+            if len(spans) < 2:
+                points = []
+            else:
+                similarities = window_similarities(section_vectors, self.window)
+                threshold = float(
+                    np.percentile(similarities[1:], self.split_percentile)
+                )
+                points = semantic_split_points(
+                    similarities, counts, max_tokens, self.min_tokens, threshold
+                )
+            bounds = [0, *points, len(spans)] if spans else [0]
+            chunks = [
+                text[spans[first][0] : spans[last - 1][1]].strip()
+                for first, last in zip(bounds, bounds[1:], strict=False)
+            ]
+            pooled = pooled_vectors(section_vectors, counts, bounds[:-1])
+            kept = [i for i, chunk in enumerate(chunks) if chunk]
+            results.append([chunks[i] for i in kept])
+            chunk_vectors.append(pooled[kept])
+        return results, chunk_vectors
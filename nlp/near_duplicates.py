@@ -0,0 +1,259 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Literal
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+# drop: left out, link: imported without a vector, flag: imported and embedded,
+# linked and flagged chunks point to their canonical chunk in duplicate_of
+DuplicatePolicy = Literal["drop", "link", "flag"]
+
+_WORD = re.compile(r"\w+")
+_DIGITS = re.compile(r"\d+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingles(text: str, size: int = 3) -> set[str]:
+    """
+    Word shingles of a text. Numbers are masked, so stubs that differ only in
+    dates or populations share their shingles.
+    """
+    words = _WORD.findall(_DIGITS.sub("0", text.lower()))
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+def _hash32(values: set[str]) -> np.ndarray:
+    return np.fromiter(
+        (
+            int.from_bytes(hashlib.blake2b(v.encode(), digest_size=4).digest(), "big")
+            for v in values
+        ),
+        dtype=np.uint64,
+        count=len(values),
+    )
+
+
+def chunk_key(source_id: str, chunk_id: int) -> str:
+    return f"{source_id}:{chunk_id}"
+
+
+class NearDuplicateIndex:
+    """
+    Persisted MinHash-LSH index of chunk texts.
+
+    Every chunk gets a MinHash signature of its word shingles. Signatures are cut
+    into bands, chunks sharing any band bucket are candidates, and a candidate
+    whose estimated Jaccard similarity (share of equal signature values) reaches
+    threshold makes the chunk a near-duplicate. Only canonical chunks (the first
+    of their kind) are put into buckets, duplicates point to their canonical one.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        policy: DuplicatePolicy = "flag",
+        threshold: float = 0.8,
+        num_perm: int = 128,
+        bands: int = 16,
+        seed: int = 1,
+    ):
+        if num_perm % bands:
+            raise ValueError(f"{num_perm} permutations cannot be cut in {bands} bands")
+        self.policy = policy
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_MERSENNE_PRIME), num_perm, dtype=np.uint64)
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(db_path, timeout=60, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signatures (
+                key TEXT PRIMARY KEY, canonical TEXT NOT NULL, signature BLOB NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER, bucket BLOB, key TEXT,
+                PRIMARY KEY (band, bucket, key)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS signatures_canonical ON signatures (canonical);
+            """
+        )
+        self.connection.commit()
+
+    def __enter__(self) -> NearDuplicateIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: minimum of every permuted shingle hash"""
+        hashes = _hash32(shingles(text))
+        permuted = (
+            (hashes[:, None] * self._a[None, :] + self._b[None, :]) % _MERSENNE_PRIME
+        ) & _MAX_HASH
+        return permuted.min(axis=0).astype(np.uint32)
+
+    def _band_buckets(self, signature: np.ndarray) -> list[bytes]:
+        rows = self.num_perm // self.bands
+        return [
+            hashlib.blake2b(band.tobytes(), digest_size=8).digest()
+            for band in signature.reshape(self.bands, rows)
+        ]
+
+    def _stored(self, key: str) -> tuple[str, np.ndarray] | None:
+        row = self.connection.execute(
+            "SELECT canonical, signature FROM signatures WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], np.frombuffer(row[1], dtype=np.uint32)
+
+    def assign(self, chunks: list[dict[str, Any]]) -> dict[str, str]:
+        """
+        Canonical chunk key of every chunk (source_id:chunk_id), its own key when
+        it is not a near-duplicate of a chunk seen before, in this batch or any
+        earlier one. A chunk that was canonical stays canonical when parsed again,
+        its buckets follow its current text.
+        """
+        canonical_keys = {}
+        with self.connection:
+            for chunk in chunks:
+                key = chunk_key(chunk["source_id"], chunk["chunk_id"])
+                signature = self.signature(chunk["chunk_text"])
+                buckets = self._band_buckets(signature)
+
+                stored = self._stored(key)
+                if stored is not None and stored[0] == key:
+                    canonical = key
+                    self._delete_buckets(key, stored[1])
+                else:
+                    canonical = self._best_candidate(key, signature, buckets) or key
+
+                self.connection.execute(
+                    "INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)",
+                    (key, canonical, signature.tobytes()),
+                )
+                if canonical == key:
+                    self.connection.executemany(
+                        "INSERT OR IGNORE INTO buckets VALUES (?, ?, ?)",
+                        [(band, bucket, key) for band, bucket in enumerate(buckets)],
+                    )
+                canonical_keys[key] = canonical
+
+        duplicates = sum(key != canonical for key, canonical in canonical_keys.items())
+        logger.info(f"{duplicates}/{len(canonical_keys)} chunks are near-duplicates")
+        return canonical_keys
+
+    def remove(self, keys: list[tuple[str, int]]) -> list[tuple[str, int]]:
+        """
+        Forget chunks about to be deleted from the collection (trailing chunks of
+        an article that got shorter), so that they no longer attract
+        near-duplicates. Under link and drop, near-duplicates have no vector of
+        their own, so a canonical chunk they point to is kept in the index and
+        returned: the caller must keep it in the collection as well.
+        """
+        kept = []
+        with self.connection:
+            for source_id, chunk_id in keys:
+                key = chunk_key(source_id, chunk_id)
+                stored = self._stored(key)
+                if stored is None:
+                    continue
+                if stored[0] == key:
+                    if self.policy != "flag" and self.has_duplicates(key):
+                        kept.append((source_id, chunk_id))
+                        continue
+                    self._delete_buckets(key, stored[1])
+                self.connection.execute("DELETE FROM signatures WHERE key = ?", (key,))
+        if kept:
+            logger.info(f"{len(kept)} stale canonical chunks kept for their duplicates")
+        return kept
+
+    def has_duplicates(self, key: str) -> bool:
+        """Whether any near-duplicate points to the chunk key"""
+        row = self.connection.execute(
+            "SELECT 1 FROM signatures WHERE canonical = ? AND key != ? LIMIT 1",
+            (key, key),
+        ).fetchone()
+        return row is not None
+
+    def _delete_buckets(self, key: str, signature: np.ndarray) -> None:
+        self.connection.executemany(
+            "DELETE FROM buckets WHERE band = ? AND bucket = ? AND key = ?",
+            [
+                (band, bucket, key)
+                for band, bucket in enumerate(self._band_buckets(signature))
+            ],
+        )
+
+    def _best_candidate(
+        self, key: str, signature: np.ndarray, buckets: list[bytes]
+    ) -> str | None:
+        """Canonical key of the most similar candidate above threshold, if any"""
+        candidates = {
+            candidate
+            for band, bucket in enumerate(buckets)
+            for (candidate,) in self.connection.execute(
+                "SELECT key FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)
+            )
+            if candidate != key
+        }
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            stored = self._stored(candidate)
+            # only canonical chunks still in the index are matched
+            if stored is None or stored[0] != candidate:
+                continue
+            similarity = float(np.mean(stored[1] == signature))
+            if similarity >= best_similarity and (
+                best is None or similarity > best_similarity
+            ):
+                best, best_similarity = stored[0], similarity
+        return best
+
+
+def apply_duplicate_policy(
+    chunks: list[dict[str, Any]],
+    canonical_keys: dict[str, str],
+    policy: DuplicatePolicy,
+) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Split chunks into (chunks to embed, chunks imported without a vector) by
+    policy. Near-duplicates that are kept get duplicate_of set to their canonical
+    chunk key, so that retrieval can collapse them.
+    """
+    embedded, linked = [], []
+    for chunk in chunks:
+        canonical = canonical_keys[chunk_key(chunk["source_id"], chunk["chunk_id"])]
+        if canonical == chunk_key(chunk["source_id"], chunk["chunk_id"]):
+            embedded.append(chunk)
+        elif policy == "flag":
+            embedded.append({**chunk, "duplicate_of": canonical})
+        elif policy == "link":
+            linked.append({**chunk, "duplicate_of": canonical})
+    return embedded, linked
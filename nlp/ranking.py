@@ -1,20 +1,58 @@
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any, Literal
 
+import numpy as np
+import onnxruntime as ort
+import torch
+from onnxruntime.quantization import QuantType, quantize_dynamic
 from sentence_transformers import CrossEncoder
+from transformers import AutoTokenizer
 
 logger = logging.getLogger(__name__)
 
-
-class CrossEncoderMSMarcoClient:
-    _model = None
-
-    def __init__(self):
-        self.model_checkpoint = "cross-encoder/ms-marco-MiniLM-L-6-v2"
-        self.model_dir = Path("models") / "cross-encoder-ms-marco-minilm"
-
-    def _get_model(self):
-        if CrossEncoderMSMarcoClient._model is None:
+# torch: CrossEncoder.predict, onnx: ONNX Runtime on CPU, onnx_int8: ONNX Runtime
+# with dynamically quantized int8 weights. ONNX models are exported on first use.
+RankingBackend = Literal["torch", "onnx", "onnx_int8"]
+
+# one inference at a time, concurrent chat requests queue here instead of
+# competing for the same cores with their own intra-op thread pools
+_inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+
+class CrossEncoderClient:
+    """
+    Cross-encoder reranker of (query, text) pairs.
+
+    Args:
+        backend: torch, onnx or onnx_int8 (see RankingBackend).
+        max_length: Pairs are truncated to this many tokens.
+        threads: Intra-op threads of torch (process-wide) or ONNX Runtime,
+            0 leaves the library default.
+    """
+
+    model_checkpoint: str
+    model_dir: Path
+    _model: CrossEncoder | None = None
+    # ONNX sessions with their tokenizers, by model file
+    _onnx_sessions: dict[Path, tuple[ort.InferenceSession, Any]] = {}
+
+    def __init__(
+        self,
+        backend: RankingBackend = "torch",
+        max_length: int = 512,
+        threads: int = 0,
+    ):
+        self.backend = backend
+        self.max_length = max_length
+        self.threads = threads
+        if threads and backend == "torch":
+            torch.set_num_threads(threads)
+
+    def _get_model(self) -> CrossEncoder:
+        cls = type(self)
+        if cls._model is None:
             required_files = [
                 "tokenizer.json",
                 "tokenizer_config.json",
@@ -40,11 +78,11 @@ class CrossEncoderMSMarcoClient:
                 self.model_dir.mkdir(parents=True, exist_ok=True)
                 model.save(str(self.model_dir))
 
-                CrossEncoderMSMarcoClient._model = model
+                cls._model = model
             else:
                 logger.info(f"Load model from local directory: {self.model_dir}")
                 try:
-                    CrossEncoderMSMarcoClient._model = CrossEncoder(str(self.model_dir))
+                    cls._model = CrossEncoder(str(self.model_dir))
                 except Exception as e:
                     logger.info(
                         f"Error while loading: {e}. Try delete local directory manually: {self.model_dir}"
@@ -53,74 +91,100 @@ class CrossEncoderMSMarcoClient:
 
             logger.info("Model has been loaded successfully.")
 
-        return CrossEncoderMSMarcoClient._model
+        return cls._model
 
-    def rank(self, query: str, texts: list[str]) -> list[float]:
-        """
-        Ranks text candidates against a query using a cross-encoder model.
+    def _onnx_path(self) -> Path:
+        name = "model_int8.onnx" if self.backend == "onnx_int8" else "model.onnx"
+        return self.model_dir / "onnx" / name
 
-        Args:
-            query: The search query string.
-            texts: A list of document strings to be scored.
-
-        Returns:
-            A list of relevance scores (higher is better) for each text.
-        """
+    def _export_onnx(self) -> None:
+        """Export the torch model to ONNX and quantize its weights for onnx_int8"""
         model = self._get_model()
-        pairs = [[query, text] for text in texts]
-        scores = model.predict(pairs)
-
-        return scores.tolist()
-
-
-class UnicampMiniLMMultiClient:
-    _model = None
-
-    def __init__(self):
-        self.model_checkpoint = "unicamp-dl/mMiniLM-L6-v2-mmarco-v2"
-        self.model_dir = Path("models") / "unicamp-ms-marco-minilm-multilangual"
-
-    def _get_model(self):
-        if UnicampMiniLMMultiClient._model is None:
-            required_files = [
-                "tokenizer.json",
-                "tokenizer_config.json",
-                "config.json",
-                "model.safetensors",
+        path = self.model_dir / "onnx" / "model.onnx"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if not path.exists():
+            logger.info(f"Export {self.model_checkpoint} to ONNX: {path}")
+            features = model.tokenizer(["query"], ["text"], return_tensors="pt")
+            # positional inputs in the order of the forward() signature
+            names = [
+                name
+                for name in ("input_ids", "attention_mask", "token_type_ids")
+                if name in features
             ]
-
-            complete_dir_and_files = self.model_dir.exists() and all(
-                (self.model_dir / f).exists() for f in required_files
+            model.model.eval()
+            with torch.no_grad():
+                torch.onnx.export(
+                    model.model,
+                    tuple(features[name] for name in names),
+                    str(path),
+                    input_names=names,
+                    output_names=["logits"],
+                    dynamic_axes={
+                        **{name: {0: "batch", 1: "sequence"} for name in names},
+                        "logits": {0: "batch"},
+                    },
+                    opset_version=17,
+                    dynamo=False,
+                )
+        if self.backend == "onnx_int8":
+            logger.info(f"Quantize {path} to int8")
+            quantize_dynamic(
+                str(path), str(self._onnx_path()), weight_type=QuantType.QInt8
             )
 
-            if not complete_dir_and_files:
-                logger.info(f"Load model from remote: {self.model_checkpoint}...")
-
-                if self.model_dir.exists():
-                    for item in sorted(self.model_dir.rglob("*"), reverse=True):
-                        item.unlink() if item.is_file() else item.rmdir()
-                else:
-                    self.model_dir.mkdir(parents=True, exist_ok=True)
-
-                model = CrossEncoder(self.model_checkpoint, max_length=512)
-
-                self.model_dir.mkdir(parents=True, exist_ok=True)
-                model.save(str(self.model_dir))
-
-                UnicampMiniLMMultiClient._model = model
-            else:
-                logger.info(f"Load model from local directory: {self.model_dir}")
-                try:
-                    UnicampMiniLMMultiClient._model = CrossEncoder(str(self.model_dir))
-                except Exception as e:
-                    logger.info(
-                        f"Error while loading: {e}. Try delete local directory manually: {self.model_dir}"
-                    )
-                    raise
-
-            logger.info("Model has been loaded successfully.")
-
-        return UnicampMiniLMMultiClient._model
+    def _get_onnx(self) -> tuple[ort.InferenceSession, Any]:
+        path = self._onnx_path()
+        if path not in CrossEncoderClient._onnx_sessions:
+            if not path.exists():
+                self._export_onnx()
+            options = ort.SessionOptions()
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            session = ort.InferenceSession(
+                str(path), options, providers=["CPUExecutionProvider"]
+            )
+            CrossEncoderClient._onnx_sessions[path] = (
+                session,
+                AutoTokenizer.from_pretrained(str(self.model_dir)),
+            )
+            logger.info(f"ONNX model has been loaded successfully: {path}")
+        return CrossEncoderClient._onnx_sessions[path]
+
+    def _predict_onnx(self, pairs: list[tuple[str, str]]) -> list[float]:
+        session, tokenizer = self._get_onnx()
+        features = tokenizer(
+            [query for query, _ in pairs],
+            [text for _, text in pairs],
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        logits = session.run(
+            None,
+            {
+                node.name: features[node.name].astype(np.int64)
+                for node in session.get_inputs()
+            },
+        )[0]
+        # same activation as CrossEncoder.predict for a single relevance label
+        if logits.shape[1] == 1:
+            return (1 / (1 + np.exp(-logits[:, 0]))).tolist()
+        return logits[:, -1].tolist()
+
+    def _predict(self, pairs: list[tuple[str, str]]) -> list[float]:
+        if self.backend == "torch":
+            model = self._get_model()
+            model.max_length = self.max_length
+            return model.predict([list(pair) for pair in pairs]).tolist()
+        return self._predict_onnx(pairs)
+
+    def rank_pairs(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """Relevance scores (higher is better) of (query, text) pairs"""
+        if not pairs:
+            return []
+        return _inference_executor.submit(self._predict, pairs).result()
 
     def rank(self, query: str, texts: list[str]) -> list[float]:
         """
@@ -133,8 +197,18 @@ class UnicampMiniLMMultiClient:
         Returns:
             A list of relevance scores (higher is better) for each text.
         """
-        model = self._get_model()
-        pairs = [[query, text] for text in texts]
-        scores = model.predict(pairs)
+        return self.rank_pairs([(query, text) for text in texts])
+
+
+class CrossEncoderMSMarcoClient(CrossEncoderClient):
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.model_checkpoint = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        self.model_dir = Path("models") / "cross-encoder-ms-marco-minilm"
+
 
-        return scores.tolist()
+class UnicampMiniLMMultiClient(CrossEncoderClient):
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.model_checkpoint = "unicamp-dl/mMiniLM-L6-v2-mmarco-v2"
+        self.model_dir = Path("models") / "unicamp-ms-marco-minilm-multilangual"
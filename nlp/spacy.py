@@ -28,6 +28,24 @@ class SpacyUtils:
 
         return lemmatized
 
+    def lemmatize_tokens(
+        self, texts: list[str], batch_size: int = 256
+    ) -> list[list[str]]:
+        """Lowercased lemmas of the word tokens of every text, punctuation skipped"""
+
+        nlp_spacy = self._get_nlp_spacy()
+        disable_components = ["ner", "parser", "senter", "textcat"]
+        to_disable = [c for c in disable_components if c in nlp_spacy.pipe_names]
+        docs = nlp_spacy.pipe(texts, batch_size=batch_size, disable=to_disable)
+        return [
+            [
+                token.lemma_.lower()
+                for token in doc
+                if not (token.is_punct or token.is_space)
+            ]
+            for doc in docs
+        ]
+
     def count_syllables_pl(self, word: str) -> int:
         word = word.lower()
         pl_vowels = "aeiouyąęó"
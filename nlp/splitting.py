@@ -0,0 +1,194 @@
+import re
+from collections.abc import Sequence
+
+import numpy as np
+
+# strength of a cut before a token, by the whitespace in front of it
+WORD, SENTENCE, LINE, PARAGRAPH = 1, 2, 3, 4
+_BOUNDARIES = (
+    (WORD, re.compile(r"\s+")),
+    (SENTENCE, re.compile(r"(?<=[.!?…:;])\s+")),
+    (LINE, re.compile(r"\s*\n\s*")),
+    (PARAGRAPH, re.compile(r"\s*\n\s*\n\s*")),
+)
+
+
+def boundary_levels(text: str, starts: np.ndarray) -> np.ndarray:
+    """
+    Strength of a cut before every token: paragraph, line, sentence or word
+    boundary, 0 inside a word. Token i starting right after the whitespace of a
+    boundary gets its level.
+    """
+    levels = np.zeros(len(starts) + 1, dtype=np.int8)
+    for level, pattern in _BOUNDARIES:
+        positions = [m.end() for m in pattern.finditer(text)]
+        if positions:
+            tokens = np.searchsorted(starts, positions)
+            np.maximum.at(levels, tokens, level)
+    # a cut after the last token is as good as a paragraph break
+    levels[len(starts)] = PARAGRAPH
+    return levels
+
+
+def split_by_offsets(
+    text: str,
+    offsets: Sequence[tuple[int, int]],
+    max_tokens: int,
+    overlap: int = 50,
+) -> list[str]:
+    """
+    Cut a text into chunks of at most max_tokens tokens using the offset mapping
+    of a single tokenizer call.
+
+    A chunk ends at the strongest boundary (paragraph, line, sentence, word) found
+    in the second half of its token window, and the next chunk starts up to
+    overlap tokens earlier, at the strongest boundary in that range. Only a word
+    longer than a whole window is cut in the middle.
+    """
+    if not offsets:
+        return []
+    starts = np.fromiter((start for start, _ in offsets), dtype=np.int64)
+    ends = np.fromiter((end for _, end in offsets), dtype=np.int64)
+    levels = boundary_levels(text, starts)
+    total = len(starts)
+
+    chunks = []
+    start = 0
+    while start < total:
+        limit = start + max_tokens
+        if limit >= total:
+            cut = total
+        else:
+            window = levels[start + max(max_tokens // 2, 1) : limit + 1]
+            best = window.max()
+            if best:
+                # last position of the strongest boundary in the window
+                cut = limit - int(np.argmax(window[::-1] == best))
+            else:
+                cut = limit
+        chunk = text[starts[start] : ends[cut - 1]].strip()
+        if chunk:
+            chunks.append(chunk)
+        if cut >= total:
+            break
+
+        next_start = cut
+        low = max(cut - overlap, start + 1)
+        if overlap and low < cut:
+            window = levels[low:cut]
+            best = window.max()
+            if best:
+                # first position of the strongest boundary, the longest overlap
+                next_start = low + int(np.argmax(window == best))
+        start = next_start
+    return chunks
+
+
+_SENTENCE_END = re.compile(r"(?<=[.!?…])\s+|\s*\n\s*")
+
+
+def sentence_spans(
+    text: str, starts: np.ndarray, max_tokens: int
+) -> tuple[list[tuple[int, int]], np.ndarray]:
+    """
+    Character spans of the sentences (and lines) of a text with their token
+    counts, taken from the token starts of a single tokenizer call. A sentence
+    longer than max_tokens is cut into pieces of max_tokens tokens.
+    """
+    spans = []
+    position = 0
+    for match in _SENTENCE_END.finditer(text):
+        if match.start() > position:
+            spans.append((position, match.start()))
+        position = match.end()
+    if position < len(text):
+        spans.append((position, len(text)))
+
+    result, counts = [], []
+    for start, end in spans:
+        first, last = np.searchsorted(starts, (start, end))
+        for piece in range(first, max(last, first + 1), max_tokens):
+            piece_end = min(piece + max_tokens, last)
+            result.append(
+                (
+                    start if piece == first else int(starts[piece]),
+                    end if piece_end >= last else int(starts[piece_end]),
+                )
+            )
+            counts.append(max(piece_end - piece, 0))
+    return result, np.asarray(counts, dtype=np.int64)
+
+
+def window_similarities(vectors: np.ndarray, window: int = 5) -> np.ndarray:
+    """
+    Cosine similarity of every sentence vector with the mean of up to window
+    sentence vectors before it, 1.0 for the first sentence.
+    """
+    if len(vectors) == 0:
+        return np.empty(0, dtype=np.float32)
+    vectors = vectors / np.maximum(
+        np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12
+    )
+    cumulative = np.vstack([np.zeros((1, vectors.shape[1])), np.cumsum(vectors, 0)])
+    index = np.arange(1, len(vectors))
+    context = cumulative[index] - cumulative[np.maximum(index - window, 0)]
+    context /= np.maximum(np.linalg.norm(context, axis=1, keepdims=True), 1e-12)
+    similarities = np.ones(len(vectors), dtype=np.float32)
+    similarities[1:] = np.einsum("ij,ij->i", vectors[1:], context)
+    return similarities
+
+
+def semantic_split_points(
+    similarities: np.ndarray,
+    token_counts: np.ndarray,
+    max_tokens: int,
+    min_tokens: int,
+    threshold: float,
+) -> list[int]:
+    """
+    Sentence indices that start a new chunk. A chunk ends before the first
+    sentence whose similarity to its context drops below threshold once the chunk
+    has min_tokens tokens. A chunk that would exceed max_tokens without such a
+    drop ends at its least similar sentence instead.
+    """
+    total = len(token_counts)
+    cumulative = np.cumsum(token_counts)
+    points = []
+    start = 0
+    while start < total:
+        base = cumulative[start - 1] if start else 0
+        # chunk [start, cut) fits for cut <= end and is long enough for cut >= low
+        end = max(
+            int(np.searchsorted(cumulative, base + max_tokens, "right")), start + 1
+        )
+        low = int(np.searchsorted(cumulative, base + min_tokens, "left")) + 1
+        low = min(max(low, start + 1), end)
+
+        drops = np.flatnonzero(similarities[low : min(end, total - 1) + 1] < threshold)
+        if len(drops):
+            cut = low + int(drops[0])
+        elif end >= total:
+            break
+        else:
+            cut = low + int(np.argmin(similarities[low : end + 1]))
+        points.append(cut)
+        start = cut
+    return points
+
+
+def pooled_vectors(
+    vectors: np.ndarray, token_counts: np.ndarray, starts: list[int]
+) -> np.ndarray:
+    """
+    Vectors of chunks starting at sentence indices starts: the mean of their
+    normalized sentence vectors weighted by token counts, normalized again.
+    """
+    if not starts:
+        return np.empty((0, vectors.shape[1] if vectors.ndim == 2 else 0), np.float32)
+    vectors = vectors / np.maximum(
+        np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12
+    )
+    weights = np.maximum(token_counts, 1)[:, None]
+    pooled = np.add.reduceat(vectors * weights, starts, axis=0)
+    pooled /= np.maximum(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12)
+    return pooled.astype(np.float32)
@@ -0,0 +1,230 @@
+from __future__ import annotations
+
+import html
+import logging
+import re
+import sqlite3
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from nlp.base import NLP
+
+logger = logging.getLogger(__name__)
+
+# pages of other namespaces are never articles
+NAMESPACE_PREFIXES = (
+    "Kategoria:",
+    "Wątek:",
+    "Wikipedia:",
+    "Szablon:",
+    "Moduł:",
+    "Portal:",
+    "MediaWiki:",
+    "Pomoc:",
+    "Wikiprojekt:",
+    "Plik:",
+)
+
+_PUNCTUATION = re.compile(r"[\"'„”“«»?!.,;:]+")
+_WHITESPACE = re.compile(r"[\s_]+")
+
+
+def normalize_title(text: str) -> str:
+    """Case and punctuation insensitive form of a title or a query span"""
+    text = _PUNCTUATION.sub(" ", text.casefold())
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+@dataclass(frozen=True)
+class TitleMatch:
+    source_id: str
+    span: str
+    key: str
+    kind: str
+
+
+def build_title_index(
+    pages: Iterable[tuple[str, str, str | None]],
+    db_path: str,
+    nlp_toolkit: NLP | None = None,
+    batch_size: int = 5000,
+) -> int:
+    """
+    Build the title dictionary from (page id, title, redirect target) tuples.
+
+    Every article is stored under its normalized title and, when nlp_toolkit is
+    given, under its normalized lemma (so that inflected names are matched).
+    Redirects are stored under their own title pointing to the target article.
+    Keys are the primary key of a SQLite B-tree, so prefix lookups are range scans.
+    Returns the number of stored keys.
+    """
+    Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{db_path}.tmp"
+    Path(tmp_path).unlink(missing_ok=True)
+
+    connection = sqlite3.connect(tmp_path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute("CREATE TABLE articles (title TEXT PRIMARY KEY, id TEXT)")
+    connection.execute(
+        "CREATE TABLE titles (key TEXT, id TEXT, kind TEXT, "
+        "PRIMARY KEY (key, id)) WITHOUT ROWID"
+    )
+
+    redirects = []
+    articles: list[tuple[str, str]] = []
+
+    def flush_articles() -> None:
+        connection.executemany(
+            "INSERT OR REPLACE INTO articles VALUES (?, ?)", articles
+        )
+        rows = [
+            (normalize_title(title), page_id, "title") for title, page_id in articles
+        ]
+        if nlp_toolkit is not None:
+            lemmas = nlp_toolkit.lemmatize(
+                [title for title, _ in articles], batch_size=batch_size
+            )
+            rows += [
+                (normalize_title(lemma), page_id, "lemma")
+                for lemma, (_, page_id) in zip(lemmas, articles, strict=True)
+            ]
+        connection.executemany("INSERT OR IGNORE INTO titles VALUES (?, ?, ?)", rows)
+        articles.clear()
+
+    for page_id, title, redirect in pages:
+        title = html.unescape(title)
+        if title.startswith(NAMESPACE_PREFIXES):
+            continue
+        if redirect:
+            redirects.append((normalize_title(title), html.unescape(redirect)))
+            continue
+        articles.append((title, page_id))
+        if len(articles) >= batch_size:
+            flush_articles()
+    flush_articles()
+
+    # redirects point to the id of their target article
+    connection.executemany(
+        "INSERT OR IGNORE INTO titles "
+        "SELECT ?, id, 'redirect' FROM articles WHERE title = ?",
+        redirects,
+    )
+    connection.execute("DROP TABLE articles")
+    connection.commit()
+    (total,) = connection.execute("SELECT COUNT(*) FROM titles").fetchone()
+    connection.execute("VACUUM")
+    connection.close()
+
+    Path(tmp_path).replace(db_path)
+    logger.info(f"Title index with {total} keys saved to {db_path}")
+    return total
+
+
+class TitleIndex:
+    """
+    Read-only title and redirect dictionary built by build_title_index.
+    Resolves a query span to an article only when it names exactly one article.
+    """
+
+    def __init__(self, db_path: str):
+        self.connection = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def __enter__(self) -> TitleIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def exact(self, key: str) -> list[tuple[str, str]]:
+        """(page id, kind) of articles stored under a normalized key"""
+        return self.connection.execute(
+            "SELECT id, kind FROM titles WHERE key = ?", (key,)
+        ).fetchall()
+
+    def prefix(self, prefix: str, limit: int = 10) -> list[tuple[str, str]]:
+        """(key, page id) of keys starting with a normalized prefix, in key order"""
+        return self.connection.execute(
+            "SELECT key, id FROM titles WHERE key >= ? AND key < ? ORDER BY key LIMIT ?",
+            (prefix, prefix + "\uffff", limit),
+        ).fetchall()
+
+    def resolve_span(self, span: str, lemma: str | None = None) -> TitleMatch | None:
+        """
+        Article named by a span: exact title or redirect, then its lemma, then a
+        single disambiguated title such as "Span (miasto)". None when ambiguous.
+        """
+        for candidate in dict.fromkeys(filter(None, (span, lemma))):
+            key = normalize_title(candidate)
+            if not key:
+                continue
+            rows = self.exact(key)
+            ids = {page_id for page_id, _ in rows}
+            if len(ids) == 1:
+                return TitleMatch(ids.pop(), candidate, key, rows[0][1])
+            if len(ids) > 1:
+                return None
+
+            disambiguated = {
+                page_id for _, page_id in self.prefix(f"{key} (", limit=10)
+            }
+            if len(disambiguated) == 1:
+                return TitleMatch(disambiguated.pop(), candidate, key, "prefix")
+        return None
+
+    def resolve_query(
+        self,
+        query: str,
+        nlp_toolkit: NLP,
+        min_score: float = 0.9,
+        min_coverage: float = 0.8,
+    ) -> TitleMatch | None:
+        """
+        Article confidently named by a query: the whole query is a title, or it
+        holds exactly one named entity (with NER score at least min_score) that
+        makes up at least min_coverage of the normalized query and resolves to
+        exactly one article. Inflected names are matched through their lemma.
+        Queries asking about something beyond the name fall through to retrieval.
+        """
+        query_key = normalize_title(query)
+        if not query_key:
+            return None
+        rows = self.exact(query_key)
+        if len({page_id for page_id, _ in rows}) == 1:
+            return TitleMatch(rows[0][0], query, query_key, rows[0][1])
+
+        entities = nlp_toolkit.extract_ner_entities([query])[0]
+        spans = list(
+            dict.fromkeys(
+                entity["entity"]
+                for group in (
+                    entities.personalia,
+                    entities.locations,
+                    entities.organizations,
+                )
+                for entity in group
+                if entity["score"] >= min_score
+            )
+        )
+        if len(spans) != 1:
+            return None
+        if len(normalize_title(spans[0])) < min_coverage * len(query_key):
+            return None
+
+        (lemma,) = nlp_toolkit.lemmatize(spans, batch_size=1)
+        return self.resolve_span(spans[0], lemma)
@@ -1,19 +1,30 @@
+from collections.abc import Callable
 from typing import Literal
 
+import numpy as np
+
 from nlp.base import NLP
-from nlp.chunking import LangchainSplitterClient, StatisticalChunkerClient
+from nlp.chunking import (
+    LangchainSplitterClient,
+    OffsetSplitterClient,
+    StatisticalChunkerClient,
+)
 from nlp.entities import NEREntities
 from nlp.keywords import KeyBERTKeywordsClient, VLT5KeywordsClient
 from nlp.ner import (
     HerbertNERClient,
     StanzaNERClient,
 )
-from nlp.ranking import CrossEncoderMSMarcoClient, UnicampMiniLMMultiClient
+from nlp.ranking import (
+    CrossEncoderMSMarcoClient,
+    RankingBackend,
+    UnicampMiniLMMultiClient,
+)
 from nlp.spacy import SpacyUtils
 
 NERModelName = Literal["herbert", "stanza"]
 KeywordsModelName = Literal["vlt5", "keybert"]
-ChunkingModelName = Literal["langchain", "statistical_chunker"]
+ChunkingModelName = Literal["langchain", "offsets", "statistical_chunker"]
 RankingModelName = Literal["ms_marco", "ms_marco_multilangual"]
 
 
@@ -23,11 +34,20 @@ class NLPToolkit(NLP):
 
     Args:
         ner_model_name: The name of the NER model to use ("herbert" or "stanza").
+        sentence_embedder: Embeds sentences for the statistical chunker, e.g. with
+            the embedding server, a local encoder is loaded without it.
+        chunk_vectors_from_sentences: Pool chunk vectors from the sentence
+            embeddings of the statistical chunker instead of embedding chunks.
+        ranking_backend: Cross-encoder runtime: torch, onnx or onnx_int8.
+        ranking_max_length: Token limit of reranked (query, text) pairs.
+        ranking_threads: Intra-op threads of the reranker, 0 for the default.
     """
 
     ner_client: HerbertNERClient | StanzaNERClient
     keywords_client: KeyBERTKeywordsClient | VLT5KeywordsClient
-    chunking_client: LangchainSplitterClient | StatisticalChunkerClient
+    chunking_client: (
+        LangchainSplitterClient | OffsetSplitterClient | StatisticalChunkerClient
+    )
     ranking_client: CrossEncoderMSMarcoClient | UnicampMiniLMMultiClient
 
     def __init__(
@@ -36,7 +56,22 @@ class NLPToolkit(NLP):
         keywords_model_name: KeywordsModelName = "keybert",
         chunking_model_name: ChunkingModelName = "langchain",
         ranking_model_name: RankingModelName = "ms_marco_multilangual",
+        sentence_embedder: Callable[[list[str]], list[list[float]]] | None = None,
+        chunk_vectors_from_sentences: bool = False,
+        ranking_backend: RankingBackend = "torch",
+        ranking_max_length: int = 512,
+        ranking_threads: int = 0,
     ):
+        if (
+            chunk_vectors_from_sentences
+            and chunking_model_name != "statistical_chunker"
+        ):
+            raise ValueError(
+                "Chunk vectors can be pooled from sentences only by the "
+                "statistical_chunker"
+            )
+        self.chunk_vectors_from_sentences = chunk_vectors_from_sentences
+
         if ner_model_name == "herbert":
             self.ner_client = HerbertNERClient()
         elif ner_model_name == "stanza":
@@ -49,13 +84,20 @@ class NLPToolkit(NLP):
 
         if chunking_model_name == "langchain":
             self.chunking_client = LangchainSplitterClient()
+        elif chunking_model_name == "offsets":
+            self.chunking_client = OffsetSplitterClient()
         elif chunking_model_name == "statistical_chunker":
-            self.chunking_client = StatisticalChunkerClient()
+            self.chunking_client = StatisticalChunkerClient(embed=sentence_embedder)
 
+        ranking_options = {
+            "backend": ranking_backend,
+            "max_length": ranking_max_length,
+            "threads": ranking_threads,
+        }
         if ranking_model_name == "ms_marco":
-            self.ranking_client = CrossEncoderMSMarcoClient()
+            self.ranking_client = CrossEncoderMSMarcoClient(**ranking_options)
         elif ranking_model_name == "ms_marco_multilangual":
-            self.ranking_client = UnicampMiniLMMultiClient()
+            self.ranking_client = UnicampMiniLMMultiClient(**ranking_options)
 
         self._spacy_utils = SpacyUtils()
 
@@ -76,6 +118,17 @@ class NLPToolkit(NLP):
 
         raise TypeError("names must be a list of strings")
 
+    def lemmatize_tokens(
+        self, texts: list[str], batch_size: int = 256
+    ) -> list[list[str]]:
+        """
+        Lowercased lemmas of the word tokens of every text using spaCy
+        """
+        if isinstance(texts, list):
+            return self._spacy_utils.lemmatize_tokens(texts, batch_size=batch_size)
+
+        raise TypeError("texts must be a list of strings")
+
     def texts_readability_fog(
         self, texts: list[str], batch_size: int = 100
     ) -> list[float]:
@@ -92,6 +145,19 @@ class NLPToolkit(NLP):
 
         return self.chunking_client.chunk_texts(texts, max_tokens)
 
+    def chunk_texts_with_vectors(
+        self, texts: list[str], max_tokens
+    ) -> tuple[list[list[str]], list[np.ndarray] | None]:
+        """
+        Chunks of the texts and, with chunk_vectors_from_sentences, their vectors
+        pooled from the sentence embeddings computed while chunking
+        """
+        if self.chunk_vectors_from_sentences and isinstance(
+            self.chunking_client, StatisticalChunkerClient
+        ):
+            return self.chunking_client.chunk_texts_with_vectors(texts, max_tokens)
+        return self.chunk_texts(texts, max_tokens), None
+
     def rank(self, query: str, texts: list[str]) -> list[float]:
         """
         Ranks text candidates against a query using a cross-encoder model.
@@ -105,3 +171,10 @@ class NLPToolkit(NLP):
         """
 
         return self.ranking_client.rank(query, texts)
+
+    def rank_pairs(self, pairs: list[tuple[str, str]]) -> list[float]:
+        """
+        Relevance scores of (query, text) pairs of different queries, scored by
+        the cross-encoder in a single batch.
+        """
+        return self.ranking_client.rank_pairs(pairs)
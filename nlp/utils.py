@@ -5,7 +5,8 @@ import logging
 import os
 import re
 import time
-from typing import TYPE_CHECKING
+from datetime import UTC, datetime
+from typing import TYPE_CHECKING, NamedTuple
 
 import mwparserfromhell
 from tqdm import tqdm
@@ -13,14 +14,23 @@ from tqdm import tqdm
 if TYPE_CHECKING:
     from mwparserfromhell.wikicode import Wikicode
 
+    from backend.db.local.keyword_index import KeywordIndex
     from backend.db.mongodb.connection import MongoManager
     from backend.db.weaviate.connection import WeaviateManager
+    from nlp.near_duplicates import NearDuplicateIndex
+    from parser.wiki.export import ChunkParquetSink
 
+from nlp.near_duplicates import apply_duplicate_policy
 from nlp.toolkit import NLPToolkit
 
 logger = logging.getLogger(__name__)
 
 
+class ParsedBatch(NamedTuple):
+    plain_articles: list[dict]
+    done_ids: list[str]
+
+
 def fetch_wiki_categories(wikicode: Wikicode) -> list:
     categories = [
         link.title.strip_code().strip().replace("Kategoria:", "")
@@ -70,13 +80,19 @@ def normalize_key(key: str) -> str:
     return key
 
 
-def fetch_wiki_clean_sections(text: str) -> dict:
+def page_wikitext(wiki_page: dict) -> str:
+    """
+    Wikitext of a scraped page, stored either directly (slim storage) or inside
+    the <text> tag of the whole page XML (full storage)
+    """
+    if "text" in wiki_page:
+        return wiki_page["text"]
+    match = re.search(r"<text[^>]*>(.*?)</text>", wiki_page["content"], re.DOTALL)
+    return html.unescape(match.group(1)) if match else ""
+
+
+def fetch_wiki_clean_sections(wikitext: str) -> dict:
 
-    match = re.search(r"<text[^>]*>(.*?)</text>", text, re.DOTALL)
-    if match:
-        wikitext = html.unescape(match.group(1))
-    else:
-        wikitext = ""
     wikicode = mwparserfromhell.parse(wikitext)
     templates = wikicode.filter_templates()
 
@@ -147,8 +163,17 @@ def process_batch(
     mongodb_client: MongoManager,
     weaviate_client: WeaviateManager,
     nlp_toolkit: NLPToolkit,
-) -> None:
-    """Main WIKI Parser iteration function"""
+    keyword_index: KeywordIndex | None = None,
+    chunk_sink: ChunkParquetSink | None = None,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> ParsedBatch:
+    """
+    Main WIKI Parser iteration function. Returns plain articles to be saved in
+    MongoDB and ids of pages that are done, pages whose objects could not be
+    imported into Weaviate are left out of both. Chunks of done articles are added
+    to keyword_index and written to chunk_sink when they are given. With
+    near_duplicates, near-duplicate chunks are handled by its policy.
+    """
 
     time0 = time.perf_counter()
     logger.info(f"Worker's PID: {os.getpid()}")
@@ -181,12 +206,13 @@ def process_batch(
         else:
             source_id = wiki_page["_id"]
             source_title = wiki_page["title"]
-            wikicode = mwparserfromhell.parse(wiki_page["content"])
+            wikitext = page_wikitext(wiki_page)
+            wikicode = mwparserfromhell.parse(wikitext)
             if len(wikicode) < 100:
                 continue
             wiki_categories = fetch_wiki_categories(wikicode)
             wiki_infobox_data = fetch_wiki_infobox_data(wikicode)
-            wiki_sections = fetch_wiki_clean_sections(wiki_page["content"])
+            wiki_sections = fetch_wiki_clean_sections(wikitext)
             cleaned_text = "\n ".join(
                 [item for k, v in wiki_sections.items() for item in (k, v)]
             )
@@ -230,7 +256,16 @@ def process_batch(
     prefixes = [text.split("|||", 1)[0] for text in long_texts_to_process]
     postfixes = [text.split("|||", 1)[1] for text in long_texts_to_process]
 
-    chunked_texts = nlp_toolkit.chunk_texts(postfixes, max_tokens=480)
+    chunked_texts, chunked_vectors = nlp_toolkit.chunk_texts_with_vectors(
+        postfixes, max_tokens=480
+    )
+    # chunk vectors pooled from sentence embeddings, by (source_id, positional_id)
+    pooled_vectors = (
+        dict(zip(long_metadata, chunked_vectors, strict=True))
+        if chunked_vectors is not None
+        else {}
+    )
+    del chunked_vectors
 
     title_chunk = [
         [f"{p}|||{text}" for text in chunks]
@@ -265,42 +300,155 @@ def process_batch(
                 parts = sub_list[i].split("|||")
                 sub_list[i] = ": ".join(parts)
 
-    # gather all chunks
-    for key, body in common_structure_batch.items():
+    # gather all chunks, article metadata is stored once in WikiArticle and only
+    # the title is repeated on chunks for keyword search
+    chunk_counts = {}
+    chunk_vectors: dict[tuple[str, int], list[float]] = {}
+    for key in common_structure_batch:
         pieces = merged_all[key]
         cnt = 0
-        for _, val in sorted(pieces.items()):
-            for text in val:
-                chunk_struct = body.copy()
-                chunk_struct.update({"chunk_id": cnt, "chunk_text": text})
-                weaviate_batch.append(chunk_struct)
+        for positional_id, val in sorted(pieces.items()):
+            vectors = pooled_vectors.get((key, positional_id))
+            for i, text in enumerate(val):
+                weaviate_batch.append(
+                    {
+                        "source_id": key,
+                        "source_title": common_structure_batch[key]["source_title"],
+                        "chunk_id": cnt,
+                        "chunk_text": text,
+                    }
+                )
+                if vectors is not None:
+                    chunk_vectors[(key, cnt)] = vectors[i].tolist()
                 cnt += 1
+        chunk_counts[key] = cnt
+    del pooled_vectors
 
-    del common_structure_batch
+    for doc in mongodb_batch:
+        doc["chunk_count"] = chunk_counts[doc["_id"]]
 
     time2 = time.perf_counter()
 
-    weaviate_client.bulk_upsert(weaviate_batch)
+    # chunk counts from the previous parser run, before they get overwritten
+    previous_counts = mongodb_client.fetch_chunk_counts(
+        "wiki_plain_articles", list(chunk_counts.keys())
+    )
+
+    linked_chunks: list[dict] = []
+    dropped_keys: list[tuple[str, int]] = []
+    if near_duplicates is not None:
+        all_keys = [(item["source_id"], item["chunk_id"]) for item in weaviate_batch]
+        weaviate_batch, linked_chunks = apply_duplicate_policy(
+            weaviate_batch,
+            near_duplicates.assign(weaviate_batch),
+            near_duplicates.policy,
+        )
+        kept_keys = {
+            (item["source_id"], item["chunk_id"])
+            for item in weaviate_batch + linked_chunks
+        }
+        dropped_keys = [key for key in all_keys if key not in kept_keys]
+
+    failed_articles = weaviate_client.upsert_wiki_articles(
+        list(common_structure_batch.values())
+    )
+    failed_chunks = weaviate_client.bulk_upsert(
+        weaviate_batch, common_structure_batch, vectors=chunk_vectors
+    )
+    del chunk_vectors
+    failed_chunks += weaviate_client.import_linked_chunks(linked_chunks)
     logger.info(
         f"Batch of size {len(weaviate_batch)} has been upserted into Weaviate database"
     )
+
+    # articles are marked as processed only if all of their objects have landed
+    failed_ids = set(failed_articles) | {item["source_id"] for item in failed_chunks}
+
+    done_chunks = [
+        chunk
+        for chunk in weaviate_batch + linked_chunks
+        if chunk["source_id"] not in failed_ids
+    ]
     del weaviate_batch
+    if keyword_index is not None:
+        keyword_index.add_chunks(
+            done_chunks,
+            nlp_toolkit.lemmatize_tokens(
+                [chunk["chunk_text"] for chunk in done_chunks]
+            ),
+        )
+        logger.info(f"{len(done_chunks)} chunks added to the keyword index")
+    if chunk_sink is not None:
+        chunk_sink.write(done_chunks, common_structure_batch)
+    del done_chunks
+
+    if failed_ids:
+        dead_letters = [
+            {
+                "_id": weaviate_client.wiki_article_uuid(source_id),
+                "collection": "WikiArticle",
+                **common_structure_batch[source_id],
+                "failed_at": datetime.now(UTC),
+            }
+            for source_id in failed_articles
+        ] + [
+            {
+                "_id": weaviate_client.wiki_chunk_uuid(
+                    item["source_id"], item["chunk_id"]
+                ),
+                "collection": "WikiChunk",
+                **item,
+                "failed_at": datetime.now(UTC),
+            }
+            for item in failed_chunks
+        ]
+        mongodb_client.bulk_upsert("weaviate_dead_letter", dead_letters)
+        logger.error(
+            f"{len(failed_ids)} articles left unprocessed, {len(dead_letters)} "
+            f"objects written to weaviate_dead_letter"
+        )
+        mongodb_batch = [doc for doc in mongodb_batch if doc["_id"] not in failed_ids]
+    del common_structure_batch
+
+    # article re-chunked into fewer pieces leaves its trailing chunks behind
+    stale_keys = [
+        (source_id, chunk_id)
+        for source_id, count in chunk_counts.items()
+        if source_id not in failed_ids
+        for chunk_id in range(count, previous_counts.get(source_id, count))
+    ]
+    if near_duplicates is not None:
+        # canonical chunks of linked or dropped near-duplicates stay
+        kept = set(near_duplicates.remove(stale_keys))
+        stale_keys = [key for key in stale_keys if key not in kept]
+    stale_uuids = [
+        weaviate_client.wiki_chunk_uuid(source_id, chunk_id)
+        for source_id, chunk_id in stale_keys
+    ] + [
+        # dropped near-duplicates may have been imported by an earlier run
+        weaviate_client.wiki_chunk_uuid(source_id, chunk_id)
+        for source_id, chunk_id in dropped_keys
+        if source_id not in failed_ids
+    ]
+    if stale_uuids:
+        deleted = weaviate_client.delete_wiki_chunks(stale_uuids)
+        logger.info(f"Deleted {deleted} stale chunks from Weaviate database")
     time3 = time.perf_counter()
 
-    mongodb_client.bulk_upsert("wiki_plain_articles", mongodb_batch)
-    processed_ids = [doc["_id"] for doc in mongodb_batch]
-    mongodb_client.mark_processed("wikipedia", processed_ids)
     logger.info(
-        f"Batch of size {len(mongodb_batch)} has been upserted into MongoDB database"
+        f"""Time of\nbatch processing: {time1 - time0:.2f}\nchunking: {time2 - time1:.2f}\nWeaviate save (embedding included): {time3 - time2:.2f}"""
     )
-    del mongodb_batch
-    time4 = time.perf_counter()
-
     logger.info(
-        f"""Time of\nbatch processing: {time1 - time0:.2f}\nchunking: {time2 - time1:.2f}\nMongoDB save: {time4 - time3:.2f}\nWeaviate save (embedding included): {time3 - time2:.2f}"""
+        f"Weaviate control-plane calls: {weaviate_client.control_plane_stats()}"
     )
     logger.info("\n\n")
 
+    # skipped pages (other namespaces, too short) are done as well
+    return ParsedBatch(
+        plain_articles=mongodb_batch,
+        done_ids=[page["_id"] for page in batch if page["_id"] not in failed_ids],
+    )
+
 
 def get_progess_bar(n: int, total_n: int, time_start: float, unit: str = "it") -> str:
     progress_string = tqdm.format_meter(
@@ -1,21 +1,152 @@
 # parser/wiki/__main__.py
+import argparse
 import logging
 import math
 import sys
 import time
+from contextlib import nullcontext
+from functools import partial
 
+from backend.db.local.embedding_cache import EmbeddingCache
+from backend.db.local.keyword_index import KeywordIndex
+from backend.db.local.vector_store import ChunkVectorStore
 from backend.db.mongodb.connection import MongoManager
-from backend.db.weaviate.connection import WeaviateManager
-from config import MongoDBSettings, WeaviateSettings
+from backend.db.weaviate.connection import BatchImportSpec, WeaviateManager
+from backend.db.weaviate.schema import VectorIndexSpec
+from config import (
+    MongoDBSettings,
+    RetrievalSettings,
+    ScraperSettings,
+    WeaviateSettings,
+)
 from logger_config import setup_logging
+from nlp.near_duplicates import NearDuplicateIndex
+from nlp.title_index import build_title_index
 from nlp.toolkit import NLPToolkit
 from nlp.utils import process_batch
+from parser.wiki.export import ChunkParquetSink, load_chunks
+from parser.wiki.persist import BatchPersister
+from parser.wiki.reconcile import purge_orphan_chunks
+from parser.wiki.reload import reload_local_store, reload_weaviate
+from parser.wiki.stream import iter_dump_titles, reparse_pages, run_stream
+from parser.wiki.worker import run_worker
 
 setup_logging("parser")
 logger = logging.getLogger(__name__)
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m parser.wiki")
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="parse",
+        choices=[
+            "parse",
+            "worker",
+            "stream",
+            "reparse",
+            "build-titles",
+            "reconcile",
+            "migrate-schema",
+            "reload-vectors",
+            "load-chunks",
+        ],
+        help="parse: process unprocessed wiki pages (default); "
+        "worker: claim batches with a lease, many workers can run at once; "
+        "stream: parse pages directly from dump files, skipping scraper_db.wikipedia; "
+        "reparse: parse selected pages read from the dump through the page index; "
+        "build-titles: build the title/redirect dictionary used by the backend; "
+        "reconcile: purge orphan chunks across the whole WikiChunk collection; "
+        "migrate-schema: rebuild Weaviate collections to match declared schemas; "
+        "reload-vectors: import vectors saved with --save-vectors, no embedding, "
+        "WikiArticle and near-duplicates linked without a vector are not restored; "
+        "load-chunks: embed and import chunks exported with --export-chunks",
+    )
+    parser.add_argument(
+        "--lease-seconds",
+        type=float,
+        default=600,
+        help="worker: lease of a claimed batch, renewed while it is processed",
+    )
+    parser.add_argument("--worker-id", help="worker: defaults to hostname-pid")
+    parser.add_argument(
+        "--dump-dir",
+        default=ScraperSettings().WIKI_DOWNLOAD_PATH,
+        help="stream: directory with multistream dump and index files",
+    )
+    parser.add_argument("--ids", nargs="+", default=[], help="reparse: page ids")
+    parser.add_argument(
+        "--titles", nargs="+", default=[], help="reparse: exact page titles"
+    )
+    parser.add_argument(
+        "--output",
+        default=RetrievalSettings().TITLE_INDEX_PATH,
+        help="build-titles: path of the title index",
+    )
+    parser.add_argument(
+        "--titles-from",
+        choices=["mongodb", "dump"],
+        default="mongodb",
+        help="build-titles: read titles and redirects from scraper_db.wikipedia, "
+        "or from the dump files in --dump-dir (stream mode)",
+    )
+    parser.add_argument(
+        "--keyword-index",
+        action="store_true",
+        help="parse, worker, stream, reparse: add parsed chunks to the lemmatized "
+        "keyword index as well",
+    )
+    parser.add_argument(
+        "--save-vectors",
+        action="store_true",
+        help="parse, worker, stream, reparse: keep computed chunk vectors in the "
+        "vector store for later reload-vectors (one process at a time)",
+    )
+    parser.add_argument(
+        "--export-chunks",
+        action="store_true",
+        help="parse, worker, stream, reparse: write parsed chunks to Parquet",
+    )
+    parser.add_argument(
+        "--run",
+        help="--export-chunks: name of the export partition, defaults to a "
+        "timestamp; load-chunks: load only this partition",
+    )
+    parser.add_argument(
+        "--target",
+        choices=["weaviate", "local"],
+        default="weaviate",
+        help="reload-vectors: WikiChunk collection or the local retrieval store",
+    )
+    parser.add_argument(
+        "--chunker",
+        choices=["langchain", "offsets", "statistical_chunker"],
+        default="langchain",
+        help="parse, worker, stream, reparse: splitter of long sections, offsets "
+        "tokenizes every section once (see benchmarks/chunking.py), "
+        "statistical_chunker cuts where sentence embeddings change topic",
+    )
+    parser.add_argument(
+        "--sentence-chunk-vectors",
+        action="store_true",
+        help="--chunker statistical_chunker: pool chunk vectors from the sentence "
+        "embeddings instead of embedding long-section chunks again "
+        "(see benchmarks/chunk_vectors.py for the quality cost)",
+    )
+    parser.add_argument(
+        "--restart",
+        action="store_true",
+        help="stream: ignore the saved position and start from the first block",
+    )
+    args = parser.parse_args()
+    if args.sentence_chunk_vectors and args.chunker != "statistical_chunker":
+        parser.error("--sentence-chunk-vectors requires --chunker statistical_chunker")
+    return args
+
+
 def main():
+    args = parse_args()
     mongodb_settings = MongoDBSettings()
     weaviate_settings = WeaviateSettings()
     mongo_uri = mongodb_settings.mongodb_local_uri
@@ -23,6 +154,14 @@ def main():
 
     logger.info("Hello!")
     batch_size = 512
+    retrieval_settings = RetrievalSettings()
+
+    if args.command == "reload-vectors" and args.target == "local":
+        reload_local_store(
+            ChunkVectorStore(retrieval_settings.VECTOR_STORE_PATH),
+            retrieval_settings.LOCAL_STORE_PATH,
+        )
+        return
 
     mongodb_client = MongoManager(mongo_uri, "scraper_db")
     if not mongodb_client.is_healthy():
@@ -32,37 +171,200 @@ def main():
         api_key=weaviate_api_key,
         host="127.0.0.1",
         native_embedding_url="http://127.0.0.1:8008/embed",
+        vector_index=VectorIndexSpec.from_settings(weaviate_settings),
+        batch_import=BatchImportSpec.from_settings(weaviate_settings),
+        vector_store=(
+            ChunkVectorStore(retrieval_settings.VECTOR_STORE_PATH)
+            if args.save_vectors
+            else None
+        ),
+        embedding_cache=(
+            EmbeddingCache(weaviate_settings.EMBEDDING_CACHE_PATH)
+            if weaviate_settings.EMBEDDING_CACHE_PATH
+            else None
+        ),
     )
     if not weaviate_client.is_healthy():
         sys.exit(1)
 
-    nlp_toolkit = NLPToolkit()
+    if args.command != "migrate-schema":
+        weaviate_client.ensure_schema(auto_migrate=True)
+
+    if args.command == "migrate-schema":
+        with mongodb_client, weaviate_client:
+            weaviate_client.migrate_schema()
+        return
+
+    if args.command == "reload-vectors":
+        with mongodb_client, weaviate_client:
+            reload_weaviate(
+                ChunkVectorStore(retrieval_settings.VECTOR_STORE_PATH), weaviate_client
+            )
+        return
+
+    if args.command == "load-chunks":
+        with mongodb_client, weaviate_client:
+            load_chunks(retrieval_settings.CHUNK_EXPORT_PATH, weaviate_client, args.run)
+        return
+
+    near_duplicates = (
+        NearDuplicateIndex(
+            retrieval_settings.NEAR_DUPLICATE_INDEX_PATH,
+            policy=retrieval_settings.NEAR_DUPLICATE_POLICY,
+            threshold=retrieval_settings.NEAR_DUPLICATE_THRESHOLD,
+        )
+        if retrieval_settings.NEAR_DUPLICATE_POLICY != "off"
+        else None
+    )
+
+    if args.command == "reconcile":
+        with mongodb_client, weaviate_client, near_duplicates or nullcontext():
+            purge_orphan_chunks(
+                mongodb_client, weaviate_client, near_duplicates=near_duplicates
+            )
+        return
+
+    nlp_toolkit = NLPToolkit(
+        chunking_model_name=args.chunker,
+        # sentences of the statistical chunker are embedded by the embedding server
+        sentence_embedder=weaviate_client.embed_texts,
+        chunk_vectors_from_sentences=args.sentence_chunk_vectors,
+    )
+    keyword_index = (
+        KeywordIndex(retrieval_settings.KEYWORD_INDEX_PATH)
+        if args.keyword_index
+        else None
+    )
+    chunk_sink = (
+        ChunkParquetSink(retrieval_settings.CHUNK_EXPORT_PATH, run=args.run)
+        if args.export_chunks
+        else None
+    )
+
+    if args.command == "worker":
+        with (
+            mongodb_client,
+            weaviate_client,
+            keyword_index or nullcontext(),
+            chunk_sink or nullcontext(),
+            near_duplicates or nullcontext(),
+        ):
+            run_worker(
+                mongodb_client,
+                weaviate_client,
+                nlp_toolkit,
+                batch_size=batch_size,
+                lease_seconds=args.lease_seconds,
+                worker_id=args.worker_id,
+                keyword_index=keyword_index,
+                chunk_sink=chunk_sink,
+                near_duplicates=near_duplicates,
+            )
+        return
+
+    if args.command == "build-titles":
+        with (
+            mongodb_client,
+            weaviate_client,
+            keyword_index or nullcontext(),
+            chunk_sink or nullcontext(),
+            near_duplicates or nullcontext(),
+        ):
+            pages = (
+                iter_dump_titles(args.dump_dir)
+                if args.titles_from == "dump"
+                else mongodb_client.iter_page_titles("wikipedia")
+            )
+            build_title_index(pages, args.output, nlp_toolkit)
+        return
+
+    if args.command == "reparse":
+        with (
+            mongodb_client,
+            weaviate_client,
+            keyword_index or nullcontext(),
+            chunk_sink or nullcontext(),
+            near_duplicates or nullcontext(),
+        ):
+            reparse_pages(
+                mongodb_client,
+                weaviate_client,
+                nlp_toolkit,
+                dump_dir=args.dump_dir,
+                page_ids=args.ids,
+                titles=args.titles,
+                keyword_index=keyword_index,
+                chunk_sink=chunk_sink,
+                near_duplicates=near_duplicates,
+            )
+        return
 
-    with mongodb_client, weaviate_client:
-        total_docs = mongodb_client.get_document_count("wikipedia")
-        docs_already_loaded = mongodb_client.get_document_count("wiki_plain_articles")
+    if args.command == "stream":
+        with (
+            mongodb_client,
+            weaviate_client,
+            keyword_index or nullcontext(),
+            chunk_sink or nullcontext(),
+            near_duplicates or nullcontext(),
+        ):
+            run_stream(
+                mongodb_client,
+                weaviate_client,
+                nlp_toolkit,
+                dump_dir=args.dump_dir,
+                batch_size=batch_size,
+                restart=args.restart,
+                keyword_index=keyword_index,
+                chunk_sink=chunk_sink,
+                near_duplicates=near_duplicates,
+            )
+        return
+
+    with (
+        mongodb_client,
+        weaviate_client,
+        keyword_index or nullcontext(),
+        chunk_sink or nullcontext(),
+        near_duplicates or nullcontext(),
+    ):
+        mongodb_client.ensure_work_queue("wikipedia")
         expected_total_batches = math.ceil(
-            (total_docs - docs_already_loaded) / batch_size
+            mongodb_client.count_pending("wikipedia") / batch_size
         )
 
         generator = mongodb_client.fetch_unprocessed_batches(
             "wikipedia",
-            projection={"_id": 1, "title": 1, "content": 1},
+            projection={"_id": 1, "title": 1, "content": 1, "text": 1},
             batch_size=batch_size,
         )
 
         time_start = time.time()
 
-        for batch_idx, batch in enumerate(generator):
-            process_batch(
-                batch,
-                batch_idx,
-                expected_total_batches,
-                time_start,
-                mongodb_client,
-                weaviate_client,
-                nlp_toolkit,
-            )
+        with BatchPersister(mongodb_client) as persister:
+            for batch_idx, batch in enumerate(generator):
+                parsed = process_batch(
+                    batch,
+                    batch_idx,
+                    expected_total_batches,
+                    time_start,
+                    mongodb_client,
+                    weaviate_client,
+                    nlp_toolkit,
+                    keyword_index,
+                    chunk_sink,
+                    near_duplicates,
+                )
+                persister.submit(
+                    parsed,
+                    partial(
+                        mongodb_client.complete_batch,
+                        "wikipedia",
+                        last_id=batch[-1]["_id"],
+                    ),
+                )
+            # a save still in flight would write its last_id after the clear
+            persister.wait()
+            mongodb_client.save_checkpoint("wikipedia", None)
 
 
 if __name__ == "__main__":
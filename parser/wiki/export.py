@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+import uuid
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from backend.db.weaviate.connection import WeaviateManager
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SCHEMA = pa.schema(
+    [
+        ("source_id", pa.string()),
+        ("chunk_id", pa.int32()),
+        ("chunk_text", pa.string()),
+        ("source_title", pa.string()),
+        ("wiki_categories", pa.list_(pa.string())),
+        # remaining article metadata (infobox fields), differs from article to article
+        ("infobox", pa.string()),
+    ]
+)
+ARTICLE_FIELDS = ("source_id", "source_title", "wiki_categories")
+
+
+class ChunkParquetSink:
+    """
+    Write parsed chunks with their article metadata to zstd-compressed Parquet.
+
+    Every parser run gets its own partition directory run=<name>, so chunks made
+    by different chunking settings sit side by side. A file is closed and a new
+    one started every rows_per_file rows, row groups hold row_group_size rows, so
+    readers can stream them one at a time.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        run: str | None = None,
+        rows_per_file: int = 1_000_000,
+        row_group_size: int = 50_000,
+    ):
+        self.run = run or time.strftime("%Y%m%dT%H%M%S")
+        self.path = Path(directory, f"run={self.run}")
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.rows_per_file = rows_per_file
+        self.row_group_size = row_group_size
+        self._writer: pq.ParquetWriter | None = None
+        self._file_rows = 0
+        # parallel workers write into the same partition, file names must not clash
+        self._prefix = uuid.uuid4().hex[:8]
+        self._files = 0
+        self._pending: list[dict[str, Any]] = []
+
+    def __enter__(self) -> ChunkParquetSink:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def write(
+        self, chunks: list[dict[str, Any]], articles: dict[str, dict[str, Any]]
+    ) -> None:
+        """Buffer chunks (joined with their article metadata) up to a row group"""
+        for chunk in chunks:
+            article = articles.get(chunk["source_id"], {})
+            self._pending.append(
+                {
+                    "source_id": chunk["source_id"],
+                    "chunk_id": chunk["chunk_id"],
+                    "chunk_text": chunk["chunk_text"],
+                    "source_title": article.get("source_title", ""),
+                    "wiki_categories": article.get("wiki_categories") or [],
+                    "infobox": json.dumps(
+                        {
+                            key: value
+                            for key, value in article.items()
+                            if key not in ARTICLE_FIELDS
+                        },
+                        ensure_ascii=False,
+                        default=str,
+                    ),
+                }
+            )
+        while len(self._pending) >= self.row_group_size:
+            self._flush(self.row_group_size)
+
+    def _flush(self, size: int) -> None:
+        rows, self._pending = self._pending[:size], self._pending[size:]
+        if self._writer is None:
+            file_path = self.path / f"part-{self._prefix}-{self._files:05d}.parquet"
+            self._writer = pq.ParquetWriter(file_path, CHUNK_SCHEMA, compression="zstd")
+            self._files += 1
+        self._writer.write_table(
+            pa.Table.from_pylist(rows, schema=CHUNK_SCHEMA),
+            row_group_size=self.row_group_size,
+        )
+        self._file_rows += len(rows)
+        if self._file_rows >= self.rows_per_file:
+            self._close_file()
+
+    def _close_file(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            self._file_rows = 0
+
+    def close(self) -> None:
+        if self._pending:
+            self._flush(len(self._pending))
+        self._close_file()
+
+
+def iter_chunk_batches(
+    directory: str, run: str | None = None, batch_size: int = 5000
+) -> Iterator[tuple[list[dict[str, Any]], dict[str, dict[str, Any]]]]:
+    """
+    Stream (chunks, articles by source_id) batches from exported Parquet files,
+    one row group at a time, in the shape process_batch passes to bulk_upsert.
+    """
+    pattern = f"run={run}/*.parquet" if run else "run=*/*.parquet"
+    for file_path in sorted(Path(directory).glob(pattern)):
+        parquet_file = pq.ParquetFile(file_path)
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size):
+            chunks = []
+            articles: dict[str, dict[str, Any]] = {}
+            for row in record_batch.to_pylist():
+                chunks.append(
+                    {
+                        "source_id": row["source_id"],
+                        "source_title": row["source_title"],
+                        "chunk_id": row["chunk_id"],
+                        "chunk_text": row["chunk_text"],
+                    }
+                )
+                if row["source_id"] not in articles:
+                    articles[row["source_id"]] = {
+                        "source_id": row["source_id"],
+                        "source_title": row["source_title"],
+                        "wiki_categories": row["wiki_categories"],
+                        **json.loads(row["infobox"] or "{}"),
+                    }
+            yield chunks, articles
+
+
+def load_chunks(
+    directory: str, weaviate_client: WeaviateManager, run: str | None = None
+) -> int:
+    """
+    Embed and import exported chunks into Weaviate without parsing wikitext,
+    their article metadata goes to WikiArticle like in process_batch.
+    Returns the number of articles and chunks that could not be imported.
+    """
+    failed = 0
+    total = 0
+    for chunks, articles in iter_chunk_batches(directory, run):
+        # an article split across row groups is upserted again, which is idempotent
+        failed += len(weaviate_client.upsert_wiki_articles(list(articles.values())))
+        failed += len(weaviate_client.bulk_upsert(chunks, articles))
+        total += len(chunks)
+        logger.info(f"{total} exported chunks loaded, {failed} failed")
+    return failed
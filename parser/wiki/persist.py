@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from backend.db.mongodb.connection import MongoManager
+    from nlp.utils import ParsedBatch
+
+logger = logging.getLogger(__name__)
+
+
+class BatchPersister:
+    """
+    Save parsed batches to MongoDB in a background thread while the next batch is
+    being parsed. At most one batch is in flight, submitting the next one waits for
+    the previous one and re-raises its error.
+
+    Plain articles are written first and the pages are marked as done only after
+    that, so a crash in between leaves them pending and they are parsed again.
+    Both writes are idempotent upserts, so nothing needs a transaction.
+    """
+
+    def __init__(
+        self, mongodb_client: MongoManager, collection_name: str = "wiki_plain_articles"
+    ):
+        self.mongodb_client = mongodb_client
+        self.collection_name = collection_name
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._in_flight: Future[None] | None = None
+
+    def __enter__(self) -> BatchPersister:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        try:
+            self.wait()
+        finally:
+            self._executor.shutdown()
+
+    def submit(self, parsed: ParsedBatch, complete: Callable[[list[Any]], Any]) -> None:
+        """Persist plain articles, then call complete with ids of done pages"""
+        self.wait()
+        self._in_flight = self._executor.submit(self._persist, parsed, complete)
+
+    def wait(self) -> None:
+        if self._in_flight is not None:
+            in_flight, self._in_flight = self._in_flight, None
+            in_flight.result()
+
+    def _persist(
+        self, parsed: ParsedBatch, complete: Callable[[list[Any]], Any]
+    ) -> None:
+        start = time.perf_counter()
+        self.mongodb_client.bulk_upsert(self.collection_name, parsed.plain_articles)
+        complete(parsed.done_ids)
+        logger.info(
+            f"Batch of size {len(parsed.plain_articles)} has been upserted into "
+            f"MongoDB database, {len(parsed.done_ids)} pages marked as done in "
+            f"{time.perf_counter() - start:.2f}s"
+        )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backend.db.mongodb.connection import MongoManager
+    from backend.db.weaviate.connection import WeaviateManager
+    from nlp.near_duplicates import NearDuplicateIndex
+
+logger = logging.getLogger(__name__)
+
+
+def purge_orphan_chunks(
+    mongodb_client: MongoManager,
+    weaviate_client: WeaviateManager,
+    page_size: int = 5000,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> int:
+    """
+    Scan the whole WikiChunk collection and delete chunks whose chunk_id is not lower
+    than the chunk_count stored in wiki_plain_articles. Articles without stored
+    chunk_count are left untouched. Deleted chunks are removed from the
+    near-duplicate index, canonical chunks it keeps for their duplicates stay.
+    """
+    logger.info("Start searching for orphan chunks in WikiChunk collection")
+    scanned = 0
+    deleted = 0
+    page: list[tuple[str, str, int]] = []
+
+    def purge_page() -> int:
+        counts = mongodb_client.fetch_chunk_counts(
+            "wiki_plain_articles", list({source_id for _, source_id, _ in page})
+        )
+        orphans = [
+            (object_uuid, (source_id, chunk_id))
+            for object_uuid, source_id, chunk_id in page
+            if source_id in counts and chunk_id >= counts[source_id]
+        ]
+        kept = (
+            set(near_duplicates.remove([key for _, key in orphans]))
+            if near_duplicates is not None
+            else set()
+        )
+        return weaviate_client.delete_wiki_chunks(
+            [object_uuid for object_uuid, key in orphans if key not in kept]
+        )
+
+    for key in weaviate_client.iter_wiki_chunk_keys():
+        page.append(key)
+        if len(page) >= page_size:
+            deleted += purge_page()
+            scanned += len(page)
+            page = []
+            logger.info(f"Scanned {scanned} chunks, deleted {deleted} orphans")
+
+    if page:
+        deleted += purge_page()
+        scanned += len(page)
+
+    logger.info(f"Finished. Scanned {scanned} chunks, deleted {deleted} orphans")
+    return deleted
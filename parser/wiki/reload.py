@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import logging
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+from backend.db.local.connection import write_local_store
+from backend.db.weaviate.connection import BatchItem
+
+if TYPE_CHECKING:
+    from backend.db.local.vector_store import ChunkVectorStore
+    from backend.db.weaviate.connection import WeaviateManager
+
+logger = logging.getLogger(__name__)
+
+CHUNK_PROPERTIES = ("source_id", "source_title", "chunk_id", "chunk_text")
+
+
+def reload_weaviate(
+    vector_store: ChunkVectorStore, weaviate_client: WeaviateManager
+) -> int:
+    """
+    Import the latest stored vectors into WikiChunk, nothing is embedded.
+    Objects keep their deterministic uuids, so existing chunks are overwritten.
+    Only chunks with a vector are in the store: WikiArticle is not touched and
+    near-duplicates imported without a vector (link policy) are not restored.
+    Returns the number of objects that could not be imported.
+    """
+    collection = weaviate_client.collection(weaviate_client.wiki_chunk_schema)
+    failed = 0
+    for records, vectors in vector_store.iter_latest():
+        objects = (
+            BatchItem(
+                uuid=weaviate_client.wiki_chunk_uuid(
+                    record["source_id"], record["chunk_id"]
+                ),
+                properties={
+                    key: record[key]
+                    for key in (*CHUNK_PROPERTIES, "duplicate_of")
+                    if key in record
+                },
+                vector=vector.tolist(),
+            )
+            for record, vector in zip(records, vectors, strict=True)
+        )
+        failed += len(weaviate_client.import_objects(collection, objects))
+    return failed
+
+
+def reload_local_store(vector_store: ChunkVectorStore, directory: str) -> int:
+    """
+    Write the latest stored vectors as a local retrieval store, nothing is
+    embedded. Returns the number of chunks.
+    """
+    records, rows = vector_store.latest()
+    vectors = np.asarray(vector_store.vectors()[rows])
+    articles = {
+        record["source_id"]: {
+            "source_id": record["source_id"],
+            "source_title": record["source_title"],
+        }
+        for record in records
+    }
+    write_local_store(
+        directory,
+        ({key: record[key] for key in CHUNK_PROPERTIES} for record in records),
+        vectors,
+        articles.values(),
+    )
+    logger.info(f"Local store with {len(records)} chunks written to {directory}")
+    return len(records)
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import logging
+import math
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from nlp.utils import process_batch
+from parser.wiki.persist import BatchPersister
+from scrapers.wiki.page_index import PAGE_INDEX_FILENAME, PageIndex, build_page_index
+from scrapers.wiki.utils import get_unique_indices, iter_block_pages, pair_wiki_files
+
+if TYPE_CHECKING:
+    from backend.db.local.keyword_index import KeywordIndex
+    from backend.db.mongodb.connection import MongoManager
+    from backend.db.weaviate.connection import WeaviateManager
+    from nlp.near_duplicates import NearDuplicateIndex
+    from nlp.toolkit import NLPToolkit
+    from parser.wiki.export import ChunkParquetSink
+
+logger = logging.getLogger(__name__)
+
+STREAM_CHECKPOINT = "wiki_stream"
+# every multistream block holds up to 100 pages
+PAGES_PER_BLOCK = 100
+
+
+def load_dump_files(dump_dir: str) -> list[tuple[str, list[int]]]:
+    """Multistream file names with their block offsets, in file name order"""
+    pairs = sorted(pair_wiki_files(dump_dir), key=lambda pair: pair["multistream"])
+    return [
+        (pair["multistream"], get_unique_indices(str(Path(dump_dir, pair["index"]))))
+        for pair in pairs
+    ]
+
+
+def iter_dump_batches(
+    dump_dir: str,
+    dump_files: list[tuple[str, list[int]]],
+    batch_size: int,
+    resume_after: tuple[str, int] | None = None,
+) -> Iterator[tuple[list[dict[str, Any]], str, int]]:
+    """
+    Read pages straight from the multistream dump files and yield
+    (pages, file name, offset of the last block) batches made of whole blocks,
+    so that the offset can be used as a resume point. Blocks up to resume_after
+    are skipped.
+    """
+    for file, indices in dump_files:
+        if resume_after is not None and file < resume_after[0]:
+            continue
+        if resume_after is not None and file == resume_after[0]:
+            indices = [offset for offset in indices if offset > resume_after[1]]
+
+        batch: list[dict[str, Any]] = []
+        for offset, pages in iter_block_pages(str(Path(dump_dir, file)), indices):
+            batch.extend(pages)
+            if len(batch) >= batch_size:
+                yield batch, file, offset
+                batch = []
+        if batch:
+            yield batch, file, indices[-1]
+
+
+def iter_dump_titles(dump_dir: str) -> Iterator[tuple[str, str, str | None]]:
+    """
+    Yield (page id, title, redirect target) of every page of the dump files, the
+    title index of stream mode is built from them instead of scraper_db.wikipedia.
+    """
+    dump_files = load_dump_files(dump_dir)
+    for batch, _, _ in iter_dump_batches(dump_dir, dump_files, PAGES_PER_BLOCK):
+        for page in batch:
+            yield page["_id"], page["title"], page["redirect"]
+
+
+def run_stream(
+    mongodb_client: MongoManager,
+    weaviate_client: WeaviateManager,
+    nlp_toolkit: NLPToolkit,
+    dump_dir: str,
+    batch_size: int,
+    restart: bool = False,
+    keyword_index: KeywordIndex | None = None,
+    chunk_sink: ChunkParquetSink | None = None,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> None:
+    """
+    Parse pages read directly from the dump files, without staging them in
+    scraper_db.wikipedia. Only wiki_plain_articles and the stream position are
+    stored in MongoDB, the position is saved after every persisted batch. Once a
+    batch has pages that failed to import, the position stays at the last fully
+    imported batch, so a restarted stream parses the failed pages again.
+    """
+    resume_after = (
+        None if restart else mongodb_client.load_stream_position(STREAM_CHECKPOINT)
+    )
+    if resume_after is not None:
+        logger.info(
+            f"Resuming stream after block {resume_after[1]} of {resume_after[0]}"
+        )
+
+    dump_files = load_dump_files(dump_dir)
+    total_blocks = sum(len(indices) for _, indices in dump_files)
+    expected_total_batches = math.ceil(total_blocks * PAGES_PER_BLOCK / batch_size)
+
+    time_start = time.time()
+    failed_pages = 0
+    # position is frozen from the first batch with failed pages on
+    save_position = True
+    with BatchPersister(mongodb_client) as persister:
+        for batch_idx, (batch, file, offset) in enumerate(
+            iter_dump_batches(dump_dir, dump_files, batch_size, resume_after)
+        ):
+            parsed = process_batch(
+                batch,
+                batch_idx,
+                expected_total_batches,
+                time_start,
+                mongodb_client,
+                weaviate_client,
+                nlp_toolkit,
+                keyword_index,
+                chunk_sink,
+                near_duplicates,
+            )
+            # failed pages are kept in weaviate_dead_letter, the stream goes on
+            batch_failed = len(batch) - len(parsed.done_ids)
+            failed_pages += batch_failed
+            if batch_failed and save_position:
+                save_position = False
+                logger.warning(
+                    f"{batch_failed} pages of the batch ending at block {offset} "
+                    f"of {file} failed, the stream position is not advanced further"
+                )
+
+            def complete(
+                _: list[Any],
+                file: str = file,
+                offset: int = offset,
+                save: bool = save_position,
+            ) -> None:
+                if save:
+                    mongodb_client.save_stream_position(STREAM_CHECKPOINT, file, offset)
+
+            persister.submit(parsed, complete)
+
+    logger.info(f"Stream finished, {failed_pages} pages failed to import")
+    if not save_position:
+        logger.warning("Run the stream again to retry the failed pages")
+
+
+def reparse_pages(
+    mongodb_client: MongoManager,
+    weaviate_client: WeaviateManager,
+    nlp_toolkit: NLPToolkit,
+    dump_dir: str,
+    page_ids: list[str],
+    titles: list[str],
+    keyword_index: KeywordIndex | None = None,
+    chunk_sink: ChunkParquetSink | None = None,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> None:
+    """
+    Parse selected pages again, reading them straight from the bz2 dump through
+    the page index (built first if it does not exist yet).
+    """
+    if not Path(dump_dir, PAGE_INDEX_FILENAME).exists():
+        build_page_index(dump_dir)
+
+    with PageIndex(dump_dir) as page_index:
+        pages = page_index.fetch_pages(page_ids=page_ids, titles=titles)
+    logger.info(f"Found {len(pages)} of {len(page_ids) + len(titles)} requested pages")
+    if not pages:
+        return
+
+    with BatchPersister(mongodb_client) as persister:
+        parsed = process_batch(
+            pages,
+            0,
+            1,
+            time.time(),
+            mongodb_client,
+            weaviate_client,
+            nlp_toolkit,
+            keyword_index,
+            chunk_sink,
+            near_duplicates,
+        )
+        persister.submit(parsed, lambda _: None)
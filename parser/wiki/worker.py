@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import socket
+import threading
+import time
+from functools import partial
+from typing import TYPE_CHECKING
+
+from nlp.utils import process_batch
+from parser.wiki.persist import BatchPersister
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+    from backend.db.local.keyword_index import KeywordIndex
+    from backend.db.mongodb.connection import MongoManager
+    from backend.db.weaviate.connection import WeaviateManager
+    from nlp.near_duplicates import NearDuplicateIndex
+    from nlp.toolkit import NLPToolkit
+    from parser.wiki.export import ChunkParquetSink
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class LeaseHeartbeat:
+    """
+    Background thread renewing the lease of a claimed batch while it is processed,
+    so that only leases of crashed workers expire.
+    """
+
+    def __init__(
+        self,
+        mongodb_client: MongoManager,
+        collection_name: str,
+        claim_id: str,
+        lease_seconds: float,
+    ):
+        self.mongodb_client = mongodb_client
+        self.collection_name = collection_name
+        self.claim_id = claim_id
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self) -> LeaseHeartbeat:
+        self._thread.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.lease_seconds / 3):
+            held = self.mongodb_client.renew_lease(
+                self.collection_name, self.claim_id, self.lease_seconds
+            )
+            if not held:
+                logger.warning(f"Lease of claim {self.claim_id} has been lost")
+
+
+def run_worker(
+    mongodb_client: MongoManager,
+    weaviate_client: WeaviateManager,
+    nlp_toolkit: NLPToolkit,
+    batch_size: int,
+    lease_seconds: float,
+    worker_id: str | None = None,
+    collection_name: str = "wikipedia",
+    keyword_index: KeywordIndex | None = None,
+    chunk_sink: ChunkParquetSink | None = None,
+    near_duplicates: NearDuplicateIndex | None = None,
+) -> None:
+    """
+    Claim and process batches until no pending documents are left. Any number of
+    workers can run against the same MongoDB and Weaviate. Documents that failed
+    are pending again right away, the worker does not claim them a second time.
+    """
+    worker_id = worker_id or default_worker_id()
+    mongodb_client.ensure_work_queue(collection_name)
+    expected_total_batches = math.ceil(
+        mongodb_client.count_pending(collection_name) / batch_size
+    )
+    logger.info(f"Worker {worker_id} started, lease {lease_seconds}s")
+
+    # failed documents are left to other workers and later runs
+    failed_ids: set[str] = set()
+
+    def complete(claim_id: str, claimed_ids: list[str], done_ids: list[str]) -> None:
+        failed_ids.update(set(claimed_ids) - set(done_ids))
+        completed = mongodb_client.complete_claim(collection_name, claim_id, done_ids)
+        logger.info(
+            f"Worker {worker_id} completed {completed}/{len(claimed_ids)} documents"
+        )
+
+    time_start = time.time()
+    batch_idx = 0
+    with BatchPersister(mongodb_client) as persister:
+        while True:
+            claim_id, batch = mongodb_client.claim_batch(
+                collection_name,
+                worker_id,
+                batch_size,
+                lease_seconds,
+                projection={"_id": 1, "title": 1, "content": 1, "text": 1},
+                exclude_ids=failed_ids,
+            )
+            if not batch:
+                # exit only when nothing is claimable, documents may turn
+                # pending again after the claim (reclaimed expired leases)
+                if mongodb_client.count_pending(collection_name, failed_ids):
+                    time.sleep(lease_seconds / 10)
+                    continue
+                break
+
+            with LeaseHeartbeat(
+                mongodb_client, collection_name, claim_id, lease_seconds
+            ):
+                parsed = process_batch(
+                    batch,
+                    batch_idx,
+                    expected_total_batches,
+                    time_start,
+                    mongodb_client,
+                    weaviate_client,
+                    nlp_toolkit,
+                    keyword_index,
+                    chunk_sink,
+                    near_duplicates,
+                )
+            # the lease covers the background save, it lasts much longer than it
+            persister.submit(
+                parsed, partial(complete, claim_id, [doc["_id"] for doc in batch])
+            )
+            batch_idx += 1
+
+    logger.info(
+        f"Worker {worker_id} finished, {len(failed_ids)} documents it failed are "
+        f"left pending"
+    )
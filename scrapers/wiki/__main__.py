@@ -6,6 +6,7 @@ from backend.db.mongodb.connection import MongoManager
 from config import MongoDBSettings, ScraperSettings
 from logger_config import setup_logging
 from scrapers.wiki.async_func import run_scraper
+from scrapers.wiki.page_index import build_page_index
 from scrapers.wiki.utils import (
     fetch_dumpstatus,
     get_download_urls,
@@ -49,9 +50,13 @@ if __name__ == "__main__":
     asyncio.run(run_scraper(download_urls, WIKI_DOWNLOAD_PATH))
 
     index_multistream_pairs = pair_wiki_files(WIKI_DOWNLOAD_PATH)
+    build_page_index(WIKI_DOWNLOAD_PATH)
 
     for pair in index_multistream_pairs:
         indices = get_unique_indices(WIKI_DOWNLOAD_PATH + pair["index"])
         multistream_to_mongodb(
-            mongodb_client, WIKI_DOWNLOAD_PATH + pair["multistream"], indices
+            mongodb_client,
+            WIKI_DOWNLOAD_PATH + pair["multistream"],
+            indices,
+            page_storage=scraper_settings.WIKI_PAGE_STORAGE,
         )
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import bz2
+import logging
+import sqlite3
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from scrapers.wiki.utils import (
+    get_full_block,
+    get_slim_page,
+    get_title_id_from_page,
+    pair_wiki_files,
+)
+
+if TYPE_CHECKING:
+    from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+PAGE_INDEX_FILENAME = "page_index.sqlite"
+
+
+def build_page_index(dump_dir: str, db_path: str | None = None) -> str:
+    """
+    Store (page id, title, multistream file, block offset) of every page listed in
+    the multistream index files of dump_dir in a SQLite database. Page id is the
+    rowid, titles have their own index. Returns the database path.
+    """
+    db_path = db_path or str(Path(dump_dir, PAGE_INDEX_FILENAME))
+    tmp_path = f"{db_path}.tmp"
+    Path(tmp_path).unlink(missing_ok=True)
+
+    connection = sqlite3.connect(tmp_path)
+    connection.execute("PRAGMA journal_mode=OFF")
+    connection.execute("PRAGMA synchronous=OFF")
+    connection.execute(
+        "CREATE TABLE pages "
+        "(id INTEGER PRIMARY KEY, title TEXT NOT NULL, file TEXT NOT NULL, "
+        "offset INTEGER NOT NULL)"
+    )
+    total = 0
+    for pair in pair_wiki_files(dump_dir):
+        logger.info(f"Indexing pages of {pair['multistream']}")
+        with bz2.open(Path(dump_dir, pair["index"]), "rt", encoding="utf-8") as source:
+            rows = []
+            for line in source:
+                # offset:id:title, the title itself may contain colons
+                parts = line.rstrip("\n").split(":", 2)
+                if len(parts) < 3 or not parts[0].isdigit() or not parts[1].isdigit():
+                    continue
+                rows.append(
+                    (int(parts[1]), parts[2], pair["multistream"], int(parts[0]))
+                )
+            connection.executemany(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?)", rows
+            )
+            total += len(rows)
+    connection.execute("CREATE INDEX pages_title ON pages (title)")
+    connection.commit()
+    connection.close()
+
+    Path(tmp_path).replace(db_path)
+    logger.info(f"Page index with {total} pages saved to {db_path}")
+    return db_path
+
+
+class PageIndex:
+    """
+    Read-only lookup of pages by id or title in the index built by
+    build_page_index. Pages are read straight from their bz2 block of the dump.
+    """
+
+    def __init__(self, dump_dir: str, db_path: str | None = None):
+        self.dump_dir = dump_dir
+        db_path = db_path or str(Path(dump_dir, PAGE_INDEX_FILENAME))
+        self.connection = sqlite3.connect(
+            f"file:{db_path}?mode=ro", uri=True, check_same_thread=False
+        )
+
+    def __enter__(self) -> PageIndex:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def locate_ids(self, page_ids: list[str]) -> dict[str, tuple[str, int]]:
+        """Map page ids to (multistream file, block offset), unknown ids are skipped"""
+        keys = [int(page_id) for page_id in page_ids if page_id.isdigit()]
+        return {
+            page_id: (file, offset)
+            for _, page_id, file, offset in self._locate("id", keys)
+        }
+
+    def locate_titles(self, titles: list[str]) -> dict[str, str]:
+        """Map exact (unescaped) titles to page ids, unknown titles are skipped"""
+        return {
+            title: page_id for title, page_id, _, _ in self._locate("title", titles)
+        }
+
+    def _locate(self, column: str, keys: list[Any]) -> list[tuple[str, str, str, int]]:
+        """(key, page id, file, offset) rows of pages whose column is in keys"""
+        rows: list[tuple[str, str, str, int]] = []
+        # SQLite limits the number of bound parameters of a single statement
+        for i in range(0, len(keys), 500):
+            page = keys[i : i + 500]
+            placeholders = ", ".join("?" * len(page))
+            cursor = self.connection.execute(
+                f"SELECT {column}, id, file, offset FROM pages "
+                f"WHERE {column} IN ({placeholders})",
+                page,
+            )
+            rows.extend(
+                (str(key), str(id_), file, offset) for key, id_, file, offset in cursor
+            )
+        return rows
+
+    def fetch_pages(
+        self, page_ids: list[str] | None = None, titles: list[str] | None = None
+    ) -> list[dict[str, Any]]:
+        """
+        Read pages (slim storage format) by id and/or exact title from the dump.
+        Every bz2 block is decompressed once, however many pages it holds.
+        """
+        page_ids = list(page_ids or [])
+        if titles:
+            page_ids.extend(self.locate_titles(titles).values())
+        located = self.locate_ids(page_ids)
+        wanted_ids = set(located)
+        blocks = set(located.values())
+
+        pages = []
+        for file, offset in sorted(blocks):
+            block = get_full_block(str(Path(self.dump_dir, file)), offset)
+            if block is None:
+                continue
+            for page in block.split("<page>"):
+                if page.isspace():
+                    continue
+                title, page_id = get_title_id_from_page(page)
+                if page_id in wanted_ids:
+                    pages.append(get_slim_page(page, title, page_id))
+        return pages
@@ -2,21 +2,27 @@ from __future__ import annotations
 
 import bz2
 import hashlib
+import html
 import json
 import logging
 import re
 import xml.etree.ElementTree as ET
+from collections.abc import Iterator
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, cast
+from typing import TYPE_CHECKING, Any, Literal, cast
 
 import requests
 from tqdm import tqdm
 
+from backend.db.mongodb.connection import PENDING
+
 if TYPE_CHECKING:
     from backend.db.mongodb.connection import MongoManager
 
 logger = logging.getLogger(__name__)
 
+PageStorage = Literal["full", "slim"]
+
 
 def get_latest_dumpstatus_url(rss_url) -> str | None:
     """
@@ -207,32 +213,89 @@ def get_title_id_from_page(page: str) -> tuple[str, str]:
     return title, page_id
 
 
+def _tag_text(xml: str, tag: str) -> str | None:
+    start = xml.find(f"<{tag}>")
+    if start == -1:
+        return None
+    start += len(tag) + 2
+    return xml[start : xml.find(f"</{tag}>", start)]
+
+
+def get_slim_page(page: str, title: str, page_id: str) -> dict[str, Any]:
+    """
+    Keep only the wikitext body and the metadata that is read downstream
+    (title, id, namespace, redirect target, revision id and sha1) of a <page>
+    XML fragment.
+    """
+    head, _, revision = page.partition("<revision>")
+    ns = _tag_text(head, "ns")
+    redirect = re.search(r'<redirect title="([^"]*)"', head)
+    match = re.search(r"<text[^>]*>(.*?)</text>", revision, re.DOTALL)
+    return {
+        "_id": page_id,
+        "title": title,
+        "ns": int(ns) if ns and ns.lstrip("-").isdigit() else None,
+        "revision_id": _tag_text(revision, "id"),
+        "sha1": _tag_text(revision, "sha1"),
+        "redirect": html.unescape(redirect.group(1)) if redirect else None,
+        "text": html.unescape(match.group(1)) if match else "",
+    }
+
+
+def iter_block_pages(
+    filepath: str, indices: list[int], page_storage: PageStorage = "slim"
+) -> Iterator[tuple[int, list[dict[str, Any]]]]:
+    """
+    Yield (byte offset, pages) of every multistream block, pages are stored
+    according to page_storage.
+    """
+    for offset in indices:
+        full_xml_block = get_full_block(filepath, offset)
+        if full_xml_block is None:
+            continue
+        pages = []
+        for page in full_xml_block.split("<page>"):
+            if page.isspace():
+                continue
+            title, page_id = get_title_id_from_page(page)
+            if not page_id:
+                continue
+            if page_storage == "slim":
+                pages.append(get_slim_page(page, title, page_id))
+            else:
+                pages.append({"_id": page_id, "title": title, "content": page})
+        yield offset, pages
+
+
 def multistream_to_mongodb(
-    mongodb_client: MongoManager, filepath: str, indices: list[int]
+    mongodb_client: MongoManager,
+    filepath: str,
+    indices: list[int],
+    page_storage: PageStorage = "slim",
 ) -> None:
     """
     Processes a Wikipedia multistream xml blocks and performs bulk upserts to MongoDB.
+    With slim page storage only the wikitext and its metadata are stored instead
+    of the whole <page> XML.
     """
     logger.info(
         f"Upserting records to MongoDB scraper_db/wikipedia from file: {filepath}"
     )
     batch = []
     batch_size = 30
-    for offset in tqdm(indices):
-        full_xml_block = get_full_block(filepath, offset)
-        if full_xml_block is None:
-            continue
-        pages = full_xml_block.split("<page>")
-        for page in pages:
-            if not page.isspace():
-                title, page_id = get_title_id_from_page(page)
-                if page_id:
-                    load = {"_id": page_id, "title": title, "content": page}
-                    batch.append(load)
-                if len(batch) >= batch_size:
-                    mongodb_client.bulk_upsert("wikipedia", batch)
-                    batch = []
+    for _, pages in tqdm(
+        iter_block_pages(filepath, indices, page_storage), total=len(indices)
+    ):
+        for load in pages:
+            batch.append(load)
+            if len(batch) >= batch_size:
+                mongodb_client.bulk_upsert(
+                    "wikipedia", batch, set_on_insert={"status": PENDING}
+                )
+                batch = []
 
     if batch:
-        mongodb_client.bulk_upsert("wikipedia", batch)
+        mongodb_client.bulk_upsert(
+            "wikipedia", batch, set_on_insert={"status": PENDING}
+        )
     logger.info(f"Finished upserting file: {filepath}")
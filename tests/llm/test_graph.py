@@ -0,0 +1,56 @@
+import pytest
+
+pytest.importorskip("langgraph")
+pytest.importorskip("instructor")
+
+from llm.graph import ranked_chunk_fetch  # noqa: E402
+
+HITS = {
+    "Kraków": ["Kraków leży nad Wisłą", "Wawel"],
+    "Gdańsk": ["Gdańsk leży nad morzem"],
+    "Wisła": ["Kraków leży nad Wisłą", "Wisła uchodzi do Bałtyku", "Wawel"],
+}
+
+
+class FakeRetrieval:
+    def single_wikichunk_hybrid_fetch(self, query_text, limit, alpha):
+        return [
+            {"source_id": query_text, "chunk_id": i, "chunk_text": text}
+            for i, text in enumerate(HITS[query_text][:limit])
+        ]
+
+
+class FakeToolkit:
+    """Score of a pair depends on both the query and the text"""
+
+    def __init__(self):
+        self.calls = []
+
+    def rank_pairs(self, pairs):
+        self.calls.append(pairs)
+        return [self.score(query, text) for query, text in pairs]
+
+    @staticmethod
+    def score(query, text):
+        return len(query) * 100 + len(text)
+
+
+def test_scores_of_one_batch_go_to_their_query_and_chunk():
+    nlp_toolkit = FakeToolkit()
+    config = {
+        "configurable": {"weaviate_client": FakeRetrieval(), "nlp_toolkit": nlp_toolkit}
+    }
+
+    results = ranked_chunk_fetch(["Kraków", "Gdańsk", "Wisła"], 8, 0.5, config)
+
+    # all pairs are reranked in a single call
+    assert len(nlp_toolkit.calls) == 1
+    assert len(nlp_toolkit.calls[0]) == 6
+    assert [[elem["chunk_text"] for elem in hits] for hits in results] == [
+        HITS["Kraków"],
+        HITS["Gdańsk"],
+        HITS["Wisła"],
+    ]
+    for query, hits in zip(["Kraków", "Gdańsk", "Wisła"], results, strict=True):
+        for elem in hits:
+            assert elem["rank_score"] == FakeToolkit.score(query, elem["chunk_text"])
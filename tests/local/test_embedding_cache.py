@@ -0,0 +1,18 @@
+import pytest
+
+from backend.db.local.embedding_cache import EmbeddingCache
+from backend.db.local.vector_store import text_hash
+
+
+def test_vectors_are_cached_per_model(tmp_path):
+    db_path = str(tmp_path / "embeddings.sqlite")
+    with EmbeddingCache(db_path) as cache:
+        cache.put_many("model-a", {text_hash("Wstęp"): [0.5, -1.0]})
+
+    with EmbeddingCache(db_path) as cache:
+        hashes = [text_hash("Wstęp"), text_hash("Historia"), text_hash("Wstęp")]
+        found = cache.get_many("model-a", hashes)
+
+        assert found.keys() == {text_hash("Wstęp")}
+        assert found[text_hash("Wstęp")] == pytest.approx([0.5, -1.0])
+        assert cache.get_many("model-b", hashes) == {}
@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from backend.db.local.bm25 import BM25Index
+from backend.db.local.keyword_index import KeywordIndex
+
+
+def test_search_matches_exhaustive_bm25_across_segments(tmp_path):
+    rng = random.Random(7)
+    vocabulary = [f"w{i}" for i in range(40)]
+    texts = [
+        " ".join(rng.choices(vocabulary, k=rng.randint(3, 30))) for _ in range(300)
+    ]
+    chunks = [{"source_id": str(i // 3), "chunk_id": i % 3} for i in range(len(texts))]
+
+    with KeywordIndex(str(tmp_path / "keywords.sqlite")) as index:
+        # articles are never split between parser batches
+        for start in range(0, len(texts), 99):
+            index.add_chunks(
+                chunks[start : start + 99],
+                [text.split() for text in texts[start : start + 99]],
+            )
+        reference = BM25Index(texts, tokenize=str.split)
+
+        for query in ["w1 w2 w3", "w5", "w7 w7 w30 w39 w0"]:
+            expected = reference.search(query, 10)
+            results = index.search(query.split(), 10)
+            assert [score for *_, score in results] == pytest.approx(
+                [score for _, score in expected], rel=1e-5
+            )
+            assert {(source_id, chunk_id) for source_id, chunk_id, _ in results} == {
+                (chunks[doc]["source_id"], chunks[doc]["chunk_id"])
+                for doc, _ in expected
+            }
+
+
+def test_readded_article_replaces_its_chunks(tmp_path):
+    with KeywordIndex(str(tmp_path / "keywords.sqlite")) as index:
+        index.add_chunks(
+            [
+                {"source_id": "1", "chunk_id": 0},
+                {"source_id": "1", "chunk_id": 1},
+                {"source_id": "2", "chunk_id": 0},
+            ],
+            [["warszawa", "stolica"], ["wisła"], ["gdańsk", "morze"]],
+        )
+        index.add_chunks([{"source_id": "1", "chunk_id": 0}], [["kraków"]])
+
+        assert index.search(["warszawa", "wisła"], 5) == []
+        results = index.search(["kraków", "morze"], 5)
+        assert {(source_id, chunk_id) for source_id, chunk_id, _ in results} == {
+            ("1", 0),
+            ("2", 0),
+        }
@@ -0,0 +1,61 @@
+import numpy as np
+
+from backend.db.local.connection import LocalRetrievalManager, write_local_store
+
+CHUNKS = [
+    {"source_id": "1", "chunk_id": 0, "chunk_text": "Kraków leży nad Wisłą"},
+    {"source_id": "1", "chunk_id": 1, "chunk_text": "Wawel jest zamkiem królewskim"},
+    {"source_id": "2", "chunk_id": 0, "chunk_text": "Gdańsk leży nad morzem"},
+]
+VECTORS = np.array([[1.0, 0.0, 0.0], [0.8, 0.6, 0.0], [0.0, 0.0, 2.0]])
+ARTICLES = [
+    {"source_id": "1", "source_title": "Kraków"},
+    {"source_id": "2", "source_title": "Gdańsk"},
+]
+
+
+def make_manager(tmp_path):
+    write_local_store(str(tmp_path), CHUNKS, VECTORS, ARTICLES)
+    return LocalRetrievalManager.from_directory(
+        str(tmp_path), embed_query=lambda text: [0.0, 0.0, 1.0]
+    )
+
+
+def test_vector_and_keyword_search(tmp_path):
+    manager = make_manager(tmp_path)
+
+    vector_only = manager.single_wikichunk_hybrid_fetch("cokolwiek", 1, alpha=1.0)
+    assert [(c["source_id"], c["chunk_id"]) for c in vector_only] == [("2", 0)]
+    assert vector_only[0]["source_title"] == "Gdańsk"
+
+    keyword_only = manager.single_wikichunk_hybrid_fetch("zamek Wawel", 2, alpha=0.0)
+    assert [(c["source_id"], c["chunk_id"]) for c in keyword_only] == [("1", 1)]
+
+    # the article title is searchable on every chunk
+    by_title = manager.single_wikichunk_hybrid_fetch("Kraków", 3, alpha=0.0)
+    assert {(c["source_id"], c["chunk_id"]) for c in by_title} == {("1", 0), ("1", 1)}
+
+
+def test_hybrid_fusion_combines_both_lists(tmp_path):
+    manager = make_manager(tmp_path)
+
+    results = manager.single_wikichunk_hybrid_fetch("Wisłą", 3, alpha=0.5)
+
+    assert {(c["source_id"], c["chunk_id"]) for c in results[:2]} == {
+        ("2", 0),
+        ("1", 0),
+    }
+    assert results[0]["score"] >= results[-1]["score"]
+
+
+def test_fetch_by_keys_skips_missing_and_sorts(tmp_path):
+    manager = make_manager(tmp_path)
+
+    chunks = manager.batch_wikichunk_fetch({"2": [0, 5], "1": [1, 0]})
+
+    assert [(c["source_id"], c["chunk_id"]) for c in chunks] == [
+        ("1", 0),
+        ("1", 1),
+        ("2", 0),
+    ]
+    assert all(c["rank_score"] == -999.0 for c in chunks)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from backend.db.local.vector_store import VECTORS_FILENAME, ChunkVectorStore
+
+
+def chunk(source_id, chunk_id):
+    return {
+        "source_id": source_id,
+        "chunk_id": chunk_id,
+        "chunk_text": f"{source_id}/{chunk_id}",
+    }
+
+
+def test_latest_version_of_every_article_is_read_back(tmp_path):
+    store = ChunkVectorStore(str(tmp_path))
+    store.append(
+        [chunk("1", 0), chunk("1", 1), chunk("2", 0)],
+        ["a", "b", "c"],
+        [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]],
+        titles={"1": "Kraków", "2": "Gdańsk"},
+    )
+    # article 1 parsed again into a single chunk
+    store.append(
+        [{**chunk("1", 0), "duplicate_of": "2:0"}],
+        ["d"],
+        [[2.0, 2.0]],
+        titles={"1": "Kraków"},
+    )
+
+    reopened = ChunkVectorStore(str(tmp_path))
+    records, vectors = next(reopened.iter_latest())
+
+    assert [(r["source_id"], r["chunk_id"]) for r in records] == [("1", 0), ("2", 0)]
+    assert records[0]["source_title"] == "Kraków"
+    # flagged near-duplicates keep their canonical chunk
+    assert records[0]["duplicate_of"] == "2:0"
+    assert "duplicate_of" not in records[1]
+    np.testing.assert_array_equal(vectors, [[2.0, 2.0], [1.0, 1.0]])
+
+
+def test_new_version_without_chunk_zero_replaces_the_old_one(tmp_path):
+    store = ChunkVectorStore(str(tmp_path))
+    store.append([chunk("1", 0), chunk("1", 1)], ["a", "b"], [[1.0, 0.0], [0.0, 1.0]])
+    # chunk 0 of the new parse was dropped as a near-duplicate, the rest of the
+    # article is appended in two sub-batches of the same version
+    version = store.new_version()
+    store.append([chunk("1", 1)], ["c"], [[2.0, 0.0]], version=version)
+    store.append([chunk("1", 2)], ["d"], [[0.0, 2.0]], version=version)
+
+    records, vectors = next(store.iter_latest())
+
+    assert [(r["source_id"], r["chunk_id"]) for r in records] == [("1", 1), ("1", 2)]
+    np.testing.assert_array_equal(vectors, [[2.0, 0.0], [0.0, 2.0]])
+
+
+def test_vectors_without_record_are_cut_off(tmp_path):
+    store = ChunkVectorStore(str(tmp_path))
+    store.append([chunk("1", 0)], ["a"], [[1.0, 0.0]])
+    # crash after the vectors were written, before their records
+    with (tmp_path / VECTORS_FILENAME).open("ab") as f:
+        f.write(np.ones(2, dtype=np.float32).tobytes())
+
+    reopened = ChunkVectorStore(str(tmp_path))
+
+    assert reopened.count == 1
+    assert (tmp_path / VECTORS_FILENAME).stat().st_size == 2 * 4
+    reopened.append([chunk("2", 0)], ["b"], [[0.0, 1.0]])
+    np.testing.assert_array_equal(reopened.vectors(), [[1.0, 0.0], [0.0, 1.0]])
@@ -1,3 +1,5 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import patch
 
 import mongomock
@@ -31,3 +33,136 @@ def test_bulk_upsert_logic():
         )
         assert result is not None
         assert result.upserted_count == 2
+
+
+def test_fetch_chunk_counts_skips_documents_without_count():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        manager.bulk_upsert(
+            "test_col",
+            [
+                {"_id": "1", "plain_article": "a", "chunk_count": 12},
+                {"_id": "2", "plain_article": "b"},
+                {"_id": "3", "plain_article": "c", "chunk_count": 0},
+            ],
+        )
+
+        counts = manager.fetch_chunk_counts("test_col", ["1", "2", "3", "4"])
+
+        assert counts == {"1": 12, "3": 0}
+        assert manager.fetch_chunk_counts("test_col", []) == {}
+
+
+def test_work_queue_resumes_after_checkpoint_and_keeps_failed_pending():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        manager.db["pages"].insert_many(
+            [
+                {"_id": "1", "processed": True},
+                {"_id": "2"},
+                {"_id": "3", "processed": False},
+                {"_id": "4"},
+            ]
+        )
+        manager.ensure_work_queue("pages")
+        assert manager.count_pending("pages") == 3
+
+        batches = manager.fetch_unprocessed_batches("pages", batch_size=2)
+        first = next(batches)
+        assert [doc["_id"] for doc in first] == ["2", "3"]
+        # "3" failed and stays pending
+        manager.complete_batch("pages", ["2"], last_id=first[-1]["_id"])
+
+        # restarted parser continues after the checkpoint
+        resumed = manager.fetch_unprocessed_batches("pages", batch_size=2)
+        assert [doc["_id"] for doc in next(resumed)] == ["4"]
+        manager.complete_batch("pages", ["4"], last_id="4")
+        assert next(resumed, None) is None
+        # the parser clears the checkpoint once the last batch is saved
+        manager.save_checkpoint("pages", None)
+
+        # the next pass starts from the beginning and picks up the failed document
+        next_pass = manager.fetch_unprocessed_batches("pages", batch_size=2)
+        assert [doc["_id"] for doc in next(next_pass)] == ["3"]
+
+
+def test_bulk_upsert_set_on_insert_keeps_existing_status():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        manager.db["pages"].insert_one({"_id": "1", "title": "a", "status": "done"})
+
+        manager.bulk_upsert(
+            "pages",
+            [{"_id": "1", "title": "b"}, {"_id": "2", "title": "c"}],
+            set_on_insert={"status": "pending"},
+        )
+
+        assert manager.db["pages"].find_one({"_id": "1"})["status"] == "done"
+        assert manager.db["pages"].find_one({"_id": "2"})["status"] == "pending"
+
+
+def test_claim_batch_leases_documents_and_reclaims_expired():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        manager.db["pages"].insert_many(
+            [{"_id": str(i), "status": "pending"} for i in range(5)]
+        )
+
+        claim_a, batch_a = manager.claim_batch("pages", "a", 2, lease_seconds=60)
+        claim_b, batch_b = manager.claim_batch("pages", "b", 2, lease_seconds=-1)
+        assert [doc["_id"] for doc in batch_a] == ["0", "1"]
+        assert [doc["_id"] for doc in batch_b] == ["2", "3"]
+
+        assert manager.renew_lease("pages", claim_a, 60) == 2
+        assert manager.complete_claim("pages", claim_a, ["0"]) == 1
+        assert manager.db["pages"].find_one({"_id": "0"})["status"] == "done"
+        # "1" failed, it is pending again without waiting for the lease
+        assert manager.db["pages"].find_one({"_id": "1"})["status"] == "pending"
+        assert manager.renew_lease("pages", claim_a, 60) == 0
+        assert manager.count_pending("pages", exclude_ids={"1"}) == 1
+
+        # lease of worker b has expired, its documents go to worker c
+        claim_c, batch_c = manager.claim_batch(
+            "pages", "c", 10, lease_seconds=60, exclude_ids={"1"}
+        )
+        assert [doc["_id"] for doc in batch_c] == ["2", "3", "4"]
+        assert manager.complete_claim("pages", claim_b, ["2", "3"]) == 0
+        assert manager.renew_lease("pages", claim_b, 60) == 0
+
+
+def test_concurrent_claims_split_pending_documents():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        manager.db["pages"].insert_many(
+            [{"_id": f"{i:02d}", "status": "pending"} for i in range(20)]
+        )
+        start = threading.Barrier(4)
+
+        def claim_all(worker_id):
+            start.wait()
+            claimed = []
+            while batch := manager.claim_batch("pages", worker_id, 3, 60)[1]:
+                claimed.extend(doc["_id"] for doc in batch)
+            # a worker stops only when nothing is claimable
+            assert manager.count_pending("pages") == 0
+            return claimed
+
+        with ThreadPoolExecutor(4) as executor:
+            claims = list(executor.map(claim_all, "abcd"))
+
+        claimed = [doc_id for worker_claims in claims for doc_id in worker_claims]
+        assert sorted(claimed) == [f"{i:02d}" for i in range(20)]
+
+
+def test_stream_position_roundtrip():
+    with patch("backend.db.mongodb.connection.MongoClient", mongomock.MongoClient):
+        manager = MongoManager("mongodb://localhost", "test_db")
+        assert manager.load_stream_position("wiki_stream") is None
+
+        manager.save_stream_position("wiki_stream", "dump-p1p187037.bz2", 5412)
+        manager.save_stream_position("wiki_stream", "dump-p1p187037.bz2", 9100)
+
+        assert manager.load_stream_position("wiki_stream") == (
+            "dump-p1p187037.bz2",
+            9100,
+        )
@@ -0,0 +1,83 @@
+from nlp.near_duplicates import NearDuplicateIndex, apply_duplicate_policy
+
+STUB = (
+    "{name} – wieś w Polsce położona w województwie mazowieckim, w powiecie "
+    "płockim, w gminie Bielsk. W latach 1975–1998 miejscowość administracyjnie "
+    "należała do województwa płockiego. Według danych z {year} roku wieś liczyła "
+    "{people} mieszkańców i była siedzibą sołectwa obejmującego okoliczne przysiółki."
+)
+
+
+def stub(source_id, name, year, people):
+    text = STUB.format(name=name, year=year, people=people)
+    return {"source_id": source_id, "chunk_id": 0, "chunk_text": text}
+
+
+def test_near_duplicates_are_found_across_batches(tmp_path):
+    db_path = str(tmp_path / "near_duplicates.sqlite")
+    with NearDuplicateIndex(db_path) as index:
+        first = index.assign([stub("1", "Arciechów", 2011, 212)])
+
+    with NearDuplicateIndex(db_path) as index:
+        other = {
+            "source_id": "3",
+            "chunk_id": 0,
+            "chunk_text": "Planetoida odkryta w obserwatorium Palomar w 1960 roku.",
+        }
+        second = index.assign([stub("2", "Bielice", 2021, 187), other])
+        # the canonical chunk stays canonical when its article is parsed again
+        again = index.assign([stub("1", "Arciechów", 2011, 213)])
+
+    assert first == {"1:0": "1:0"}
+    assert second == {"2:0": "1:0", "3:0": "3:0"}
+    assert again == {"1:0": "1:0"}
+
+
+def test_removed_or_changed_canonical_chunks_are_not_matched(tmp_path):
+    other = (
+        "Planetoida odkryta w obserwatorium Palomar w 1960 roku przez zespół "
+        "astronomów, jej orbita leży w pasie głównym między Marsem a Jowiszem."
+    )
+    with NearDuplicateIndex(str(tmp_path / "near_duplicates.sqlite")) as index:
+        index.assign([stub("1", "Arciechów", 2011, 212)])
+        # the canonical article got shorter, its chunk was deleted
+        index.remove([("1", 0)])
+        assert index.assign([stub("2", "Bielice", 2021, 187)]) == {"2:0": "2:0"}
+
+        # the text of the canonical chunk changed
+        index.assign([{"source_id": "2", "chunk_id": 0, "chunk_text": other}])
+        assert index.assign([stub("3", "Cieszyn", 2021, 50)]) == {"3:0": "3:0"}
+        assert index.assign([stub("4", "Dąbrowa", 2001, 7)]) == {"4:0": "3:0"}
+
+
+def test_canonical_chunk_of_linked_duplicates_is_kept(tmp_path):
+    db_path = str(tmp_path / "near_duplicates.sqlite")
+    with NearDuplicateIndex(db_path, policy="link") as index:
+        index.assign([stub("1", "Arciechów", 2011, 212), stub("2", "Bielice", 2021, 9)])
+
+        # "2:0" has no vector of its own, its canonical chunk must stay
+        assert index.remove([("1", 0)]) == [("1", 0)]
+        assert index.assign([stub("3", "Cieszyn", 2021, 187)]) == {"3:0": "1:0"}
+
+        assert index.remove([("2", 0), ("3", 0)]) == []
+        assert index.remove([("1", 0)]) == []
+        assert not index.has_duplicates("1:0")
+
+
+def test_duplicate_policies():
+    chunks = [
+        {"source_id": "1", "chunk_id": 0, "chunk_text": "a"},
+        {"source_id": "2", "chunk_id": 0, "chunk_text": "a"},
+    ]
+    canonical_keys = {"1:0": "1:0", "2:0": "1:0"}
+
+    embedded, linked = apply_duplicate_policy(chunks, canonical_keys, "drop")
+    assert (embedded, linked) == ([chunks[0]], [])
+
+    embedded, linked = apply_duplicate_policy(chunks, canonical_keys, "link")
+    assert embedded == [chunks[0]]
+    assert linked == [{**chunks[1], "duplicate_of": "1:0"}]
+
+    embedded, linked = apply_duplicate_policy(chunks, canonical_keys, "flag")
+    assert embedded == [chunks[0], {**chunks[1], "duplicate_of": "1:0"}]
+    assert linked == []
@@ -0,0 +1,99 @@
+import re
+
+import numpy as np
+
+from nlp.splitting import (
+    pooled_vectors,
+    semantic_split_points,
+    sentence_spans,
+    split_by_offsets,
+    window_similarities,
+)
+
+
+def word_offsets(text):
+    """Offset mapping of a tokenizer with a token per word or punctuation mark"""
+    return [m.span() for m in re.finditer(r"\w+|[^\w\s]", text)]
+
+
+def test_chunks_fit_and_end_on_sentences():
+    sentences = [f"Zdanie numer {i} ma kilka słów w środku." for i in range(60)]
+    text = " ".join(sentences[:30]) + "\n\n" + " ".join(sentences[30:])
+
+    chunks = split_by_offsets(text, word_offsets(text), max_tokens=40, overlap=10)
+
+    assert len(chunks) > 1
+    for chunk in chunks:
+        assert len(word_offsets(chunk)) <= 40
+        assert chunk.startswith("Zdanie")
+        assert chunk.endswith(".")
+    assert all(any(s in chunk for chunk in chunks) for s in sentences)
+    # consecutive chunks overlap by a whole sentence
+    assert all(a.split(". ")[-1] in b for a, b in zip(chunks, chunks[1:], strict=False))
+
+
+def test_paragraph_break_is_preferred():
+    first = "Pierwszy akapit. " * 8
+    text = first.strip() + "\n\nDrugi akapit. " + "Dalszy tekst. " * 8
+
+    chunks = split_by_offsets(text, word_offsets(text), max_tokens=40, overlap=0)
+
+    assert chunks[0] == first.strip()
+    assert chunks[1].startswith("Drugi akapit.")
+
+
+def test_word_longer_than_window_is_cut():
+    text = "a" * 30
+    offsets = [(i, i + 3) for i in range(0, 30, 3)]
+
+    assert split_by_offsets(text, offsets, max_tokens=4, overlap=2) == [
+        "a" * 12,
+        "a" * 12,
+        "a" * 6,
+    ]
+    assert split_by_offsets("", [], max_tokens=4) == []
+
+
+def test_sentence_spans_count_tokens_and_cut_long_sentences():
+    text = "Krótkie zdanie. Drugie też!\nBardzo długie zdanie bez końca i kropki"
+    starts = np.array([start for start, _ in word_offsets(text)])
+
+    spans, counts = sentence_spans(text, starts, max_tokens=4)
+
+    assert [text[start:end].strip() for start, end in spans] == [
+        "Krótkie zdanie.",
+        "Drugie też!",
+        "Bardzo długie zdanie bez",
+        "końca i kropki",
+    ]
+    assert counts.tolist() == [3, 3, 4, 3]
+
+
+def test_semantic_split_at_topic_change_within_limits():
+    topic_a, topic_b = np.eye(2)
+    vectors = np.array([topic_a] * 6 + [topic_b] * 6) + 0.01
+    similarities = window_similarities(vectors, window=3)
+
+    assert similarities[0] == 1.0
+    assert int(np.argmin(similarities)) == 6
+
+    counts = np.full(12, 10)
+    assert semantic_split_points(similarities, counts, 200, 20, 0.5) == [6]
+    # a drop before min_tokens is skipped, chunks over max_tokens are cut
+    assert semantic_split_points(similarities, counts, 200, 90, 0.5) == []
+    points = semantic_split_points(similarities, counts, 40, 20, 0.5)
+    assert 6 in points
+    assert max(np.diff([0, *points, 12])) <= 4
+
+
+def test_pooled_vectors_weight_sentences_by_tokens():
+    vectors = np.array([[2.0, 0.0], [0.0, 1.0], [0.0, 3.0], [1.0, 1.0]])
+    counts = np.array([3, 1, 1, 5])
+
+    pooled = pooled_vectors(vectors, counts, [0, 3])
+
+    assert pooled.shape == (2, 2)
+    np.testing.assert_allclose(np.linalg.norm(pooled, axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(pooled[0], [3, 2] / np.sqrt(13), rtol=1e-6)
+    np.testing.assert_allclose(pooled[1], [1, 1] / np.sqrt(2), rtol=1e-6)
+    assert pooled_vectors(vectors, counts, []).shape == (0, 2)
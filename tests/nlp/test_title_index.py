@@ -0,0 +1,48 @@
+from nlp.entities import NEREntities
+from nlp.title_index import TitleIndex, build_title_index
+
+
+class FakeToolkit:
+    """NER finds the given entity in every query, lemmas are the names themselves"""
+
+    def __init__(self, entity):
+        self.entity = entity
+
+    def extract_ner_entities(self, texts):
+        return [
+            NEREntities(personalia=[{"entity": self.entity, "score": 0.99}])
+            for _ in texts
+        ]
+
+    def lemmatize(self, names, batch_size):
+        return names
+
+
+def test_fast_path_only_for_queries_that_name_an_article(tmp_path):
+    db_path = str(tmp_path / "titles.sqlite")
+    build_title_index(
+        [
+            ("1", "Mikołaj Kopernik", None),
+            ("2", "Kopernik", "Mikołaj Kopernik"),
+            ("3", "Kategoria:Astronomowie", None),
+        ],
+        db_path,
+    )
+
+    with TitleIndex(db_path) as title_index:
+        # the whole query is a title or redirect
+        match = title_index.resolve_query("Kopernik?", FakeToolkit("Kopernik"))
+        assert (match.source_id, match.kind) == ("1", "redirect")
+        match = title_index.resolve_query(
+            "Mikołaj Kopernik", FakeToolkit("Mikołaj Kopernik")
+        )
+        assert match.source_id == "1"
+        # the entity is only a small part of the question
+        assert (
+            title_index.resolve_query(
+                "W którym roku Mikołaj Kopernik wydał swoje dzieło?",
+                FakeToolkit("Mikołaj Kopernik"),
+            )
+            is None
+        )
+        assert title_index.resolve_query("Kategoria", FakeToolkit("Kategoria")) is None
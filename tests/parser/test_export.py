@@ -0,0 +1,76 @@
+import pytest
+
+pytest.importorskip("pyarrow")
+
+from parser.wiki.export import (  # noqa: E402
+    ChunkParquetSink,
+    iter_chunk_batches,
+    load_chunks,
+)
+
+ARTICLES = {
+    "1": {
+        "source_id": "1",
+        "source_title": "Kraków",
+        "wiki_categories": ["Miasta"],
+        "populacja": "800000",
+    },
+    "2": {"source_id": "2", "source_title": "Gdańsk", "wiki_categories": []},
+}
+
+
+def test_exported_chunks_stream_back_with_their_articles(tmp_path):
+    chunks = [
+        {
+            "source_id": source_id,
+            "source_title": ARTICLES[source_id]["source_title"],
+            "chunk_id": chunk_id,
+            "chunk_text": text,
+        }
+        for source_id, chunk_id, text in [
+            ("1", 0, "Kraków leży nad Wisłą"),
+            ("1", 1, "Wawel"),
+            ("2", 0, "Gdańsk leży nad morzem"),
+        ]
+    ]
+    with ChunkParquetSink(str(tmp_path), run="test", row_group_size=2) as sink:
+        sink.write(chunks, ARTICLES)
+
+    batches = list(iter_chunk_batches(str(tmp_path), run="test", batch_size=2))
+
+    assert [chunk for batch, _ in batches for chunk in batch] == chunks
+    loaded_articles = {k: v for _, articles in batches for k, v in articles.items()}
+    assert loaded_articles == ARTICLES
+
+
+class FakeWeaviate:
+    def __init__(self):
+        self.articles = {}
+        self.chunks = []
+
+    def upsert_wiki_articles(self, articles):
+        self.articles.update({article["source_id"]: article for article in articles})
+        return [
+            article["source_id"] for article in articles if article["source_id"] == "2"
+        ]
+
+    def bulk_upsert(self, chunks, articles):
+        self.chunks.extend(chunks)
+        return []
+
+
+def test_loaded_chunks_restore_their_articles(tmp_path):
+    chunks = [
+        {"source_id": "1", "chunk_id": 0, "chunk_text": "Kraków leży nad Wisłą"},
+        {"source_id": "2", "chunk_id": 0, "chunk_text": "Gdańsk leży nad morzem"},
+    ]
+    with ChunkParquetSink(str(tmp_path), run="test") as sink:
+        sink.write(chunks, ARTICLES)
+    weaviate_client = FakeWeaviate()
+
+    failed = load_chunks(str(tmp_path), weaviate_client, run="test")
+
+    assert weaviate_client.articles == ARTICLES
+    assert len(weaviate_client.chunks) == 2
+    # article "2" failed to import
+    assert failed == 1
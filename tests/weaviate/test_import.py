@@ -0,0 +1,91 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("requests")
+pytest.importorskip("llama_index")
+
+from backend.db.weaviate.connection import (  # noqa: E402
+    BatchImportSpec,
+    BatchItem,
+    WeaviateManager,
+)
+
+
+class FakeCollection:
+    """Batch import that fails objects a given number of times before accepting them"""
+
+    name = "WikiChunk"
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+        self.attempts = []
+        self.batch = self
+
+    def fixed_size(self, batch_size, concurrent_requests):
+        return self
+
+    def __enter__(self):
+        self.attempts.append([])
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.failed_objects = []
+        for obj in self.attempts[-1]:
+            if self.failures.get(obj.uuid, 0) > 0:
+                self.failures[obj.uuid] -= 1
+                self.failed_objects.append(
+                    SimpleNamespace(object_=obj, message=f"{obj.uuid} timed out")
+                )
+
+    def add_object(self, properties, uuid, vector):
+        self.attempts[-1].append(
+            SimpleNamespace(uuid=uuid, properties=properties, vector=vector)
+        )
+
+
+def make_manager(max_retries):
+    with patch("backend.db.weaviate.connection.weaviate.connect_to_custom"):
+        return WeaviateManager(
+            "key", batch_import=BatchImportSpec(max_retries=max_retries)
+        )
+
+
+def items(*uuids):
+    return (
+        BatchItem(uuid=uuid, properties={"chunk_text": uuid}, vector=[1.0, 0.0])
+        for uuid in uuids
+    )
+
+
+def test_failed_objects_are_retried_with_backoff():
+    manager = make_manager(max_retries=3)
+    collection = FakeCollection({"b": 1, "c": 2})
+
+    with patch("backend.db.weaviate.connection.time.sleep") as sleep:
+        failed = manager.import_objects(collection, items("a", "b", "c", "d"))
+
+    assert failed == []
+    assert [[obj.uuid for obj in attempt] for attempt in collection.attempts] == [
+        ["a", "b", "c", "d"],
+        ["b", "c"],
+        ["c"],
+    ]
+    # retried objects keep their properties and vector, nothing is re-embedded
+    retried = collection.attempts[2][0]
+    assert (retried.properties, retried.vector) == ({"chunk_text": "c"}, [1.0, 0.0])
+    assert [call.args[0] for call in sleep.call_args_list] == [2.0, 4.0]
+
+
+def test_objects_failing_every_retry_are_returned_for_dead_letters():
+    manager = make_manager(max_retries=2)
+    collection = FakeCollection({"b": 10})
+
+    with patch("backend.db.weaviate.connection.time.sleep"):
+        failed = manager.import_objects(collection, items("a", "b"))
+
+    assert len(collection.attempts) == 3
+    assert [(item.uuid, item.properties, error) for item, error in failed] == [
+        ("b", {"chunk_text": "b"}, "b timed out")
+    ]
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+import weaviate.classes.config as wc
+
+from backend.db.weaviate.schema import (
+    WIKI_CHUNK_SCHEMA,
+    VectorIndexSpec,
+    schema_version,
+)
+
+
+def make_config(properties, vector_index_config=None):
+    return SimpleNamespace(
+        properties=[SimpleNamespace(**prop) for prop in properties],
+        vector_index_config=vector_index_config,
+    )
+
+
+def test_schema_diff_matching_collection():
+    config = make_config(
+        [
+            {"name": "source_id", "index_filterable": True, "index_searchable": False},
+            {"name": "chunk_text", "index_filterable": False, "index_searchable": True},
+            {"name": "chunk_id", "index_filterable": True, "index_searchable": False},
+            {
+                "name": "duplicate_of",
+                "index_filterable": True,
+                "index_searchable": False,
+            },
+            {
+                "name": "source_title",
+                "index_filterable": False,
+                "index_searchable": True,
+            },
+        ]
+    )
+    assert WIKI_CHUNK_SCHEMA.diff(config) == []
+
+
+def test_schema_diff_detects_index_and_property_changes():
+    config = make_config(
+        [
+            {"name": "source_id", "index_filterable": True, "index_searchable": True},
+            {"name": "chunk_text", "index_filterable": True, "index_searchable": True},
+            {"name": "imie", "index_filterable": True, "index_searchable": True},
+        ]
+    )
+    differences = WIKI_CHUNK_SCHEMA.diff(config)
+
+    assert "source_id: index_searchable True -> False" in differences
+    assert "chunk_text: index_filterable True -> False" in differences
+    assert "chunk_id: missing" in differences
+    assert "imie: not in spec" in differences
+
+
+def test_property_spec_skips_searchable_flag_for_non_text():
+    chunk_id = WIKI_CHUNK_SCHEMA.to_properties()[2]
+    assert chunk_id.dataType == wc.DataType.INT
+    assert chunk_id.indexSearchable is None
+    assert chunk_id.indexFilterable is True
+
+
+def test_vector_index_diff_reports_only_immutable_parameters():
+    spec = VectorIndexSpec(ef=256, max_connections=64, quantizer="bq")
+
+    uncompressed = SimpleNamespace(
+        ef=-1, ef_construction=128, max_connections=64, quantizer=None
+    )
+    assert spec.diff(uncompressed) == []
+
+    compressed = SimpleNamespace(
+        ef=-1, ef_construction=128, max_connections=32, quantizer=_PQConfig()
+    )
+    assert spec.diff(compressed) == [
+        "max_connections 32 -> 64",
+        "quantizer pq -> bq",
+    ]
+
+
+class _PQConfig:
+    pass
+
+
+def test_schema_version_from_description():
+    assert schema_version(SimpleNamespace(description=None)) == 0
+    assert schema_version(SimpleNamespace(description="schema_version=3")) == 3
+    assert (
+        WIKI_CHUNK_SCHEMA.description == f"schema_version={WIKI_CHUNK_SCHEMA.version}"
+    )